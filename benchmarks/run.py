@@ -0,0 +1,353 @@
+"""Измерение производительности чтения файлов IONEX.
+
+Синтетические файлы (см. ``synthetic.py``) создаются во временном каталоге
+для каждого сочетания шага сетки и доли отсутствующих значений. Для
+каждого измерения записывается лучшее время из ``--repeat`` повторов, а
+для чтения файлов -- также карт/с, МБ/с и пиковый расход памяти
+(``tracemalloc``). Измерения, для которых в проверяемой версии нет нужных
+параметров или методов, пропускаются и перечисляются в отчёте. Результаты
+сохраняются в JSON и могут быть сравнены с результатами другой версии::
+
+    $ python benchmarks/run.py --output before.json
+    $ git checkout feature
+    $ python benchmarks/run.py --output after.json --compare before.json
+
+С ``--compare`` программа завершается с кодом 1, если какое-либо
+измерение стало медленнее более чем на ``--threshold``.
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+# измеряется версия из этого рабочего каталога, а не установленная
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import ionex  # noqa: E402
+from ionex.ionex_file import IonexV1  # noqa: E402
+from ionex.ionex_map import IonexMap  # noqa: E402
+
+from synthetic import FIRST_EPOCH, cached_ionex, make_grid  # noqa: E402
+
+FORMAT_VERSION = 1
+
+DEFAULT_GRIDS = ['2.5x5', '1x1']
+DEFAULT_MISSING = [0., 0.5]
+
+DATA_LINE = b''.join(b'%5d' % v for v in range(100, 1700, 100))
+EPOCH_LINE = (
+    '  2020     1     1    12     0     0'.ljust(60) + 'EPOCH OF CURRENT MAP'
+).encode('ascii')
+
+
+def _grid(value):
+    dlat, dlon = value.split('x')
+    return float(dlat), float(dlon)
+
+
+# число вызовов в одном повторе; None -- подбирается (timeit.autorange)
+NUMBER = None
+
+# пропущенные измерения: нужного API нет в проверяемой версии
+SKIPPED = []
+
+
+def _supports(**kwargs):
+    """Принимает ли ``IonexV1`` (и ``ionex.reader``) параметры ``kwargs``."""
+    parameters = inspect.signature(IonexV1.__init__).parameters
+    return all(name in parameters for name in kwargs)
+
+
+def _skip(name, params):
+    SKIPPED.append({'name': name, 'params': params})
+
+
+def _best(func, repeat, number=None):
+    """Лучшее время одного вызова ``func``, с."""
+    timer = timeit.Timer(func)
+    if number is None:
+        number = NUMBER
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def _peak(func):
+    """Пиковый расход памяти при вызове ``func``, байт."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def _result(name, params, seconds, **extra):
+    result = {
+        'name': name,
+        'params': params,
+        'seconds': seconds,
+        'ops_per_s': 1. / seconds if seconds else None,
+    }
+    result.update(extra)
+    return result
+
+
+def bench_reader(path, params, repeat):
+    """Чтение всех карт файла в разных режимах."""
+    size = os.path.getsize(path)
+    maps = len(list(ionex.reader(path)))
+
+    modes = {
+        'reader': {},
+        'reader_array': {'array': True},
+        'reader_lazy': {'lazy': True},
+        'reader_rms': {'rms': True},
+    }
+    results = []
+    for name, kwargs in modes.items():
+        if not _supports(**kwargs):
+            _skip(name, dict(params, **kwargs))
+            continue
+
+        def read():
+            for _ in ionex.reader(path, **kwargs):
+                pass
+
+        def keep():
+            return list(ionex.reader(path, **kwargs))
+
+        seconds = _best(read, repeat, number=1)
+        results.append(_result(
+            name, dict(params, **kwargs), seconds,
+            maps_per_s=maps / seconds,
+            mb_per_s=size / seconds / 1e6,
+            peak_bytes=_peak(keep),
+        ))
+    return results
+
+
+def bench_parsing(repeat):
+    """Разбор строк: значения карты и эпоха."""
+    text_line = DATA_LINE.decode('ascii')
+    inx = IonexV1(iter(()))
+    epoch_lines = [
+        '{:6d}{:6d}{:6d}{:6d}{:6d}{:6d}'.format(
+            2020, 1, 1 + i // 96, i // 4 % 24, i % 4 * 15, 0,
+        ).ljust(60).encode('ascii') + b'EPOCH OF CURRENT MAP'
+        for i in range(960)
+    ]
+    measurements = [
+        ('read_slice', {'type': 'bytes'}, None,
+         lambda: IonexV1._read_slice(DATA_LINE)),
+        ('read_slice', {'type': 'str'}, None,
+         lambda: IonexV1._read_slice(text_line)),
+        ('read_block', {'lines': 5}, '_read_block',
+         lambda: IonexV1._read_block([DATA_LINE] * 5)),
+        ('parse_epoch', {}, None,
+         lambda: inx._parse_epoch(EPOCH_LINE)),
+        ('parse_epochs', {'lines': len(epoch_lines)}, '_parse_epochs',
+         lambda: inx._parse_epochs(epoch_lines)),
+    ]
+    results = []
+    for name, params, method, func in measurements:
+        if method is not None and not hasattr(IonexV1, method):
+            _skip(name, params)
+            continue
+        results.append(_result(name, params, _best(func, repeat)))
+    return results
+
+
+def bench_map(dlat, dlon, missing, repeat):
+    """Создание карты и пересчёт значений с учётом степени."""
+    grid = make_grid(dlat, dlon)
+    rng = np.random.default_rng(0)
+    raw = rng.integers(0, 1200, grid.size)
+    raw[rng.random(grid.size) < missing] = IonexV1.none_value
+    values = raw.tolist()
+    params = {'grid': '{}x{}'.format(dlat, dlon), 'missing': missing}
+
+    def make(tec):
+        return IonexMap(
+            exponent=-1,
+            epoch=FIRST_EPOCH,
+            latitude=grid.latitude,
+            longitude=grid.longitude,
+            height=450.,
+            tec=tec,
+            none_value=IonexV1.none_value,
+        )
+
+    ionex_map = make(values)
+    results = [
+        _result('map_init', dict(params, tec='list'),
+                _best(lambda: make(values), repeat)),
+        _result('map_tec', params,
+                _best(lambda: ionex_map.tec, repeat),
+                peak_bytes=_peak(lambda: ionex_map.tec)),
+    ]
+    # карты из массивов numpy
+    if not hasattr(IonexMap, 'tec_array'):
+        _skip('map_init', dict(params, tec='ndarray'))
+        _skip('map_tec_array', params)
+        return results
+
+    array_values = raw.astype(np.int16)
+    results += [
+        _result('map_init', dict(params, tec='ndarray'),
+                _best(lambda: make(array_values), repeat)),
+        _result('map_tec_array', params,
+                _best(lambda: make(array_values).tec_array, repeat)),
+    ]
+    return results
+
+
+def run(grids, missing_values, maps, repeat, directory):
+    results = bench_parsing(repeat)
+    for dlat, dlon in grids:
+        # худший случай замены 9999: все значения отсутствуют
+        for missing in sorted(set(missing_values) | {1.}):
+            results += bench_map(dlat, dlon, missing, repeat)
+        for missing in missing_values:
+            path = cached_ionex(
+                directory, dlat=dlat, dlon=dlon, maps=maps, missing=missing,
+            )
+            params = {
+                'grid': '{}x{}'.format(dlat, dlon),
+                'maps': maps,
+                'missing': missing,
+            }
+            results += bench_reader(path, params, repeat)
+    return results
+
+
+def _key(result):
+    return result['name'], json.dumps(result['params'], sort_keys=True)
+
+
+def compare(results, baseline, threshold):
+    """Напечатать отношение времени к базовым результатам.
+
+    :return: список регрессий: (ключ, отношение).
+    """
+    base = {_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        old = base.get(_key(result))
+        if old is None:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        mark = ''
+        if ratio > 1. + threshold:
+            mark = '  REGRESSION'
+            regressions.append((_key(result), ratio))
+        print('{:<16} {:<60} x{:.2f}{}'.format(
+            result['name'], _key(result)[1], ratio, mark,
+        ))
+    return regressions
+
+
+def _revision():
+    """Вернуть текущую ревизию git рабочего каталога или ``None``."""
+    try:
+        output = subprocess.run(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode('ascii', 'replace').strip() or None
+
+
+def main(argv=None):
+    global NUMBER
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--output', default='benchmark.json',
+                        help='JSON file for the results')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='JSON results of a previous run')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed slowdown, fraction (default 0.2)')
+    parser.add_argument('--grid', action='append', type=_grid,
+                        help='grid step DLATxDLON, e.g. 2.5x5 (repeatable)')
+    parser.add_argument('--missing', action='append', type=float,
+                        help='fraction of missing values (repeatable)')
+    parser.add_argument('--maps', type=int, default=25,
+                        help='maps per synthetic file')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--data-dir',
+                        help='directory for synthetic files (kept)')
+    parser.add_argument('--quick', action='store_true',
+                        help='one small grid, few maps, one repeat')
+    args = parser.parse_args(argv)
+
+    grids = args.grid or [_grid(value) for value in DEFAULT_GRIDS]
+    missing_values = args.missing or DEFAULT_MISSING
+    maps, repeat = args.maps, args.repeat
+    if args.quick:
+        grids, missing_values, maps, repeat = [(5., 10.)], [0.1], 3, 1
+        NUMBER = 1
+
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+        results = run(grids, missing_values, maps, repeat, args.data_dir)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            results = run(grids, missing_values, maps, repeat, directory)
+
+    report = {
+        'format_version': FORMAT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'revision': _revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'results': results,
+        'skipped': SKIPPED,
+    }
+    with open(args.output, 'w') as file_object:
+        json.dump(report, file_object, indent=1)
+
+    for result in results:
+        extra = ''
+        if 'maps_per_s' in result:
+            extra = '{:10.1f} maps/s {:8.1f} MB/s {:8.1f} MB peak'.format(
+                result['maps_per_s'], result['mb_per_s'],
+                result['peak_bytes'] / 1e6,
+            )
+        print('{:<16} {:<52} {:12.2f} us {}'.format(
+            result['name'],
+            json.dumps(result['params'], sort_keys=True),
+            result['seconds'] * 1e6,
+            extra,
+        ))
+
+    for result in SKIPPED:
+        print('{:<16} {:<52} skipped: not supported'.format(
+            result['name'], json.dumps(result['params'], sort_keys=True),
+        ))
+
+    if args.compare:
+        with open(args.compare) as file_object:
+            baseline = json.load(file_object)
+        print()
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""Синтетические файлы IONEX для измерения производительности.
+
+Файлы записываются как текст, без средств записи пакета, чтобы измерения
+можно было выполнить и для версий, в которых их нет: глобальная сетка с
+заданным шагом, ``maps`` карт с интервалом ``interval`` секунд, доля
+``missing`` отсутствующих значений (``9999``), распределённых случайно.
+"""
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+
+FIRST_EPOCH = datetime(2020, 1, 1)
+
+EXPONENT = -1
+NONE_VALUE = 9999
+# значений ПЭС в одной строке файла
+LINE_VALUES = 16
+
+
+class Grid(namedtuple('Grid', ['latitude', 'longitude'])):
+    """Сетка карты: ``(lat1, lat2, dlat)`` и ``(lon1, lon2, dlon)``."""
+
+    __slots__ = ()
+
+    @property
+    def shape(self):
+        return tuple(
+            int(round((end - start) / step)) + 1
+            for start, end, step in self
+        )
+
+    @property
+    def size(self):
+        rows, columns = self.shape
+        return rows * columns
+
+
+def make_grid(dlat, dlon):
+    """Глобальная сетка с шагом ``dlat`` по широте и ``dlon`` по долготе."""
+    lat = 87.5 if (87.5 / dlat).is_integer() else 90.
+    return Grid((lat, -lat, -dlat), (-180., 180., dlon))
+
+
+def _line(content, label):
+    return '{:<60}{}\n'.format(content, label)
+
+
+def _epoch(epoch):
+    return '{:6d}{:6d}{:6d}{:6d}{:6d}{:6d}'.format(
+        epoch.year, epoch.month, epoch.day,
+        epoch.hour, epoch.minute, epoch.second,
+    )
+
+
+def _triple(values):
+    return '  {:6.1f}{:6.1f}{:6.1f}'.format(*values)
+
+
+def _header(grid, epochs, interval):
+    return ''.join([
+        _line('{:8.1f}{:12}{:<20}{:<20}'.format(
+            1., '', 'IONOSPHERE MAPS', 'GPS'), 'IONEX VERSION / TYPE'),
+        _line('{:<20}{:<20}{:<20}'.format('synthetic', '', ''),
+              'PGM / RUN BY / DATE'),
+        _line('Synthetic file for benchmarks', 'DESCRIPTION'),
+        _line(_epoch(epochs[0]), 'EPOCH OF FIRST MAP'),
+        _line(_epoch(epochs[-1]), 'EPOCH OF LAST MAP'),
+        _line('{:6d}'.format(interval), 'INTERVAL'),
+        _line('{:6d}'.format(len(epochs)), '# OF MAPS IN FILE'),
+        _line('  NONE', 'MAPPING FUNCTION'),
+        _line('{:8.1f}'.format(0.), 'ELEVATION CUTOFF'),
+        _line('{:8.1f}'.format(6371.), 'BASE RADIUS'),
+        _line('{:6d}'.format(2), 'MAP DIMENSION'),
+        _line(_triple((450., 450., 0.)), 'HGT1 / HGT2 / DHGT'),
+        _line(_triple(grid.latitude), 'LAT1 / LAT2 / DLAT'),
+        _line(_triple(grid.longitude), 'LON1 / LON2 / DLON'),
+        _line('{:6d}'.format(EXPONENT), 'EXPONENT'),
+        _line('', 'END OF HEADER'),
+    ])
+
+
+def _map(kind, number, epoch, grid, values):
+    """Текст карты ``kind`` (``TEC`` или ``RMS``) со значениями ``values``
+    формы ``grid.shape``."""
+    raw = np.round(values * 10 ** -EXPONENT)
+    raw[np.isnan(values)] = NONE_VALUE
+    raw = raw.astype(int)
+
+    lat1, _, dlat = grid.latitude
+    lon1, lon2, dlon = grid.longitude
+    lines = [
+        _line('{:6d}'.format(number), 'START OF {} MAP'.format(kind)),
+        _line(_epoch(epoch), 'EPOCH OF CURRENT MAP'),
+    ]
+    for i, row in enumerate(raw):
+        lines.append(_line(
+            '  {:6.1f}{:6.1f}{:6.1f}{:6.1f}{:6.1f}'.format(
+                lat1 + i * dlat, lon1, lon2, dlon, 450.),
+            'LAT/LON1/LON2/DLON/H',
+        ))
+        for start in range(0, len(row), LINE_VALUES):
+            lines.append(''.join(
+                '{:5d}'.format(v) for v in row[start:start + LINE_VALUES]
+            ) + '\n')
+    lines.append(_line('{:6d}'.format(number), 'END OF {} MAP'.format(kind)))
+    return ''.join(lines)
+
+
+def make_ionex(path, *, dlat=2.5, dlon=5., maps=13, missing=0.,
+               interval=7200, rms=True, seed=0):
+    """Записать синтетический файл IONEX.
+
+    :param path: путь к файлу.
+
+    :param dlat: шаг сетки по широте, градусы.
+
+    :param dlon: шаг сетки по долготе, градусы.
+
+    :param maps: число карт ПЭС.
+
+    :param missing: доля отсутствующих значений, от 0 до 1.
+
+    :param interval: интервал между картами, с.
+
+    :param rms: также записать карты RMS.
+
+    :param seed: начальное значение генератора случайных чисел.
+
+    :return: путь к файлу.
+    """
+    grid = make_grid(dlat, dlon)
+    rng = np.random.default_rng(seed)
+    shape = (maps, ) + grid.shape
+
+    tec = rng.uniform(0., 120., shape)
+    tec[rng.random(shape) < missing] = np.nan
+    rms_values = None
+    if rms:
+        rms_values = rng.uniform(0., 10., shape)
+        rms_values[np.isnan(tec)] = np.nan
+
+    epochs = [
+        FIRST_EPOCH + timedelta(seconds=interval * i) for i in range(maps)
+    ]
+    with open(path, 'w') as file_object:
+        file_object.write(_header(grid, epochs, interval))
+        for i, epoch in enumerate(epochs):
+            file_object.write(_map('TEC', i + 1, epoch, grid, tec[i]))
+        if rms:
+            for i, epoch in enumerate(epochs):
+                file_object.write(
+                    _map('RMS', i + 1, epoch, grid, rms_values[i])
+                )
+        file_object.write(_line('', 'END OF FILE'))
+    return path
+
+
+def cached_ionex(directory, **kwargs):
+    """Вернуть путь к синтетическому файлу с параметрами ``kwargs``,
+    записав его в ``directory``, если его там ещё нет."""
+    name = 'synthetic_' + '_'.join(
+        '{}{}'.format(key, kwargs[key]) for key in sorted(kwargs)
+    ) + '.i'
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        make_ionex(path, **kwargs)
+    return path
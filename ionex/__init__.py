@@ -1,21 +1,52 @@
+from .compression import is_binary, open_binary
 from .ionex_file import IonexV1, NullContext
+from .ionex_index import IndexedIonexV1
+from .index_cache import IndexCache
+from .bulk import load_many
+from .parallel import parallel_reader
+from .interpolation import TecInterpolator
+from .binary import dump, load
+from .ionex_writer import writer, write_arrays
+from .catalog import read_header, scan
+from .dcb import collect_dcb
+from .async_reader import areader
+from .follower import follow
+from .stats import ParseStats
+from .pyramid import build_pyramid, load_pyramid
 from .exceptions import IONEXError
 from .exceptions import IONEXUnexpectedEnd
 
-__all__ = ['reader']
+__all__ = [
+    'reader', 'load_many', 'parallel_reader', 'IndexCache',
+    'TecInterpolator', 'dump', 'load', 'writer', 'write_arrays',
+    'read_header', 'scan', 'collect_dcb', 'areader', 'follow',
+    'ParseStats', 'build_pyramid', 'load_pyramid',
+]
 
 
 def _get_version_type(line):
+    if isinstance(line, bytes):
+        line = line.decode('latin-1')
     return float(line[:8]), line[20]
 
 
-def reader(file):
+def reader(file, *, random_access=False, **kwargs):
     """Возвращает читалку файла в формате IONEX.
     Читалка - итерируемый объект, на каждой итерации возвращает экземпляр
     ``ionex_map.IonexMap`` очередной карты, прочитанной из файла.
 
     :type file: str | file-object
-    :param file: Путь к файлу IONEX или объект файла.
+    :param file: Путь к файлу IONEX или объект файла. Файлы, сжатые
+        ``compress`` (.Z), ``gzip`` или ``bzip2``, распаковываются при чтении;
+        тип сжатия определяется по первым байтам.
+
+    :param random_access: Вернуть читалку с произвольным доступом к картам
+        (``IndexedIonexV1``): ``len(inx)``, ``inx[i]``,
+        ``inx.at_epoch(epoch)``. Файл должен находиться на диске.
+        Индекс можно сохранять между запусками: ``cache=IndexCache(path)``.
+
+    :param kwargs: Параметры читалки, например ``array=True`` -- хранить
+        значения карт в массивах ``numpy`` (см. ``IonexV1``).
 
     :raises IONEXError:
         Если неизвестный тип или версия переданного файла.
@@ -29,17 +60,24 @@ def reader(file):
     readers = {
         1.0: IonexV1,
     }
+    if random_access:
+        readers = {
+            1.0: IndexedIonexV1,
+        }
 
     if isinstance(file, str):
-        context_manager = open(file)
+        context_manager = open_binary(file)
     else:
+        if is_binary(file) and not random_access:
+            file = open_binary(file)
         context_manager = NullContext(file)
 
     with context_manager as file_object:
         try:
-            file_ver, file_type = _get_version_type(next(file_object))
+            line = next(file_object)
         except StopIteration:
             raise IONEXUnexpectedEnd(file_object)
+        file_ver, file_type = _get_version_type(line)
 
         if file_type != 'I':
             raise IONEXError('Unknown file type.')
@@ -47,4 +85,9 @@ def reader(file):
             raise IONEXError('Unsupported version: {}'.format(file_ver))
 
         reader_class = readers[file_ver]
-        return reader_class(file)
+        inx = reader_class(file, **kwargs)
+        if not isinstance(file, str):
+            # первая строка объекта файла уже прочитана: заголовок читалки
+            # её не увидит, поэтому она разбирается здесь
+            inx._set_record('IONEX VERSION / TYPE', line)
+        return inx
@@ -0,0 +1,54 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+def require_numpy(feature):
+    """Вернуть модуль ``numpy`` или возбудить ``ImportError``, если
+    ``numpy`` не установлен.
+
+    :param feature: название возможности, для которой нужен ``numpy``;
+        используется в сообщении об ошибке.
+    """
+    if numpy is None:
+        raise ImportError(
+            '{} requires numpy: pip install ionex[numpy]'.format(feature)
+        )
+    return numpy
+
+
+def int_array(values):
+    """Упаковать целые значения в ``numpy.int16``, если они туда
+    помещаются, иначе -- в ``numpy.int32``.
+    """
+    np = require_numpy('Array mode')
+    data = np.asarray(values, dtype=np.int32)
+    info = np.iinfo(np.int16)
+    if data.size and (data.min() < info.min or data.max() > info.max):
+        return data
+    return data.astype(np.int16)
+
+
+def int_store(values):
+    """Упаковать целые значения в ``array('h')`` (2 байта на значение),
+    если они туда помещаются, иначе -- в ``array('i')``.
+
+    :param values: ``list`` или ``numpy.ndarray`` целых чисел.
+    """
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        data = values.reshape(-1)
+        info = numpy.iinfo(numpy.int16)
+        typecode = 'h'
+        if data.size and (data.min() < info.min or data.max() > info.max):
+            typecode = 'i'
+        # одно приведение типа и одно копирование буфера в array
+        store = array(typecode)
+        store.frombytes(data.astype(typecode, copy=False).data.cast('B'))
+        return store
+    try:
+        return array('h', values)
+    except OverflowError:
+        return array('i', values)
@@ -0,0 +1,142 @@
+"""Асинхронное чтение файлов IONEX из потока байт.
+
+Данные принимаются порциями по мере поступления, в цикле событий только
+ищутся метки конца карт (``bytes.find``); разбор каждой полученной карты
+выполняется в исполнителе (``loop.run_in_executor``), поэтому один цикл
+событий может одновременно принимать много файлов::
+
+    async for ionex_map in ionex.areader(stream):
+        ...
+"""
+import asyncio
+
+from .blocks import BlockIonexV1
+from .compression import CHUNK_SIZE, decompressor, is_compressed
+
+
+class AsyncIonexV1(BlockIonexV1):
+    """Асинхронная читалка IONEX: ``async for ionex_map in inx``.
+
+    Заголовок (``header``, ``grid``, ...) доступен после получения первой
+    карты. Параметры чтения карт -- как у ``IonexV1``.
+    """
+
+    def __init__(self, stream, *, executor=None, chunk_size=CHUNK_SIZE,
+                 **kwargs):
+        """
+        :param stream: ``asyncio.StreamReader`` или другой объект с
+            сопрограммой ``read(n)``, либо асинхронный итерируемый объект
+            порций ``bytes``. Сжатые данные (``compress``, ``gzip``,
+            ``bzip2``) распаковываются по мере поступления.
+
+        :param executor: ``concurrent.futures.Executor`` для разбора карт и
+            распаковки; по умолчанию -- исполнитель цикла событий.
+
+        :param chunk_size: размер порции, запрашиваемой у ``read(n)``, байт.
+
+        :param kwargs: см. ``IonexV1``.
+        """
+        super().__init__(stream, **kwargs)
+        self.name = getattr(stream, 'name', '<Unknown>')
+        self._stream = stream
+        self._executor = executor
+        self._chunk_size = chunk_size
+
+    async def _raw_chunks(self):
+        read = getattr(self._stream, 'read', None)
+        if read is not None:
+            while True:
+                chunk = await read(self._chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+        else:
+            async for chunk in self._stream:
+                if chunk:
+                    yield chunk
+
+    async def _chunks(self):
+        """Порции распакованных данных."""
+        loop = asyncio.get_running_loop()
+        chunks = self._raw_chunks()
+
+        # для определения сжатия нужны первые 3 байта
+        prefix = b''
+        async for chunk in chunks:
+            prefix += chunk
+            if len(prefix) >= 3:
+                break
+        if not is_compressed(prefix):
+            if prefix:
+                yield prefix
+            async for chunk in chunks:
+                yield chunk
+            return
+
+        decoder = decompressor(prefix)
+        data = await loop.run_in_executor(
+            self._executor, decoder.decompress, prefix,
+        )
+        if data:
+            yield data
+        async for chunk in chunks:
+            data = await loop.run_in_executor(
+                self._executor, decoder.decompress, chunk,
+            )
+            if data:
+                yield data
+
+    async def _next_map_async(self):
+        loop = asyncio.get_running_loop()
+
+        async for chunk in self._chunks():
+            self._buffer += chunk
+            while True:
+                data = self._next_block()
+                if data is None:
+                    break
+                maps = await loop.run_in_executor(
+                    self._executor, self._parse_maps, data,
+                )
+                for ionex_map in self._add_maps(maps):
+                    yield ionex_map
+            if self._end_of_file:
+                break
+
+        data = self._tail()
+        if data is not None:
+            maps = await loop.run_in_executor(
+                self._executor, self._parse_maps, data,
+            )
+            for ionex_map in self._add_maps(maps):
+                yield ionex_map
+        for ionex_map in self._flush():
+            yield ionex_map
+
+    def __aiter__(self):
+        return self._next_map_async()
+
+    def __iter__(self):
+        raise TypeError('Use "async for" with an asynchronous reader.')
+
+
+def areader(stream, **kwargs):
+    """Возвращает асинхронную читалку потока IONEX (``AsyncIonexV1``)::
+
+        reader, writer = await asyncio.open_connection(host, port)
+        async for ionex_map in ionex.areader(reader):
+            ...
+
+    :param stream: ``asyncio.StreamReader``, объект с сопрограммой
+        ``read(n)`` или асинхронный итерируемый объект порций ``bytes``.
+
+    :param kwargs: параметры читалки: ``executor``, ``chunk_size`` (см.
+        ``AsyncIonexV1``), ``array``, ``rms``, ``lazy`` (см. ``IonexV1``).
+
+    :raises IONEXError:
+        Если неизвестный тип или версия файла.
+
+    :raises IONEXUnexpectedEnd:
+        Неполный файл.
+    """
+    return AsyncIonexV1(stream, **kwargs)
@@ -0,0 +1,273 @@
+"""Компактный двоичный формат для разобранных файлов IONEX.
+
+Файл IONEX разбирается один раз и сохраняется (``dump``) в контейнер, из
+которого карты затем читаются (``load``) отображением в память, без
+разбора текста и без копирования данных.
+
+Структура контейнера::
+
+    MAGIC                        8 байт
+    длина заголовка              4 байта, uint32 little-endian
+    заголовок                    JSON (UTF-8), дополнен пробелами
+    карты ПЭС                    (карта, [высота,] широта, долгота),
+                                 int16/int32 LE
+    карты RMS (если есть)        то же
+
+Значения хранятся в том виде, в каком записаны в файле IONEX: целые числа
+без учёта степени ('EXPONENT'), ``9999`` -- отсутствующее значение. Массивы
+выровнены по ``ALIGNMENT`` байт от начала файла.
+"""
+import json
+import struct
+
+from ._compat import require_numpy
+from .exceptions import IONEXError
+from .ionex_file import Latitude, Longitude, Height
+from .ionex_map import IonexMap
+
+MAGIC = b'IONEXBIN'
+VERSION = 1
+ALIGNMENT = 64
+
+_HEADER_SIZE = struct.Struct('<I')
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _collect(maps, rms):
+    """Вернуть первую карту, эпохи, высоты и массивы значений карт."""
+    np = require_numpy('ionex.dump')
+
+    first = None
+    epochs, tec, rms_data = [], [], []
+    for ionex_map in maps:
+        if first is None:
+            first = ionex_map
+        elif ionex_map.grid != first.grid:
+            raise IONEXError(
+                'Grid mismatch: {}'.format(ionex_map.epoch)
+            )
+        elif ionex_map.exponent != first.exponent:
+            raise IONEXError(
+                'Exponent mismatch: {}'.format(ionex_map.epoch)
+            )
+
+        epochs.append(ionex_map.epoch)
+        tec.append(np.asarray(ionex_map.raw_tec))
+        if rms:
+            rms_data.append(ionex_map.raw_rms)
+
+    if first is None:
+        raise IONEXError('No maps to dump.')
+
+    shape = (len(tec), ) + first.shape
+    tec = np.stack(tec).reshape(shape)
+    if not rms or any(values is None for values in rms_data):
+        rms_data = None
+    else:
+        rms_data = np.stack([np.asarray(v) for v in rms_data]).reshape(shape)
+    return first, epochs, tec, rms_data
+
+
+def _height_def(height):
+    """Высота карты для заголовка: ``None``, число или (hgt1, hgt2,
+    dhgt), см. ``IonexMap``."""
+    if height is None or isinstance(height, (int, float)):
+        return height
+    return list(height)
+
+
+def _pack(array):
+    """Привести значения к ``int16``, если они туда помещаются."""
+    np = require_numpy('ionex.dump')
+    info = np.iinfo(np.int16)
+    if array.size and (array.min() < info.min or array.max() > info.max):
+        return array.astype('<i4')
+    return array.astype('<i2')
+
+
+def dump(source, path, *, rms=True):
+    """Сохранить карты в двоичный контейнер.
+
+    :param source: путь к файлу IONEX или итерируемый объект карт
+        ``IonexMap`` с одинаковой сеткой и степенью (например, читалка
+        ``ionex.reader``).
+
+    :param path: путь к файлу контейнера.
+
+    :param rms: ``bool``, также сохранить карты RMS, если они есть у всех
+        карт ПЭС.
+
+    :raises IONEXError: если нет ни одной карты или сетка либо степень
+        карт не совпадают.
+    """
+    if isinstance(source, str):
+        # импорт здесь: ionex/__init__.py импортирует этот модуль
+        from . import reader
+        source = reader(source, array=True, rms=rms)
+
+    first, epochs, tec, rms_data = _collect(source, rms)
+    arrays = [('tec', _pack(tec))]
+    if rms_data is not None:
+        arrays.append(('rms', _pack(rms_data)))
+
+    header = {
+        'version': VERSION,
+        'exponent': first.exponent,
+        'none_value': first.none_value,
+        'latitude': list(first.grid.latitude),
+        'longitude': list(first.grid.longitude),
+        'height': _height_def(first.height),
+        'dimension': first.dimension,
+        'epochs': [epoch.isoformat() for epoch in epochs],
+        'shape': list(tec.shape),
+    }
+
+    # смещения массивов отсчитываются от начала файла и записываются в
+    # заголовок, поэтому начало данных подбирается под длину заголовка
+    prefix = len(MAGIC) + _HEADER_SIZE.size
+    data_start = _align(prefix)
+    while True:
+        offset = data_start
+        for name, array in arrays:
+            header[name] = {'dtype': array.dtype.str, 'offset': offset}
+            offset = _align(offset + array.nbytes)
+        encoded = json.dumps(header).encode('utf-8')
+        if prefix + len(encoded) <= data_start:
+            break
+        data_start = _align(prefix + len(encoded))
+    header_size = data_start - prefix
+    encoded = encoded.ljust(header_size)
+
+    with open(path, 'wb') as file_object:
+        file_object.write(MAGIC)
+        file_object.write(_HEADER_SIZE.pack(header_size))
+        file_object.write(encoded)
+        for name, array in arrays:
+            file_object.seek(header[name]['offset'])
+            file_object.write(array.tobytes())
+
+
+def _read_header(path):
+    with open(path, 'rb') as file_object:
+        if file_object.read(len(MAGIC)) != MAGIC:
+            raise IONEXError('Not an IONEX binary file: {}'.format(path))
+        size, = _HEADER_SIZE.unpack(file_object.read(_HEADER_SIZE.size))
+        header = json.loads(file_object.read(size).decode('utf-8'))
+
+    if header.get('version') != VERSION:
+        raise IONEXError(
+            'Unsupported binary version: {}'.format(header.get('version'))
+        )
+    return header
+
+
+class BinaryIonex:
+    """Карты из двоичного контейнера (см. ``dump``).
+
+    Значения карт отображаются в память (``numpy.memmap``) и не
+    копируются: ``tec`` и ``rms`` -- массивы (карта, широта, долгота)
+    значений без учёта степени, карты ``IonexMap`` ссылаются на их
+    части::
+
+        with ionex.load('igsg0010.00i.bin') as inx:
+            inx[11].tec_array
+            inx.at_epoch(datetime(2000, 1, 1, 23))
+    """
+
+    def __init__(self, path):
+        """
+        :param path: путь к файлу контейнера.
+
+        :raises IONEXError: если файл -- не контейнер или неизвестна версия
+            формата.
+        """
+        np = require_numpy('ionex.load')
+
+        header = _read_header(path)
+        self.name = path
+        self.exponent = header['exponent']
+        self.none_value = header['none_value']
+        self.latitude = Latitude(*header['latitude'])
+        self.longitude = Longitude(*header['longitude'])
+        self.dimension = header['dimension']
+        # высота -- в том же виде, что у сохранённых карт
+        self.height = header['height']
+        if isinstance(self.height, list):
+            self.height = Height(*self.height)
+
+        self._epochs = np.array(
+            header['epochs'], dtype='datetime64[us]'
+        ).tolist()
+        self._index = {epoch: i for i, epoch in enumerate(self._epochs)}
+
+        shape = tuple(header['shape'])
+
+        def memmap(name):
+            if name not in header:
+                return None
+            return np.memmap(
+                path,
+                dtype=header[name]['dtype'],
+                mode='r',
+                offset=header[name]['offset'],
+                shape=shape,
+            )
+
+        self.tec = memmap('tec')
+        self.rms = memmap('rms')
+
+    @property
+    def epochs(self):
+        """Вернуть эпохи карт в порядке следования."""
+        return list(self._epochs)
+
+    def _make_map(self, i):
+        return IonexMap(
+            exponent=self.exponent,
+            epoch=self._epochs[i],
+            longitude=self.longitude,
+            latitude=self.latitude,
+            height=self.height,
+            tec=self.tec[i],
+            rms=None if self.rms is None else self.rms[i],
+            none_value=self.none_value,
+            dimension=self.dimension,
+        )
+
+    def __len__(self):
+        return len(self._epochs)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._make_map(i) for i in range(len(self))[item]]
+        return self._make_map(range(len(self))[item])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._make_map(i)
+
+    def at_epoch(self, epoch):
+        """Вернуть карту ПЭС для эпохи ``epoch``.
+
+        :type epoch: datetime
+        :raises KeyError: если в контейнере нет карты для этой эпохи.
+        """
+        return self._make_map(self._index[epoch])
+
+    def close(self):
+        # отображение освобождается, когда на массивы не останется ссылок
+        self.tec = self.rms = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load(path):
+    """Открыть двоичный контейнер, см. ``BinaryIonex``."""
+    return BinaryIonex(path)
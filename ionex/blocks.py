@@ -0,0 +1,159 @@
+"""Разбор файла IONEX из буфера байт, который пополняется порциями.
+
+Из буфера отрезаются законченные фрагменты: заголовок (до строки
+'END OF HEADER') и блоки карт (до строки 'END OF TEC MAP',
+'END OF RMS MAP' или 'END OF FILE'); метки ищутся ``bytes.find``, без
+разбиения буфера на строки. Используется асинхронной читалкой
+(``ionex.areader``) и читалкой дописываемых файлов (``ionex.follow``).
+"""
+import warnings
+
+from .exceptions import IONEXError, IONEXUnexpectedEnd
+from .ionex_file import IonexV1
+
+# метка начинается в 61-й колонке строки
+LABEL_COLUMN = 60
+
+END_OF_HEADER = b'END OF HEADER'
+# метки, которыми заканчивается фрагмент с картами
+END_LABELS = (b'END OF TEC MAP', b'END OF RMS MAP', b'END OF FILE')
+
+
+def find_label(buffer, label, start=0):
+    """Найти в ``buffer`` строку с меткой ``label``, начиная с ``start``.
+
+    :return: смещение конца строки (после ``b'\\n'``) или ``-1``, если
+        строка не найдена или получена не полностью.
+    """
+    pos = buffer.find(label, start)
+    while pos != -1:
+        line_start = buffer.rfind(b'\n', 0, pos) + 1
+        if pos - line_start == LABEL_COLUMN:
+            line_end = buffer.find(b'\n', pos)
+            return -1 if line_end == -1 else line_end + 1
+        pos = buffer.find(label, pos + 1)
+    return -1
+
+
+class BlockIonexV1(IonexV1):
+    """Основа читалок, получающих файл порциями байт.
+
+    Порции добавляются в ``self._buffer``; ``_next_block`` отрезает
+    очередной фрагмент с картами, ``_parse_maps`` разбирает его (не меняя
+    состояние читалки, поэтому может выполняться в другом потоке),
+    ``_add_maps`` связывает карты ПЭС и RMS и возвращает готовые карты.
+    """
+
+    def __init__(self, file, **kwargs):
+        super().__init__(file, **kwargs)
+        self._buffer = bytearray()
+        # позиция, с которой искать метки в self._buffer
+        self._search_from = 0
+        self._header_parsed = False
+        self._end_of_file = False
+        # карты ПЭС, ожидающие соответствующую карту RMS: (номер, карта)
+        self._pending = []
+
+    def _open(self, file):
+        # данные поступают порциями в self._buffer, строки -- bytes
+        self._get_label = self._get_byte_label
+        return None
+
+    def _parse_header(self, data):
+        self._read_header(iter(data.split(b'\n')))
+        if self._records.get('file_type') != 'I':
+            raise IONEXError('Unknown file type.')
+        if self._records.get('version') != 1.0:
+            raise IONEXError(
+                'Unsupported version: {}'.format(self._records.get('version'))
+            )
+        self._header_parsed = True
+
+    def _next_block(self):
+        """Отрезать от буфера очередной законченный фрагмент с картами;
+        заголовок разбирается здесь же.
+
+        :return: фрагмент (``bytes``) или ``None``, если в буфере нет
+            законченного фрагмента.
+        """
+        while not self._end_of_file:
+            labels = END_LABELS if self._header_parsed else (END_OF_HEADER, )
+            ends = [
+                find_label(self._buffer, label, self._search_from)
+                for label in labels
+            ]
+            ends = [end for end in ends if end != -1]
+            if not ends:
+                # строка с меткой могла прийти не полностью
+                self._search_from = max(
+                    0, len(self._buffer) - 2 * LABEL_COLUMN,
+                )
+                return None
+
+            end = min(ends)
+            data = bytes(self._buffer[:end])
+            del self._buffer[:end]
+            self._search_from = 0
+
+            if not self._header_parsed:
+                self._parse_header(data)
+                continue
+            if data.rstrip().endswith(b'END OF FILE'):
+                self._end_of_file = True
+            return data
+        return None
+
+    def _parse_maps(self, data):
+        """Разобрать карты фрагмента ``data``.
+
+        :return: список (метка начала, номер, ``Map``).
+        """
+        lines = iter(data.split(b'\n'))
+        maps = []
+        for line in lines:
+            label = self._get_label(line)
+            if label == 'START OF TEC MAP':
+                maps.append((label, int(line[:6]), self._read_map(lines)))
+            elif label == 'START OF RMS MAP':
+                if not self._rms:
+                    self._skip_map(lines, 'END OF RMS MAP')
+                    continue
+                rms_map = self._read_map(lines, 'END OF RMS MAP')
+                maps.append((label, int(line[:6]), rms_map))
+        # карты вне периода start -- end пропущены (None)
+        return [entry for entry in maps if entry[2] is not None]
+
+    def _add_maps(self, maps):
+        """Принять разобранные карты; вернуть список карт, готовых к
+        выдаче."""
+        ready = []
+        for label, number, data in maps:
+            if label == 'START OF TEC MAP':
+                self._tec_maps_numbers.append(number)
+                ready += self._add_tec_map(self._pending, number, data)
+            else:
+                ready += self._add_rms_map(self._pending, number, data)
+        return ready
+
+    def _tail(self):
+        """Вернуть остаток буфера после окончания данных или ``None``.
+
+        Непустой остаток -- незаконченная карта: ``_parse_maps`` вызовет
+        ``IONEXUnexpectedEnd``, как ``IonexV1``.
+
+        :raises IONEXUnexpectedEnd: если заголовок не получен полностью.
+        """
+        if not self._header_parsed:
+            raise IONEXUnexpectedEnd(self)
+        if self._end_of_file or not self._buffer.strip():
+            return None
+        return bytes(self._buffer)
+
+    def _flush(self):
+        """Вернуть карты ПЭС, оставшиеся без карт RMS, по окончании
+        данных."""
+        if not self._end_of_file:
+            warnings.warn('Unexpected end of the file {}.'.format(self.name))
+        maps = [self._make_map(tec_map) for _, tec_map in self._pending]
+        del self._pending[:]
+        return maps
@@ -0,0 +1,135 @@
+from collections import namedtuple
+
+from ._compat import require_numpy
+from .exceptions import IONEXError
+from .ionex_file import IonexV1
+from .parallel import _attach, _discard_chunks, _file_chunks, _release
+
+Stack = namedtuple('Stack', ['epochs', 'tec', 'rms', 'grid', 'exponent'])
+
+
+def load_many(paths, *, rms=False, max_workers=None, executor=None):
+    """Прочитать несколько файлов IONEX и сложить карты в один массив
+    (время, широта, долгота).
+
+    Файлы читаются параллельно (см. ``parallel_reader``), затем
+    упорядочиваются по эпохе первой карты. Значения карт пересчитываются
+    в результат прямо из разделяемой памяти, без промежуточных копий.
+    Карты, эпоха которых не позже последней уже добавленной (например,
+    карта на полночь, которая есть и в конце одних суток, и в начале
+    следующих), пропускаются.
+
+    :param paths: пути к файлам IONEX.
+
+    :param rms: ``bool``, также сложить карты RMS.
+
+    :param max_workers: число процессов, см. ``ProcessPoolExecutor``.
+
+    :param executor: ``concurrent.futures.Executor``, в котором читать файлы;
+        если задан, ``max_workers`` не используется.
+
+    :return: ``namedtuple``, Stack('Stack', ['epochs', 'tec', 'rms', 'grid',
+        'exponent']): ``epochs`` -- ``numpy.ndarray`` эпох
+        (``datetime64[s]``), ``tec`` (и ``rms``) -- ``numpy.ndarray``
+        (время, широта, долгота) с учётом степени, отсутствующие
+        значения -- ``nan``; ``grid`` -- ``MapGrid`` (latitude, longitude).
+
+    :raises IONEXError:
+        Если сетка или степень файлов не совпадают или нет ни одной карты.
+    """
+    require_numpy('ionex.load_many')
+
+    files = []
+    try:
+        for chunks in _file_chunks(paths, rms=rms, max_workers=max_workers,
+                                   executor=executor):
+            files.append(chunks)
+        return _stack(files, rms)
+    finally:
+        for chunks in files:
+            _discard_chunks(chunks)
+
+
+def _epochs(chunks):
+    return [epoch for chunk in chunks for epoch in chunk.epochs]
+
+
+def _stack(files, rms):
+    """Сложить карты файлов (списков частей ``FileMaps``, см.
+    ``parallel._file_chunks``) в ``Stack``."""
+    np = require_numpy('ionex.load_many')
+
+    files = [chunks for chunks in files if _epochs(chunks)]
+    if not files:
+        raise IONEXError('No maps to load.')
+    files.sort(key=lambda chunks: _epochs(chunks)[0])
+
+    first = files[0][0]
+    grid, exponent = first.grid, first.exponent
+    selected = []
+    last_epoch = None
+    for chunks in files:
+        if chunks[0].grid != grid:
+            raise IONEXError('Grid mismatch: {}'.format(chunks[0].path))
+        if chunks[0].exponent != exponent:
+            raise IONEXError('Exponent mismatch: {}'.format(chunks[0].path))
+
+        epochs = _epochs(chunks)
+        keep = [
+            i for i, epoch in enumerate(epochs)
+            if last_epoch is None or epoch > last_epoch
+        ]
+        if keep:
+            last_epoch = epochs[keep[-1]]
+        selected.append((chunks, epochs, keep))
+
+    size = sum(len(keep) for _, _, keep in selected)
+    tec = next(chunk.tec for chunk in files[0] if chunk.tec is not None)
+    shape = (size, ) + tuple(tec.shape[1:])
+    scale = 10.0 ** exponent
+
+    def fill(name):
+        result = np.empty(shape, dtype=np.float64)
+        i = 0
+        for chunks, _, keep in selected:
+            offset = 0
+            for chunk in chunks:
+                count = len(chunk.epochs)
+                rows = [k - offset for k in keep if 0 <= k - offset < count]
+                offset += count
+                if not rows:
+                    continue
+                raw, shm = _attach(getattr(chunk, name))
+                try:
+                    _scale(raw, rows, scale, result[i:i + len(rows)])
+                    i += len(rows)
+                finally:
+                    del raw
+                    _release(shm)
+        return result
+
+    epochs = np.array(
+        [epochs[i] for _, epochs, keep in selected for i in keep],
+        dtype='datetime64[s]',
+    )
+    return Stack(
+        epochs=epochs,
+        tec=fill('tec'),
+        rms=fill('rms') if rms else None,
+        grid=grid,
+        exponent=exponent,
+    )
+
+
+def _scale(raw, rows, scale, out):
+    """Записать в ``out`` карты ``rows`` массива ``raw`` с учётом степени;
+    отсутствующие значения -- ``nan``."""
+    np = require_numpy('ionex.load_many')
+    if rows[-1] - rows[0] + 1 == len(rows):
+        # обычно пропускаются только первые карты: непрерывный срез
+        pieces = [(slice(rows[0], rows[-1] + 1), out)]
+    else:
+        pieces = [(row, out[j]) for j, row in enumerate(rows)]
+    for row, dst in pieces:
+        np.multiply(raw[row], scale, out=dst)
+        dst[raw[row] == IonexV1.none_value] = np.nan
@@ -0,0 +1,146 @@
+"""Быстрое чтение метаданных файлов IONEX для каталогизации архивов.
+
+``read_header`` разбирает только заголовок и останавливается на
+'END OF HEADER'; ``scan`` также просматривает метки карт (эпохи карт ПЭС
+и RMS), не преобразуя значения карт в числа.
+"""
+from collections import namedtuple
+
+from ._compat import require_numpy
+from .compression import is_compressed
+from .epochs import epoch_list
+from .exceptions import IONEXError
+from .ionex_file import IonexV1
+from .ionex_index import IndexedIonexV1
+
+_IonexScan = namedtuple('IonexScan', ['header', 'epochs', 'rms_epochs'])
+
+
+class IonexScan(_IonexScan):
+    """Результат ``scan``. Эпохи карт также доступны массивами
+    ``epoch_array`` и ``rms_epoch_array`` (``datetime64[s]``) -- в том
+    виде, в котором они разобраны."""
+
+    @classmethod
+    def _from_axes(cls, header, epochs, rms_epochs):
+        """Создать результат по эпохам, разобранным ``_parse_epochs``."""
+        result = cls(header, epoch_list(epochs), epoch_list(rms_epochs))
+        result._axes = (epochs, rms_epochs)
+        return result
+
+    def _axis(self, i):
+        np = require_numpy('Epoch arrays')
+        axes = getattr(self, '_axes', None)
+        if axes is None or not isinstance(axes[i], np.ndarray):
+            return np.array(self[i + 1], dtype='datetime64[s]')
+        return axes[i].copy()
+
+    @property
+    def epoch_array(self):
+        """Вернуть эпохи карт ПЭС, ``numpy.ndarray``
+        (``datetime64[s]``)."""
+        return self._axis(0)
+
+    @property
+    def rms_epoch_array(self):
+        """Вернуть эпохи карт RMS, ``numpy.ndarray``
+        (``datetime64[s]``)."""
+        return self._axis(1)
+
+
+def _check_type(header):
+    if header.file_type != 'I':
+        raise IONEXError('Unknown file type.')
+
+
+def _header_only(file):
+    """Вернуть читалку, у которой разобран только заголовок."""
+    inx = IonexV1(file)
+    with inx._context_manager as lines:
+        inx._read_header(lines)
+    _check_type(inx.header)
+    return inx
+
+
+def read_header(file):
+    """Прочитать заголовок файла IONEX.
+
+    :param file: путь к файлу IONEX (в том числе сжатому) или объект файла.
+
+    :return: ``IonexHeader``, см. ``IonexV1.header``.
+
+    :raises IONEXError: если файл -- не IONEX.
+
+    :raises IONEXUnexpectedEnd: если в файле нет 'END OF HEADER'.
+    """
+    return _header_only(file).header
+
+
+def _on_disk(file):
+    """Проверить, что файл можно отобразить в память: путь к несжатому
+    файлу."""
+    if not isinstance(file, str):
+        return False
+    with open(file, 'rb') as file_object:
+        return not is_compressed(file_object.read(3))
+
+
+def _scan_stream(file):
+    inx = IonexV1(file)
+    # строки эпох карт ПЭС и RMS; разбираются за один проход после чтения
+    epoch_lines = {'START OF TEC MAP': [], 'START OF RMS MAP': []}
+    current = None
+    with inx._context_manager as lines:
+        inx._read_header(lines)
+        for line in lines:
+            label = inx._get_label(line)
+            if not label:
+                continue
+            if label in epoch_lines:
+                current = epoch_lines[label]
+            elif label == 'EPOCH OF CURRENT MAP' and current is not None:
+                current.append(line)
+                current = None
+            elif label == 'END OF FILE':
+                break
+
+    return IonexScan._from_axes(
+        inx.header,
+        inx._parse_epochs(epoch_lines['START OF TEC MAP']),
+        inx._parse_epochs(epoch_lines['START OF RMS MAP']),
+    )
+
+
+def scan(file, *, cache=None):
+    """Прочитать заголовок и эпохи карт файла IONEX, не разбирая значения
+    карт.
+
+    Несжатые файлы на диске отображаются в память и просматриваются поиском
+    меток (см. ``IndexedIonexV1``), остальные -- построчно.
+
+    :param file: путь к файлу IONEX (в том числе сжатому) или объект файла.
+
+    :param cache: ``IndexCache``, кэш индексов карт для файлов на диске.
+
+    :return: ``namedtuple``, IonexScan('IonexScan', ['header', 'epochs',
+        'rms_epochs']): ``header`` -- ``IonexHeader``, ``epochs`` и
+        ``rms_epochs`` -- эпохи карт ПЭС и RMS в порядке следования
+        (``datetime``); те же эпохи массивами ``datetime64[s]`` --
+        ``epoch_array`` и ``rms_epoch_array``.
+
+    :raises IONEXError: если файл -- не IONEX.
+
+    :raises IONEXUnexpectedEnd: если в файле нет 'END OF HEADER'.
+    """
+    if _on_disk(file):
+        with IndexedIonexV1(file, rms=True, cache=cache) as inx:
+            epochs = inx._epoch_array
+            rms_epochs = inx._rms_epoch_array
+            if epochs is None:
+                epochs = inx.epochs
+                rms_epochs = [entry.epoch for entry in inx._full_index[1]]
+            result = IonexScan._from_axes(inx.header, epochs, rms_epochs)
+    else:
+        result = _scan_stream(file)
+    _check_type(result.header)
+    return result
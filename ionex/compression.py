@@ -0,0 +1,337 @@
+"""Прозрачное чтение сжатых файлов IONEX.
+
+Архивы IGS распространяют файлы IONEX сжатыми ``compress`` (``.Z``) или
+``gzip`` (``.gz``), иногда ``bzip2``. Тип сжатия определяется по первым
+байтам файла, данные распаковываются потоком, порциями по ``chunk_size``
+байт, без временных файлов. Для ``.Z`` используется собственный декодер LZW.
+"""
+import bz2
+import gzip
+import io
+import zlib
+
+from .exceptions import IONEXError
+
+GZIP_MAGIC = b'\x1f\x8b'
+BZIP2_MAGIC = b'BZh'
+LZW_MAGIC = b'\x1f\x9d'
+
+CHUNK_SIZE = 64 * 1024
+
+
+class LZWDecompressor:
+    """Потоковый декодер формата Unix ``compress`` (LZW, ``.Z``).
+
+    Интерфейс подобен ``zlib.decompressobj``: ``decompress(data)``
+    возвращает распакованные байты, которые удалось получить из уже
+    переданных данных.
+    """
+
+    clear_code = 256
+
+    def __init__(self):
+        self._buffer = b''
+        # позиция (в битах) следующего кода в self._buffer
+        self._pos = 0
+        # начало текущей группы кодов (в битах), см. _align
+        self._group = 0
+        self._header = False
+
+        self._max_bits = None
+        self._block_mode = None
+
+        self._bits = 9
+        self._table = None
+        self._prev = None
+
+    def _reset(self):
+        self._bits = 9
+        self._table = [bytes((i, )) for i in range(256)]
+        if self._block_mode:
+            # код 256 -- команда очистки словаря
+            self._table.append(b'')
+        self._prev = None
+
+    def _read_header(self):
+        if len(self._buffer) < 3:
+            return False
+        if self._buffer[:2] != LZW_MAGIC:
+            raise IONEXError('Not a compress (.Z) stream.')
+
+        flags = self._buffer[2]
+        if flags & 0x60:
+            raise IONEXError('Unknown compress flags: {}'.format(flags))
+        self._max_bits = flags & 0x1f
+        if not 9 <= self._max_bits <= 16:
+            raise IONEXError(
+                'Unsupported compress code size: {}'.format(self._max_bits)
+            )
+        # так же поступает compress: 9 на самом деле означает 10
+        if self._max_bits == 9:
+            self._max_bits = 10
+        self._block_mode = bool(flags & 0x80)
+
+        self._buffer = self._buffer[3:]
+        self._header = True
+        self._reset()
+        return True
+
+    def _align(self):
+        """Пропустить остаток группы кодов.
+
+        Коды записываются группами по 8 (``bits`` байт); при смене размера
+        кода или очистке словаря ``compress`` дописывает группу до конца.
+        """
+        size = self._bits * 8
+        used = self._pos - self._group
+        self._pos = self._group + -(-used // size) * size
+        self._group = self._pos
+
+    def decompress(self, data):
+        """Распаковать очередную порцию данных ``data``."""
+        self._buffer += data
+        if not self._header and not self._read_header():
+            return b''
+
+        buffer = self._buffer
+        size = len(buffer) * 8
+        table = self._table
+        bits = self._bits
+        mask = (1 << bits) - 1
+        pos = self._pos
+        prev = self._prev
+        output = []
+
+        while True:
+            # словарь заполнится после этого кода -- увеличиваем размер кода
+            if len(table) - 1 >= mask and bits < self._max_bits:
+                self._pos, self._bits = pos, bits
+                self._align()
+                pos = self._pos
+                bits += 1
+                mask = (1 << bits) - 1
+
+            if pos + bits > size:
+                break
+
+            i = pos >> 3
+            code = (int.from_bytes(buffer[i:i + 3], 'little')
+                    >> (pos & 7)) & mask
+            pos += bits
+
+            if code == self.clear_code and self._block_mode:
+                self._pos, self._bits = pos, bits
+                self._align()
+                pos = self._pos
+                self._reset()
+                table = self._table
+                bits = self._bits
+                mask = (1 << bits) - 1
+                prev = None
+                continue
+
+            if code < len(table):
+                entry = table[code]
+            elif code == len(table) and prev is not None:
+                entry = table[prev] + table[prev][:1]
+            else:
+                raise IONEXError('Invalid LZW code: {}'.format(code))
+            output.append(entry)
+
+            # для первого кода (и первого после очистки) запись не создаётся
+            if prev is not None and len(table) <= mask:
+                table.append(table[prev] + entry[:1])
+            prev = code
+
+        # отбрасываем полностью прочитанные байты, сохраняя начало группы
+        group_size = bits * 8
+        if pos > self._group:
+            self._group += (pos - self._group) // group_size * group_size
+        skip = min(pos, self._group, size) >> 3
+        self._buffer = buffer[skip:]
+        self._pos = pos - skip * 8
+        self._group -= skip * 8
+        self._bits = bits
+        self._prev = prev
+        return b''.join(output)
+
+
+class _Prefixed(io.RawIOBase):
+    """Поток, который сначала возвращает ``prefix``, затем -- данные
+    ``file_object``. Нужен, чтобы прочитать сигнатуру из потока без
+    возможности перемотки. Закрывает ``file_object``, только если
+    ``close_file``.
+    """
+
+    def __init__(self, prefix, file_object, close_file=False):
+        self._prefix = prefix
+        self._file_object = file_object
+        self._close_file = close_file
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._prefix:
+            n = min(len(b), len(self._prefix))
+            b[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+
+        data = self._file_object.read(len(b))
+        if not data:
+            return 0
+        n = len(data)
+        b[:n] = data
+        return n
+
+    def close(self):
+        if not self.closed and self._close_file:
+            self._file_object.close()
+        super().close()
+
+
+class LZWReader(io.RawIOBase):
+    """Двоичный поток распакованных данных ``.Z`` из ``file_object``.
+
+    Данные читаются порциями по ``chunk_size`` байт, поэтому расход памяти
+    не зависит от размера файла.
+    """
+
+    def __init__(self, file_object, chunk_size=CHUNK_SIZE):
+        self._file_object = file_object
+        self._chunk_size = chunk_size
+        self._decompressor = LZWDecompressor()
+        self._pending = b''
+        self._offset = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while self._offset >= len(self._pending):
+            data = self._file_object.read(self._chunk_size)
+            if not data:
+                return 0
+            self._pending = self._decompressor.decompress(data)
+            self._offset = 0
+
+        n = min(len(b), len(self._pending) - self._offset)
+        b[:n] = self._pending[self._offset:self._offset + n]
+        self._offset += n
+        return n
+
+
+class _Decompressed(io.RawIOBase):
+    """Поток распакованных данных, при закрытии закрывает и поток
+    сжатых данных ``source``."""
+
+    def __init__(self, stream, source):
+        self._stream = stream
+        self._source = source
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self._stream.readinto(b)
+
+    def close(self):
+        if not self.closed:
+            self._stream.close()
+            self._source.close()
+        super().close()
+
+
+class _Multistream:
+    """Потоковая распаковка данных из нескольких сжатых частей подряд (так
+    бывает у ``gzip`` и ``bzip2``); ``factory()`` создаёт декодер одной
+    части с атрибутами ``eof`` и ``unused_data``.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._decoder = factory()
+
+    def decompress(self, data):
+        output = []
+        while data:
+            output.append(self._decoder.decompress(data))
+            if not self._decoder.eof:
+                break
+            # за частью может следовать дополнение нулями
+            data = self._decoder.unused_data.lstrip(b'\x00')
+            self._decoder = self._factory()
+        return b''.join(output)
+
+
+def decompressor(prefix):
+    """Вернуть потоковый декодер для данных, которые начинаются с
+    ``prefix``: объект с методом ``decompress(data)``, как у
+    ``zlib.decompressobj``.
+
+    :return: декодер или ``None``, если данные не сжаты.
+    """
+    if prefix.startswith(GZIP_MAGIC):
+        return _Multistream(
+            lambda: zlib.decompressobj(16 + zlib.MAX_WBITS)
+        )
+    if prefix.startswith(BZIP2_MAGIC):
+        return _Multistream(bz2.BZ2Decompressor)
+    if prefix.startswith(LZW_MAGIC):
+        return LZWDecompressor()
+    return None
+
+
+def is_compressed(prefix):
+    """Проверить по первым байтам ``prefix``, что данные сжаты."""
+    return prefix.startswith((GZIP_MAGIC, BZIP2_MAGIC, LZW_MAGIC))
+
+
+def is_binary(file_object):
+    """Проверить, что объект файла открыт в двоичном режиме."""
+    if isinstance(file_object, (io.RawIOBase, io.BufferedIOBase)):
+        return True
+    if isinstance(file_object, io.TextIOBase):
+        return False
+    mode = getattr(file_object, 'mode', '')
+    return isinstance(mode, str) and 'b' in mode
+
+
+def open_binary(file, chunk_size=CHUNK_SIZE):
+    """Открыть файл IONEX в двоичном режиме, распаковывая его при
+    необходимости.
+
+    :param file: путь к файлу или двоичный объект файла; переданный объект
+        файла не закрывается при закрытии возвращённого потока.
+
+    :param chunk_size: размер порции сжатых данных, байт.
+
+    :return: двоичный поток распакованных данных.
+    """
+    if isinstance(file, str):
+        file_object = open(file, 'rb')
+    else:
+        file_object = file
+
+    # сокеты и каналы могут вернуть меньше запрошенного
+    magic = b''
+    while len(magic) < 3:
+        data = file_object.read(3 - len(magic))
+        if not data:
+            break
+        magic += data
+    stream = _Prefixed(magic, file_object, close_file=file_object is not file)
+
+    if magic.startswith(GZIP_MAGIC):
+        stream = _Decompressed(gzip.GzipFile(fileobj=stream), stream)
+    elif magic.startswith(BZIP2_MAGIC):
+        stream = _Decompressed(bz2.BZ2File(stream), stream)
+    elif magic.startswith(LZW_MAGIC):
+        stream = _Decompressed(LZWReader(stream, chunk_size), stream)
+    return io.BufferedReader(stream, chunk_size)
+
+
+def open_text(file, chunk_size=CHUNK_SIZE):
+    """Открыть файл IONEX в текстовом режиме, см. ``open_binary``."""
+    return io.TextIOWrapper(open_binary(file, chunk_size))
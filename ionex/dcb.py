@@ -0,0 +1,155 @@
+"""Дифференциальные кодовые задержки (DCB) из вспомогательных данных
+заголовка IONEX.
+
+Блок 'DIFFERENTIAL CODE BIASES' разбирается вместе с заголовком (см.
+``IonexV1._read_header``); значения представлены столбцами -- массивами
+``numpy`` -- а не объектами на каждый спутник или станцию.
+"""
+from collections import namedtuple
+
+from ._compat import require_numpy
+
+SatelliteDcb = namedtuple('SatelliteDcb', ['system', 'prn', 'bias', 'rms'])
+StationDcb = namedtuple(
+    'StationDcb', ['system', 'station', 'domes', 'bias', 'rms'],
+)
+Dcb = namedtuple('Dcb', ['satellites', 'stations'])
+DcbTable = namedtuple('DcbTable', [
+    'paths', 'epochs',
+    'satellites', 'satellite_files',
+    'stations', 'station_files',
+])
+
+# система по умолчанию: в IONEX 1.0 поле системы может быть пустым
+DEFAULT_SYSTEM = 'G'
+
+
+def _decode(line):
+    if isinstance(line, bytes):
+        return line.decode('latin-1')
+    return line
+
+
+def parse_satellite(line):
+    """Разобрать запись 'PRN / BIAS / RMS' (3X,A1,I2.2,2F10.3).
+
+    :return: (система, PRN, задержка, СКО), задержка и СКО в нс.
+    """
+    line = _decode(line)
+    return (
+        line[3:4].strip() or DEFAULT_SYSTEM,
+        int(line[4:6]),
+        float(line[6:16]),
+        float(line[16:26]),
+    )
+
+
+def parse_station(line):
+    """Разобрать запись 'STATION / BIAS / RMS' (3X,A1,1X,A4,1X,A9,1X,2F10.3).
+
+    :return: (система, станция, номер DOMES, задержка, СКО).
+    """
+    line = _decode(line)
+    return (
+        line[3:4].strip() or DEFAULT_SYSTEM,
+        line[5:9].strip(),
+        line[10:19].strip(),
+        float(line[20:30]),
+        float(line[30:40]),
+    )
+
+
+def _columns(records, size):
+    """Переставить записи в столбцы."""
+    if not records:
+        return [[] for _ in range(size)]
+    return [list(column) for column in zip(*records)]
+
+
+def make_dcb(satellites, stations):
+    """Собрать таблицы DCB из разобранных записей.
+
+    :param satellites: записи ``parse_satellite``.
+
+    :param stations: записи ``parse_station``.
+
+    :return: ``Dcb(satellites, stations)``: ``SatelliteDcb`` и
+        ``StationDcb`` из массивов ``numpy``.
+    """
+    np = require_numpy('DCB tables')
+
+    system, prn, bias, rms = _columns(satellites, 4)
+    satellites = SatelliteDcb(
+        system=np.array(system, dtype='U1'),
+        prn=np.array(prn, dtype=np.int16),
+        bias=np.array(bias, dtype=np.float64),
+        rms=np.array(rms, dtype=np.float64),
+    )
+
+    system, station, domes, bias, rms = _columns(stations, 5)
+    stations = StationDcb(
+        system=np.array(system, dtype='U1'),
+        station=np.array(station, dtype='U4'),
+        domes=np.array(domes, dtype='U9'),
+        bias=np.array(bias, dtype=np.float64),
+        rms=np.array(rms, dtype=np.float64),
+    )
+    return Dcb(satellites, stations)
+
+
+def _read_records(path):
+    """Прочитать заголовок файла и вернуть первую эпоху и записи DCB."""
+    # импорт здесь: модуль ionex_file импортирует этот модуль
+    from .catalog import _header_only
+
+    inx = _header_only(path)
+    return (
+        inx.header.first_epoch,
+        inx._records['satellite_biases'],
+        inx._records['station_biases'],
+    )
+
+
+def collect_dcb(paths, *, executor=None):
+    """Собрать DCB из заголовков многих файлов в одну таблицу.
+
+    Читаются только заголовки файлов; записи всех файлов накапливаются в
+    общих столбцах и преобразуются в массивы один раз.
+
+    :param paths: пути к файлам IONEX.
+
+    :param executor: ``concurrent.futures.Executor``, в котором читать
+        файлы; по умолчанию -- последовательно.
+
+    :return: ``namedtuple``, DcbTable('DcbTable', ['paths', 'epochs',
+        'satellites', 'satellite_files', 'stations', 'station_files']):
+        ``epochs`` -- эпохи первых карт (``datetime64[s]``),
+        ``satellites`` / ``stations`` -- ``SatelliteDcb`` / ``StationDcb``
+        всех файлов, ``*_files`` -- индексы файлов строк в ``paths``.
+    """
+    np = require_numpy('ionex.collect_dcb')
+
+    paths = list(paths)
+    if executor is None:
+        results = map(_read_records, paths)
+    else:
+        results = executor.map(_read_records, paths)
+
+    epochs, satellites, stations = [], [], []
+    satellite_files, station_files = [], []
+    for n, (epoch, file_satellites, file_stations) in enumerate(results):
+        epochs.append(epoch)
+        satellites += file_satellites
+        stations += file_stations
+        satellite_files += [n] * len(file_satellites)
+        station_files += [n] * len(file_stations)
+
+    dcb = make_dcb(satellites, stations)
+    return DcbTable(
+        paths=paths,
+        epochs=np.array(epochs, dtype='datetime64[s]'),
+        satellites=dcb.satellites,
+        satellite_files=np.array(satellite_files, dtype=np.int32),
+        stations=dcb.stations,
+        station_files=np.array(station_files, dtype=np.int32),
+    )
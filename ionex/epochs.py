@@ -0,0 +1,104 @@
+"""Разбор эпох IONEX.
+
+Эпоха записывается шестью полями по 6 символов: год, месяц, день, час,
+минута, секунда. Не все программы соблюдают формат: встречаются час = 24,
+минуты или секунды = 60 (прибавляются как смещение) и значения с
+десятичной точкой (см. ``IonexV1._coerce_into_int``).
+
+``epoch_array`` разбирает много эпох сразу -- строки склеиваются и
+преобразуются в числа целиком, эпохи вычисляются арифметикой
+``numpy.datetime64``; ``epoch_list`` преобразует такой массив в список
+``datetime``, когда он нужен.
+"""
+from datetime import datetime, timedelta
+
+from ._compat import require_numpy
+
+# число символов эпохи в строке 'EPOCH OF CURRENT MAP' и подобных
+EPOCH_WIDTH = 36
+FIELD_WIDTH = 6
+
+MAX_YEAR = 9999
+
+
+def make_epoch(fields):
+    """Вернуть ``datetime`` по полям эпохи (год, месяц, день, час,
+    минута, секунда); час, минуты и секунды прибавляются как смещение."""
+    year, month, day, hour, minute, second = fields
+    epoch = datetime(year, month, day)
+    epoch += timedelta(hours=hour)
+    epoch += timedelta(seconds=minute * 60 + second)
+    return epoch
+
+
+def _fields(lines):
+    """Вернуть поля эпох ``lines`` массивом (n, 6) или ``None``, если
+    какая-то строка не соответствует формату."""
+    np = require_numpy('Epoch arrays')
+    rows = [line[:EPOCH_WIDTH] for line in lines]
+    if any(len(row) != EPOCH_WIDTH for row in rows):
+        return None
+    text = rows[0][:0].join(rows)
+    if isinstance(text, str):
+        try:
+            text = text.encode('ascii')
+        except UnicodeEncodeError:
+            return None
+    try:
+        fields = np.frombuffer(text, dtype='S6').astype(np.int64)
+    except ValueError:
+        return None
+    return fields.reshape(-1, EPOCH_WIDTH // FIELD_WIDTH)
+
+
+def _vector_epochs(fields):
+    """Вычислить эпохи по массиву полей или вернуть ``None``, если дата
+    какой-то эпохи недопустима."""
+    np = require_numpy('Epoch arrays')
+    year, month, day, hour, minute, second = fields.T
+    if ((year < 1) | (year > MAX_YEAR) | (month < 1) | (month > 12) |
+            (day < 1)).any():
+        return None
+
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    dates = months.astype('datetime64[D]') + (day - 1).astype(
+        'timedelta64[D]'
+    )
+    # день за пределами месяца (например, 31 апреля)
+    if (dates.astype('datetime64[M]') != months).any():
+        return None
+
+    offsets = (hour * 3600 + minute * 60 + second).astype('timedelta64[s]')
+    return dates.astype('datetime64[s]') + offsets
+
+
+def epoch_array(lines, parse_epoch):
+    """Разобрать эпохи строк ``lines`` за один проход.
+
+    :param lines: строки (``str`` или ``bytes``), начинающиеся с эпохи.
+
+    :param parse_epoch: функция разбора одной строки, возвращающая
+        ``datetime``; используется, если какая-то строка не соответствует
+        формату (например, ``IonexV1._parse_epoch``).
+
+    :return: ``numpy.ndarray`` (``datetime64[s]``).
+    """
+    np = require_numpy('Epoch arrays')
+    if not lines:
+        return np.array([], dtype='datetime64[s]')
+
+    fields = _fields(lines)
+    epochs = None if fields is None else _vector_epochs(fields)
+    if epochs is None:
+        epochs = np.array(
+            [parse_epoch(line) for line in lines], dtype='datetime64[s]',
+        )
+    return epochs
+
+
+def epoch_list(epochs):
+    """Вернуть эпохи ``epochs`` (``numpy.ndarray`` ``datetime64`` или
+    список ``datetime``) списком ``datetime``; ``NaT`` -- ``None``."""
+    if isinstance(epochs, list):
+        return epochs
+    return epochs.tolist()
@@ -0,0 +1,107 @@
+"""Чтение файла IONEX, который ещё дописывается.
+
+Продукты реального времени дописывают карты в файл в течение суток.
+``IonexFollower`` запоминает смещение конца последней разобранной карты и
+при каждом опросе (``poll``) читает только новые байты файла: заголовок и
+уже прочитанные карты повторно не разбираются::
+
+    follower = ionex.follow('igrg0010.00i')
+    while not follower.finished:
+        for ionex_map in follower.poll():
+            ...
+        time.sleep(5)
+"""
+import os
+
+from .blocks import BlockIonexV1
+from .compression import is_compressed
+from .exceptions import IONEXError
+
+
+class IonexFollower(BlockIonexV1):
+    """Читалка дописываемого файла IONEX.
+
+    ``poll()`` возвращает карты, которые были полностью записаны в файл с
+    прошлого опроса; незаконченная карта в конце файла остаётся в буфере
+    до следующего опроса. Итерация по читалке -- то же, что ``poll()``.
+    Заголовок (``header``, ``grid``, ...) доступен, как только он записан
+    в файл целиком.
+    """
+
+    def __init__(self, path, *, rms=False, **kwargs):
+        """
+        :param path: путь к несжатому файлу IONEX.
+
+        :param rms: ``bool``, связывать карты RMS с картами ПЭС. Карты RMS
+            записываются после всех карт ПЭС, поэтому в этом режиме карты
+            ПЭС выдаются только после записи карт RMS или 'END OF FILE'.
+
+        :param kwargs: см. ``IonexV1``.
+        """
+        super().__init__(path, rms=rms, **kwargs)
+        self.name = path
+        # смещение в файле, до которого файл прочитан
+        self._read_offset = 0
+
+    @property
+    def offset(self):
+        """Смещение в файле конца последнего разобранного фрагмента."""
+        return self._read_offset - len(self._buffer)
+
+    @property
+    def finished(self):
+        """``True``, если прочитана метка 'END OF FILE'."""
+        return self._end_of_file
+
+    def _read_new(self):
+        with open(self.name, 'rb') as file_object:
+            size = os.fstat(file_object.fileno()).st_size
+            if size < self._read_offset:
+                raise IONEXError(
+                    'File was truncated: {}'.format(self.name)
+                )
+            file_object.seek(self._read_offset)
+            data = file_object.read(size - self._read_offset)
+
+        if not self._read_offset and is_compressed(data[:3]):
+            raise IONEXError(
+                'Following is not supported for compressed files: '
+                '{}'.format(self.name)
+            )
+        self._read_offset += len(data)
+        return data
+
+    def poll(self):
+        """Прочитать дописанную часть файла.
+
+        :return: список новых карт ``IonexMap``.
+
+        :raises IONEXError: если файл сжат, уменьшился с прошлого опроса
+            или это не файл IONEX.
+        """
+        if self._end_of_file:
+            return []
+
+        self._buffer += self._read_new()
+        maps = []
+        while True:
+            data = self._next_block()
+            if data is None:
+                break
+            maps += self._add_maps(self._parse_maps(data))
+        if self._end_of_file:
+            maps += self._flush()
+        return maps
+
+    def _next_map(self):
+        yield from self.poll()
+
+
+def follow(path, **kwargs):
+    """Возвращает читалку дописываемого файла IONEX, см. ``IonexFollower``.
+
+    :param path: путь к несжатому файлу IONEX.
+
+    :param kwargs: см. ``IonexFollower``.
+    """
+    return IonexFollower(path, **kwargs)
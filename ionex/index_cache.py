@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+
+
+class IndexCache:
+    """Кэш индексов файлов IONEX в базе SQLite.
+
+    Для каждого файла хранится результат разбора заголовка и индекс карт
+    (номера, эпохи, смещения блоков), см. ``IndexedIonexV1``. Запись
+    привязана к пути, размеру и времени изменения файла: если файл
+    изменился, запись удаляется. Число записей ограничено ``max_entries``,
+    лишние записи удаляются в порядке давности использования (LRU).
+
+    Кэш можно использовать одновременно из нескольких процессов::
+
+        cache = IndexCache('~/.cache/ionex.sqlite')
+        inx = ionex.reader(path, random_access=True, cache=cache)
+    """
+
+    # счётчик обращений вместо времени: порядок не зависит от часов
+    _next_use = 'SELECT COALESCE(MAX(last_used), 0) + 1 FROM ionex_index'
+
+    def __init__(self, path, max_entries=10000, timeout=30.):
+        """
+        :param path: путь к файлу базы SQLite; ``':memory:'`` -- кэш
+            в памяти.
+
+        :param max_entries: ``int``, наибольшее число записей в кэше.
+
+        :param timeout: ``float``, время ожидания блокировки базы другим
+            процессом, с.
+        """
+        if path != ':memory:':
+            path = os.path.expanduser(path)
+        self.path = path
+        self.max_entries = max_entries
+
+        self._connection = sqlite3.connect(path, timeout=timeout)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS ionex_index ('
+                'path TEXT PRIMARY KEY, '
+                'size INTEGER NOT NULL, '
+                'mtime INTEGER NOT NULL, '
+                'data TEXT NOT NULL, '
+                'last_used INTEGER NOT NULL)'
+            )
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS ionex_index_last_used '
+                'ON ionex_index (last_used)'
+            )
+
+    @staticmethod
+    def key(path, stat):
+        """Вернуть ключ записи: (абсолютный путь, размер, время изменения)."""
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+    def get(self, key):
+        """Вернуть сохранённые данные для ключа ``key`` или ``None``.
+
+        Устаревшая запись для того же пути удаляется.
+        """
+        path, size, mtime = key
+        with self._connection:
+            row = self._connection.execute(
+                'SELECT size, mtime, data FROM ionex_index WHERE path = ?',
+                (path, ),
+            ).fetchone()
+            if row is None:
+                return None
+
+            if (row[0], row[1]) != (size, mtime):
+                self._connection.execute(
+                    'DELETE FROM ionex_index WHERE path = ?', (path, )
+                )
+                return None
+
+            self._connection.execute(
+                'UPDATE ionex_index SET last_used = ({}) WHERE path = ?'
+                .format(self._next_use),
+                (path, ),
+            )
+        return json.loads(row[2])
+
+    def put(self, key, data):
+        """Сохранить данные ``data`` (сериализуемые в JSON) для ключа
+        ``key`` и удалить самые давно использованные записи сверх
+        ``max_entries``.
+        """
+        path, size, mtime = key
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO ionex_index '
+                '(path, size, mtime, data, last_used) '
+                'VALUES (?, ?, ?, ?, ({}))'.format(self._next_use),
+                (path, size, mtime, json.dumps(data)),
+            )
+            self._connection.execute(
+                'DELETE FROM ionex_index WHERE path NOT IN ('
+                'SELECT path FROM ionex_index '
+                'ORDER BY last_used DESC LIMIT ?)',
+                (self.max_entries, ),
+            )
+
+    def __len__(self):
+        row = self._connection.execute(
+            'SELECT COUNT(*) FROM ionex_index'
+        ).fetchone()
+        return row[0]
+
+    def clear(self):
+        with self._connection:
+            self._connection.execute('DELETE FROM ionex_index')
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,245 @@
+"""Интерполяция ПЭС в произвольные точки (время, широта, долгота).
+
+По пространству используется билинейная интерполяция по четырём ближайшим
+узлам сетки, по времени -- схемы, рекомендованные описанием IONEX:
+
+- ``'nearest'`` -- ближайшая по времени карта;
+- ``'linear'`` -- линейная интерполяция между соседними картами;
+- ``'rotation'`` -- линейная интерполяция между соседними картами,
+  повёрнутыми по долготе на угол поворота Земли относительно Солнца::
+
+    E(t, b, l) = (T[i+1] - t) / (T[i+1] - T[i]) * E[i](b, l'[i]) +
+                 (t - T[i]) / (T[i+1] - T[i]) * E[i+1](b, l'[i+1]),
+    l'[i] = l + (t - T[i]),
+
+  где время выражено в градусах (360 градусов за сутки).
+
+Все вычисления векторизованы: точки передаются массивами ``numpy``.
+Отсутствующие значения (``nan``) распространяются на результат; точки
+вне сетки или вне интервала времени получают ``nan``.
+"""
+from ._compat import require_numpy
+from .ionex_map import MapGrid
+
+# градусов поворота Земли в секунду
+EARTH_ROTATION = 360. / 86400.
+
+METHODS = ('nearest', 'linear', 'rotation')
+
+
+def bilinear(tec, latitude, longitude, lats, lons):
+    """Билинейная интерполяция значений карт в точки (lats, lons).
+
+    :param tec: ``numpy.ndarray`` (..., широта, долгота), значения карт.
+
+    :param latitude: (lat1, lat2, dlat), определение сетки по широте.
+
+    :param longitude: (lon1, lon2, dlon), определение сетки по долготе;
+        если сетка охватывает 360 градусов, долгота "замыкается".
+
+    :param lats: широты точек, градусы.
+
+    :param lons: долготы точек, градусы; приводятся к диапазону сетки.
+
+    :return: ``numpy.ndarray`` формы ``tec.shape[:-2] + shape``, где
+        ``shape`` -- форма совмещённых (broadcast) ``lats`` и ``lons``.
+    """
+    np = require_numpy('ionex.interpolation')
+
+    tec = np.asarray(tec, dtype=np.float64)
+    lats, lons = np.broadcast_arrays(
+        np.asarray(lats, dtype=np.float64),
+        np.asarray(lons, dtype=np.float64),
+    )
+    grid = MapGrid(latitude, longitude)
+    if tec.shape[-2:] != grid.shape:
+        raise ValueError('tec does not match the grid')
+    i0, i1, j0, j1, wi, wj, valid = grid.cell_weights(lats, lons)
+    result = np.asarray(
+        tec[..., i0, j0] * (1 - wi) * (1 - wj) +
+        tec[..., i0, j1] * (1 - wi) * wj +
+        tec[..., i1, j0] * wi * (1 - wj) +
+        tec[..., i1, j1] * wi * wj
+    )
+    result[..., ~valid] = np.nan
+    return result[()]
+
+
+def interpolate_height(values, heights, height):
+    """Линейная интерполяция слоёв трёхмерной карты по высоте.
+
+    :param values: ``numpy.ndarray`` (..., высота, широта, долгота).
+
+    :param heights: высоты слоёв, по возрастанию или по убыванию.
+
+    :param height: высота или массив высот.
+
+    :return: ``numpy.ndarray`` (..., широта, долгота) для одной высоты или
+        (..., высота, широта, долгота) для массива высот; вне диапазона
+        ``heights`` -- ``nan``.
+    """
+    np = require_numpy('ionex.interpolation')
+
+    values = np.asarray(values, dtype=np.float64)
+    heights = np.asarray(heights, dtype=np.float64)
+    height = np.asarray(height, dtype=np.float64)
+    if len(heights) != values.shape[-3]:
+        raise ValueError('heights do not match the layers')
+    if heights[0] > heights[-1]:
+        heights = heights[::-1]
+        values = values[..., ::-1, :, :]
+
+    outside = (height < heights[0]) | (height > heights[-1])
+    if len(heights) == 1:
+        k = np.zeros(height.shape, dtype=np.intp)
+        result = values[..., k, :, :]
+    else:
+        k = np.clip(np.searchsorted(heights, height, side='right') - 1,
+                    0, len(heights) - 2)
+        w = ((height - heights[k]) / (heights[k + 1] - heights[k]))
+        w = w[..., None, None]
+        result = values[..., k, :, :] * (1 - w) + values[..., k + 1, :, :] * w
+    return np.where(outside[..., None, None], np.nan, result)
+
+
+class TecInterpolator:
+    """Интерполяция ПЭС по последовательности карт.
+
+    ::
+
+        interpolator = TecInterpolator.from_maps(ionex.reader(path))
+        tec = interpolator(times, lats, lons, method='rotation')
+    """
+
+    def __init__(self, epochs, tec, latitude, longitude):
+        """
+        :param epochs: эпохи карт, по возрастанию (``datetime64`` или
+            ``datetime``).
+
+        :param tec: ``numpy.ndarray`` (время, широта, долгота), значения
+            ПЭС с учётом степени, ``nan`` -- отсутствующие значения.
+
+        :param latitude: (lat1, lat2, dlat), определение сетки по широте.
+
+        :param longitude: (lon1, lon2, dlon), определение сетки по долготе.
+        """
+        np = require_numpy('ionex.interpolation')
+
+        self.epochs = np.asarray(epochs, dtype='datetime64[ms]')
+        self.tec = np.asarray(tec, dtype=np.float64)
+        self.grid = MapGrid(latitude, longitude)
+
+        if not len(self.epochs):
+            raise ValueError('No maps to interpolate')
+        if self.tec.ndim != 3 or len(self.epochs) != len(self.tec):
+            raise ValueError('tec must be a (time, lat, lon) array '
+                             'matching epochs')
+        if self.tec.shape[1:] != self.grid.shape:
+            raise ValueError('tec does not match the grid')
+        if len(self.epochs) > 1 and \
+                (np.diff(self.epochs) <= np.timedelta64(0)).any():
+            raise ValueError('epochs must be strictly increasing')
+
+        self._seconds = self._to_seconds(self.epochs)
+
+    @classmethod
+    def from_maps(cls, maps):
+        """Создать интерполятор по картам ``IonexMap`` (с одной сеткой)."""
+        np = require_numpy('ionex.interpolation')
+
+        maps = sorted(maps, key=lambda m: m.epoch)
+        if not maps:
+            raise ValueError('No maps to interpolate')
+        grid = maps[0].grid
+        return cls(
+            epochs=[m.epoch for m in maps],
+            tec=np.stack([m.tec_array for m in maps]),
+            latitude=grid.latitude,
+            longitude=grid.longitude,
+        )
+
+    @classmethod
+    def from_stack(cls, stack):
+        """Создать интерполятор по результату ``ionex.load_many``."""
+        latitude, longitude = stack.grid
+        return cls(stack.epochs, stack.tec, latitude, longitude)
+
+    def _to_seconds(self, times):
+        np = require_numpy('ionex.interpolation')
+        times = np.asarray(times, dtype='datetime64[ms]')
+        return (times - self.epochs[0]) / np.timedelta64(1, 's')
+
+    def __call__(self, times, lats, lons, method='linear'):
+        """Вернуть ПЭС в точках (times, lats, lons).
+
+        :param times: моменты времени (``datetime64`` или ``datetime``).
+
+        :param lats: широты, градусы.
+
+        :param lons: долготы, градусы.
+
+        :param method: ``'nearest'``, ``'linear'`` или ``'rotation'``.
+
+        :return: ``numpy.ndarray`` формы, полученной совмещением (broadcast)
+            форм ``times``, ``lats`` и ``lons``.
+        """
+        np = require_numpy('ionex.interpolation')
+
+        if method not in METHODS:
+            raise ValueError('Unknown method: {}'.format(method))
+
+        t = self._to_seconds(times)
+        t, lats, lons = np.broadcast_arrays(
+            t,
+            np.asarray(lats, dtype=np.float64),
+            np.asarray(lons, dtype=np.float64),
+        )
+        shape = t.shape
+        t, lats, lons = t.ravel(), lats.ravel(), lons.ravel()
+
+        seconds = self._seconds
+        result = np.full(t.shape, np.nan)
+        valid = (t >= seconds[0]) & (t <= seconds[-1])
+        t, lats, lons = t[valid], lats[valid], lons[valid]
+
+        if len(seconds) == 1:
+            i = np.zeros(len(t), dtype=np.intp)
+            result[valid] = self._spatial(i, lats, lons)
+            return result.reshape(shape)
+
+        if method == 'nearest':
+            i = np.clip(np.searchsorted(seconds, t), 1, len(seconds) - 1)
+            i -= t - seconds[i - 1] <= seconds[i] - t
+            result[valid] = self._spatial(i, lats, lons)
+            return result.reshape(shape)
+
+        i = np.clip(np.searchsorted(seconds, t, side='right') - 1,
+                    0, len(seconds) - 2)
+        t0, t1 = seconds[i], seconds[i + 1]
+        w = (t - t0) / (t1 - t0)
+
+        lons0 = lons1 = lons
+        if method == 'rotation':
+            lons0 = lons + (t - t0) * EARTH_ROTATION
+            lons1 = lons + (t - t1) * EARTH_ROTATION
+
+        result[valid] = (
+            (1 - w) * self._spatial(i, lats, lons0) +
+            w * self._spatial(i + 1, lats, lons1)
+        )
+        return result.reshape(shape)
+
+    def _spatial(self, k, lats, lons):
+        """Билинейная интерполяция карты ``k[n]`` в точку ``n``."""
+        np = require_numpy('ionex.interpolation')
+
+        tec = self.tec
+        i0, i1, j0, j1, wi, wj, valid = self.grid.cell_weights(lats, lons)
+        result = (
+            tec[k, i0, j0] * (1 - wi) * (1 - wj) +
+            tec[k, i0, j1] * (1 - wi) * wj +
+            tec[k, i1, j0] * wi * (1 - wj) +
+            tec[k, i1, j1] * wi * wj
+        )
+        result[~valid] = np.nan
+        return result
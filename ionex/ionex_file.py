@@ -1,9 +1,16 @@
 import warnings
 from collections import namedtuple
-from datetime import datetime, timedelta
-
+from functools import lru_cache, partial
+
+from ._compat import numpy, int_array, int_store
+from .compression import CHUNK_SIZE, is_binary, open_binary
+from .dcb import make_dcb, parse_satellite, parse_station
+from .epochs import (
+    EPOCH_WIDTH, FIELD_WIDTH, epoch_array, make_epoch,
+)
 from .exceptions import IONEXUnexpectedEnd
-from .ionex_map import IonexMap
+from .ionex_map import IonexMap, MapGrid
+from .stats import ParseStats
 
 Grid = namedtuple('Grid', ['latitude', 'longitude', 'height'])
 Latitude = namedtuple('Latitude', ['lat1', 'lat2', 'dlat'])
@@ -11,7 +18,21 @@ Longitude = namedtuple('Longitude', ['lon1', 'lon2', 'dlon'])
 Height = namedtuple('Height', ['hgt1', 'hgt2', 'dhgt'])
 
 Map = namedtuple('Map', ['epoch', 'height', 'data'])
+IonexHeader = namedtuple('IonexHeader', [
+    'version', 'file_type', 'satellite_system',
+    'program', 'run_by', 'date', 'description', 'comment',
+    'first_epoch', 'last_epoch', 'interval', 'maps_count',
+    'mapping_function', 'elevation_cutoff', 'observables',
+    'stations_count', 'satellites_count', 'base_radius',
+    'dimension', 'height', 'latitude', 'longitude', 'exponent',
+    'aux_data',
+])
 MapGridDef = namedtuple('MapGridDef', ['lat', 'lon1', 'lon2', 'dlon', 'h'])
+# число разобранных строк эпох, хранимых в кэше IonexV1._cached_epoch
+EPOCH_CACHE_SIZE = 4096
+
+# часть сетки, которую нужно прочитать: индексы узлов (range) и их сетка
+Window = namedtuple('Window', ['rows', 'columns', 'grid'])
 
 
 class NullContext:
@@ -25,6 +46,47 @@ class NullContext:
         pass
 
 
+class ByteLines:
+    """Итератор строк (``bytes``) двоичного потока.
+
+    Поток читается большими порциями по ``chunk_size`` байт, строки
+    выделяются по ``b'\\n'`` без декодирования текста. Символ конца строки
+    не включается в строку.
+    """
+
+    def __init__(self, stream, *, name='<Unknown>', close=False,
+                 chunk_size=CHUNK_SIZE):
+        self.name = name
+        self._stream = stream
+        self._close = close
+        self._lines = self._read_lines(chunk_size)
+
+    def _read_lines(self, chunk_size):
+        tail = b''
+        while True:
+            chunk = self._stream.read(chunk_size)
+            if not chunk:
+                break
+            lines = (tail + chunk).split(b'\n')
+            tail = lines.pop()
+            yield from lines
+        if tail:
+            yield tail
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._close:
+            self._stream.close()
+
+
 class IonexV1:
     # заголовки, которые нужно считать и соответствующие им атрибуты класса
     header_label = {
@@ -35,10 +97,97 @@ class IonexV1:
         'HGT1 / HGT2 / DHGT': 'height',
     }
 
+    # прочие записи заголовка: метка -> (поле IonexHeader, разбор строки);
+    # нужны только для IonexV1.header
+    header_records = {
+        'IONEX VERSION / TYPE': ('version', '_parse_version'),
+        'PGM / RUN BY / DATE': ('program', '_parse_program'),
+        'DESCRIPTION': ('description', '_parse_text'),
+        'COMMENT': ('comment', '_parse_text'),
+        'EPOCH OF FIRST MAP': ('first_epoch', '_parse_epoch'),
+        'EPOCH OF LAST MAP': ('last_epoch', '_parse_epoch'),
+        'INTERVAL': ('interval', '_parse_int'),
+        '# OF MAPS IN FILE': ('maps_count', '_parse_int'),
+        'MAPPING FUNCTION': ('mapping_function', '_parse_text'),
+        'ELEVATION CUTOFF': ('elevation_cutoff', '_parse_float'),
+        'OBSERVABLES USED': ('observables', '_parse_text'),
+        '# OF STATIONS': ('stations_count', '_parse_int'),
+        '# OF SATELLITES': ('satellites_count', '_parse_int'),
+        'BASE RADIUS': ('base_radius', '_parse_float'),
+        'START OF AUX DATA': ('aux_data', '_parse_text'),
+        # блок 'DIFFERENTIAL CODE BIASES', см. IonexV1.dcb
+        'PRN / BIAS / RMS': ('satellite_biases', '_parse_satellite_bias'),
+        'STATION / BIAS / RMS': ('station_biases', '_parse_station_bias'),
+    }
+
+    # записи, которые могут повторяться: значения собираются в список
+    repeated_records = (
+        'description', 'comment', 'aux_data',
+        'satellite_biases', 'station_biases',
+    )
+
     # "Non-available TEC values are written as '9999'" (описание IONEX)
     none_value = 9999
 
-    def __init__(self, file):
+    def __init__(self, file, *, array=False, rms=False, lazy=False,
+                 start=None, end=None, bbox=None, stats=None):
+        """
+        :param file: путь к файлу IONEX или объект файла (текстовый или
+            двоичный); файлы, сжатые ``compress``, ``gzip`` или ``bzip2``,
+            распаковываются при чтении.
+
+        :param array:
+            ``bool``, режим массивов: значения карт хранятся в буфере
+            ``numpy`` (``int16``/``int32``), см. ``IonexMap.tec_array``.
+
+        :param rms:
+            ``bool``, разбирать карты RMS и связывать их с картами ПЭС по
+            номеру и эпохе. Карты RMS записываются в файл после всех карт
+            ПЭС, поэтому карты ПЭС придерживаются в памяти до появления
+            соответствующей карты RMS (или до конца файла): читалка
+            выдаёт карты не по мере чтения, а после карт RMS и хранит все
+            карты ПЭС файла. По умолчанию ``False`` -- блоки RMS
+            пропускаются без разбора, карты ПЭС выдаются сразу.
+
+        :param lazy:
+            ``bool``, ленивый режим: при чтении карты разбираются только
+            эпоха и определения сетки, строки с данными сохраняются как есть
+            и преобразуются в числа при первом обращении к ``IonexMap.tec``
+            (``rms``, ``tec_array``, ...).
+
+        :param start:
+            ``datetime``, читать только карты с эпохой не раньше ``start``.
+
+        :param end:
+            ``datetime``, читать только карты с эпохой не позже ``end``.
+            У пропускаемых карт разбирается только строка
+            'EPOCH OF CURRENT MAP'.
+
+        :param bbox:
+            (lat_min, lat_max, lon_min, lon_max), читать только узлы сетки
+            внутри прямоугольника (см. ``MapGrid.window``): строки широт вне
+            прямоугольника не разбираются, из остальных берутся только
+            нужные столбцы. Сетка карт -- часть сетки файла.
+
+        :param stats:
+            ``True`` или ``ParseStats``, собирать статистику разбора:
+            время этапов и счётчики строк, карт, значений, см.
+            ``ParseStats``. Доступна как ``self.stats`` (``None``, если
+            статистика не собирается).
+        """
+        self._array = array
+        self._rms = rms
+        self._lazy = lazy
+
+        self._start = start
+        self._end = end
+        if bbox is not None:
+            lat_min, lat_max, lon_min, lon_max = bbox
+            if lat_min > lat_max or lon_min > lon_max:
+                raise ValueError('Invalid bbox: {}'.format(bbox))
+        self._bbox = bbox
+        self._window = None
+
         self._exponent = -1
         self._dimension = None
 
@@ -47,11 +196,30 @@ class IonexV1:
         self._height = None
 
         self._tec_maps_numbers = []
+        self._records = {name: [] for name in self.repeated_records}
+
+        self._context_manager = self._open(file)
 
+        # методы экземпляра оборачиваются, только если нужна статистика
+        if stats is True:
+            stats = ParseStats()
+        self.stats = stats or None
+        if self.stats is not None:
+            self.stats.attach(self)
+
+    def _open(self, file):
+        # пути и двоичные объекты читаются в двоичном режиме, сжатые
+        # файлы распаковываются "на лету", см. compression
         if isinstance(file, str):
-            self._context_manager = open(file)
-        else:
-            self._context_manager = NullContext(file)
+            self._get_label = self._get_byte_label
+            return ByteLines(open_binary(file), name=file, close=True)
+        if is_binary(file):
+            self._get_label = self._get_byte_label
+            return ByteLines(
+                open_binary(file),
+                name=getattr(file, 'name', '<Unknown>'),
+            )
+        return NullContext(file)
 
     @property
     def exponent(self):
@@ -109,10 +277,98 @@ class IonexV1:
     def grid(self):
         return Grid(self._lat, self._lon, self._height)
 
+    @property
+    def header(self):
+        """Вернуть все записи заголовка, ``IonexHeader``.
+
+        Значения отсутствующих в файле записей -- ``None``; 'DESCRIPTION',
+        'COMMENT' и названия блоков 'START OF AUX DATA' -- списки строк.
+        Заголовок разбирается при чтении первой карты; прочитать только
+        заголовок можно функцией ``ionex.read_header``.
+        """
+        values = dict.fromkeys(IonexHeader._fields)
+        values.update(
+            (name, value) for name, value in self._records.items()
+            if name in values
+        )
+        values.update(
+            dimension=self._dimension,
+            height=self._height,
+            latitude=self._lat,
+            longitude=self._lon,
+            exponent=self._exponent,
+        )
+        return IonexHeader(**values)
+
+    @property
+    def dcb(self):
+        """Вернуть DCB спутников и станций из вспомогательных данных
+        заголовка, ``ionex.dcb.Dcb(satellites, stations)`` из массивов
+        ``numpy``. Заполняется при разборе заголовка, см. ``header``.
+        """
+        return make_dcb(
+            self._records['satellite_biases'],
+            self._records['station_biases'],
+        )
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, bytes):
+            return value.decode('latin-1')
+        return value
+
+    def _parse_text(self, line):
+        return self._decode(line[:60]).strip()
+
+    @staticmethod
+    def _parse_int(line):
+        return int(line[:6])
+
+    @staticmethod
+    def _parse_float(line):
+        return float(line[:8])
+
+    _parse_satellite_bias = staticmethod(parse_satellite)
+    _parse_station_bias = staticmethod(parse_station)
+
+    def _parse_version(self, line):
+        line = self._decode(line)
+        return {
+            'version': float(line[:8]),
+            'file_type': line[20:21],
+            'satellite_system': line[40:43].strip(),
+        }
+
+    def _parse_program(self, line):
+        line = self._decode(line)
+        return {
+            'program': line[0:20].strip(),
+            'run_by': line[20:40].strip(),
+            'date': line[40:60].strip(),
+        }
+
+    def _set_record(self, label, line):
+        name, parser = self.header_records[label]
+        value = getattr(self, parser)(line)
+        if isinstance(value, dict):
+            self._records.update(value)
+        elif name in self.repeated_records:
+            self._records[name].append(value)
+        else:
+            self._records[name] = value
+
     @staticmethod
     def _get_label(line):
         return line[60:].rstrip()
 
+    @staticmethod
+    def _get_byte_label(line):
+        # метки начинаются с буквы или '#' в 61-й колонке, в строках
+        # с данными там цифра, знак или пробел: метка не создаётся
+        if len(line) > 60 and (line[60] >= 0x41 or line[60] == 0x23):
+            return line[60:].rstrip().decode('latin-1')
+        return ''
+
     def _read_header(self, file_object):
         label = ''
         while label != 'END OF HEADER':
@@ -122,9 +378,10 @@ class IonexV1:
                 raise IONEXUnexpectedEnd(file_object)
 
             label = self._get_label(line)
-            if label not in self.header_label:
-                continue
-            setattr(self, self.header_label[label], line)
+            if label in self.header_label:
+                setattr(self, self.header_label[label], line)
+            elif label in self.header_records:
+                self._set_record(label, line)
 
     @staticmethod
     def _coerce_into_int(value):
@@ -132,23 +389,48 @@ class IonexV1:
             result = int(value)
         except ValueError:
             result = int(float(value))
+            if isinstance(value, bytes):
+                value = value.decode('latin-1')
             warnings.warn('Coerced into integer: {}'.format(value))
         return result
 
+    @staticmethod
+    @lru_cache(maxsize=EPOCH_CACHE_SIZE)
+    def _cached_epoch(epoch_str):
+        # только эпохи с целыми полями; исключения не кэшируются
+        return make_epoch([
+            int(epoch_str[i:i + FIELD_WIDTH])
+            for i in range(0, EPOCH_WIDTH, FIELD_WIDTH)
+        ])
+
     def _parse_epoch(self, epoch_str):
+        # смежные файлы и карты ПЭС и RMS одного файла содержат одинаковые
+        # строки эпох, поэтому разобранные эпохи кэшируются
+        try:
+            return self._cached_epoch(epoch_str[:EPOCH_WIDTH])
+        except ValueError:
+            pass
+
         epoch_elements = []
-        for i in range(0, 36, 6):
+        for i in range(0, EPOCH_WIDTH, FIELD_WIDTH):
             # XXX: не все соблюдают формат, иногда попадаются float
-            v = self._coerce_into_int(epoch_str[i:i + 6])
+            v = self._coerce_into_int(epoch_str[i:i + FIELD_WIDTH])
             epoch_elements.append(v)
-        epoch = datetime(*epoch_elements[0:3])
 
         # иногда значение часа = 24 или минуты/секунды = 60
-        # прибавляем как дельту
-        epoch += timedelta(hours=epoch_elements[3])
-        epoch += timedelta(seconds=epoch_elements[4] * 60 + epoch_elements[5])
+        # прибавляем как дельту, см. make_epoch
+        return make_epoch(epoch_elements)
 
-        return epoch
+    def _parse_epochs(self, lines):
+        """Разобрать эпохи строк ``lines`` за один проход (см.
+        ``epoch_array``), если доступен ``numpy``.
+
+        :return: ``numpy.ndarray`` (``datetime64[s]``), без ``numpy`` --
+            список ``datetime``; см. ``epoch_list``.
+        """
+        if numpy is None:
+            return [self._parse_epoch(line) for line in lines]
+        return epoch_array(lines, self._parse_epoch)
 
     @staticmethod
     def _parse_map_grid_def(def_str):
@@ -166,9 +448,54 @@ class IonexV1:
         assert not len(line) % 5
         return [int(line[i:i+5]) for i in range(0, len(line), 5)]
 
-    def _read_map(self, file_object):
+    @classmethod
+    def _read_block(cls, lines):
+        """Разобрать строки с данными карты за один проход.
+
+        Строки склеиваются в одну последовательность 5-символьных полей,
+        которая преобразуется в целые числа целиком. Если какая-то строка не
+        соответствует формату, используется построчный ``_read_slice``.
+
+        :return: ``numpy.ndarray`` (``int32``), если доступен ``numpy``,
+            иначе ``list``.
+        """
+        rows = [line.rstrip() for line in lines]
+        if any(len(row) % 5 for row in rows):
+            return cls._read_rows(lines)
+
+        # строки -- str или bytes, в зависимости от режима чтения
+        fields = rows[0][:0].join(rows) if rows else ''
+        if numpy is None:
+            try:
+                return [int(fields[i:i+5]) for i in range(0, len(fields), 5)]
+            except ValueError:
+                return cls._read_rows(lines)
+
+        if isinstance(fields, str):
+            try:
+                fields = fields.encode('ascii')
+            except UnicodeEncodeError:
+                return cls._read_rows(lines)
+        try:
+            buffer = numpy.frombuffer(fields, dtype='S5')
+            return buffer.astype(numpy.int32)
+        except ValueError:
+            return cls._read_rows(lines)
+
+    @classmethod
+    def _read_rows(cls, lines):
+        data = []
+        for line in lines:
+            data += cls._read_slice(line)
+        return data
+
+    def _read_map(self, file_object, end_label='END OF TEC MAP'):
         """
+        :param end_label: метка конца карты, 'END OF TEC MAP' или
+            'END OF RMS MAP'.
+
         :return: ``namedtuple``, Map('Map', ['epoch', 'height', 'data'])
+            или ``None``, если эпоха карты вне периода ``start`` -- ``end``.
         """
         epoch = 'EPOCH OF CURRENT MAP'
         grid = 'LAT/LON1/LON2/DLON/H'
@@ -185,7 +512,12 @@ class IonexV1:
             grid: None,
         }
 
-        data = []
+        window = self._map_window()
+        # номер строки широты (по всем слоям) и попадает ли она в окно
+        row = -1
+        keep = True
+
+        rows = []
         while True:
             try:
                 line = next(file_object)
@@ -195,20 +527,131 @@ class IonexV1:
             label = self._get_label(line)
             if label in parser:
                 metadata[label] = parser[label](line)
+                if label == epoch and not self._in_period(metadata[epoch]):
+                    self._skip_map(file_object, end_label)
+                    return None
+                if label == grid and window is not None:
+                    row += 1
+                    keep = row % self._n_lat in window.rows
+                    if keep:
+                        rows.append([])
                 continue
             # TODO: проверять номер карты (?)
-            elif label == 'END OF TEC MAP':
+            elif label == end_label:
                 break
-            data += self._read_slice(line)
+            if window is None:
+                rows.append(line)
+            elif keep:
+                rows[-1].append(line)
+
+        if window is not None:
+            rows = [
+                self._cut_row(lines, window.columns) for lines in rows if lines
+            ]
+
+        if self._lazy:
+            # функция не ссылается на читалку: ленивая карта не держит
+            # открытый файл и может быть передана в другой процесс
+            data = partial(decode_rows, rows, self._array)
+        else:
+            data = self._decode_rows(rows)
 
         return Map(
             epoch=metadata[epoch],
-            # XXX: всегда будет заключительное значение высоты
+            # для трёхмерной карты -- высота последнего слоя; высоты
+            # слоёв задаются заголовком 'HGT1 / HGT2 / DHGT'
             height=metadata[grid][4],
             data=data,
         )
 
+    def _in_period(self, epoch):
+        if self._start is not None and epoch < self._start:
+            return False
+        if self._end is not None and epoch > self._end:
+            return False
+        return True
+
+    def _map_window(self):
+        """Вернуть ``Window`` для ``bbox`` или ``None``; вычисляется после
+        разбора заголовка."""
+        if self._bbox is None:
+            return None
+        if self._window is None:
+            grid = MapGrid(self._lat, self._lon)
+            self._n_lat = grid.shape[0]
+            self._window = Window(*grid.window(*self._bbox))
+        return self._window
+
+    @staticmethod
+    def _cut_row(lines, columns):
+        """Склеить строки данных одной широты и вырезать поля столбцов
+        ``columns``."""
+        fields = lines[0][:0].join(line.rstrip() for line in lines)
+        return fields[columns.start * 5:columns.stop * 5]
+
+    def _decode_rows(self, rows):
+        return decode_rows(rows, self._array)
+
+    def _make_map(self, tec_map, rms_map=None):
+        tec = tec_map.data
+        rms = rms_map.data if rms_map is not None else None
+
+        latitude, longitude = self.latitude, self.longitude
+        window = self._map_window()
+        if window is not None:
+            latitude, longitude = window.grid
+
+        return IonexMap(
+            exponent=self.exponent,
+            epoch=tec_map.epoch,
+            longitude=longitude,
+            latitude=latitude,
+            height=self.height,
+            tec=tec,
+            rms=rms,
+            none_value=self.none_value,
+            dimension=self.dimension or 2,
+        )
+
+    def _skip_map(self, file_object, end_label):
+        for line in file_object:
+            if self._get_label(line) == end_label:
+                return
+        raise IONEXUnexpectedEnd(file_object)
+
+    def _add_tec_map(self, pending, number, tec_map):
+        """Принять карту ПЭС; вернуть список карт, готовых к выдаче.
+
+        :param pending: карты ПЭС, ожидающие карту RMS: (номер, карта).
+        """
+        if self._rms:
+            pending.append((number, tec_map))
+            return []
+        return [self._make_map(tec_map)]
+
+    def _add_rms_map(self, pending, number, rms_map):
+        """Связать карту RMS с ожидающей картой ПЭС; вернуть список карт,
+        готовых к выдаче."""
+        for i, (tec_number, tec_map) in enumerate(pending):
+            if (tec_number, tec_map.epoch) == (number, rms_map.epoch):
+                break
+        else:
+            warnings.warn(
+                'RMS map {} ({}) does not match '
+                'any TEC map.'.format(number, rms_map.epoch)
+            )
+            return []
+
+        # предшествующие карты ПЭС остались без карт RMS
+        maps = [self._make_map(tec_map) for _, tec_map in pending[:i]]
+        maps.append(self._make_map(pending[i][1], rms_map))
+        del pending[:i + 1]
+        return maps
+
     def _next_map(self):
+        # карты ПЭС, ожидающие соответствующую карту RMS: (номер, карта)
+        pending = []
+
         with self._context_manager as file_object:
             self._read_header(file_object)
 
@@ -224,21 +667,43 @@ class IonexV1:
 
                 label = self._get_label(line)
                 if label == 'START OF TEC MAP':
-                    self._tec_maps_numbers.append(int(line[:6]))
-                    epoch, height, map_data = self._read_map(file_object)
-                    yield IonexMap(
-                        exponent=self.exponent,
-                        epoch=epoch,
-                        longitude=self.longitude,
-                        latitude=self.latitude,
-                        height=self.height,
-                        tec=map_data,
-                        none_value=self.none_value,
-                    )
+                    number = int(line[:6])
+                    tec_map = self._read_map(file_object)
+                    # номера только карт периода start -- end, как в
+                    # IndexedIonexV1 и BlockIonexV1
+                    if tec_map is not None:
+                        self._tec_maps_numbers.append(number)
+                        yield from self._add_tec_map(pending, number, tec_map)
+                    continue
+
+                if label == 'START OF RMS MAP':
+                    if not self._rms:
+                        self._skip_map(file_object, 'END OF RMS MAP')
+                        continue
+                    number = int(line[:6])
+                    rms_map = self._read_map(file_object, 'END OF RMS MAP')
+                    if rms_map is not None:
+                        yield from self._add_rms_map(pending, number, rms_map)
                     continue
 
                 if label == 'END OF FILE':
                     break
 
+        for _, tec_map in pending:
+            yield self._make_map(tec_map)
+
     def __iter__(self):
         return self._next_map()
+
+
+def decode_rows(rows, array=False):
+    """Преобразовать строки с данными карты в значения.
+
+    :param array: ``bool``, режим массивов (см. ``IonexV1``).
+
+    :return: ``numpy.ndarray`` в режиме массивов, иначе ``array.array``.
+    """
+    data = IonexV1._read_block(rows)
+    if array:
+        return int_array(data)
+    return int_store(data)
@@ -0,0 +1,345 @@
+import io
+import mmap
+import os
+import warnings
+from collections import namedtuple
+from datetime import datetime
+
+from ._compat import numpy, require_numpy
+from .compression import is_compressed
+from .epochs import epoch_list
+from .exceptions import IONEXError, IONEXUnexpectedEnd
+from .ionex_file import IonexV1, Latitude, Longitude, Height
+
+MapIndex = namedtuple('MapIndex', ['number', 'epoch', 'start', 'end'])
+
+
+class IndexedIonexV1(IonexV1):
+    """Читалка IONEX с произвольным доступом к картам.
+
+    Файл отображается в память (``mmap``) и один раз просматривается в
+    поисках меток 'START OF TEC MAP' / 'END OF TEC MAP' (и карт RMS); для
+    каждой карты запоминаются её номер, эпоха и смещения блока данных.
+    Карта разбирается только при обращении к ней::
+
+        inx = IndexedIonexV1('igsg0010.00i')
+        len(inx)
+        inx[11]
+        inx.at_epoch(datetime(2000, 1, 1, 23))
+    """
+
+    def __init__(self, file, *, cache=None, **kwargs):
+        """
+        :param file: путь к файлу IONEX или объект файла, у которого есть
+            ``fileno()``.
+
+        :param cache: ``IndexCache``, кэш индексов; если для файла уже есть
+            запись, заголовок и индекс карт не разбираются повторно.
+
+        :param kwargs: см. ``IonexV1``.
+
+        :raises IONEXError:
+            Если файл невозможно отобразить в память.
+
+        :raises IONEXUnexpectedEnd:
+            Если в файле нет заголовка.
+        """
+        super().__init__(file, **kwargs)
+        self._name = getattr(file, 'name', file)
+
+        self._file = None
+        if isinstance(file, str):
+            self._file = file = open(file, 'rb')
+
+        try:
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, ValueError, io.UnsupportedOperation) as err:
+            self.close()
+            raise IONEXError(
+                'Random access requires a file on disk: {}'.format(err)
+            )
+
+        self._index = []
+        self._full_index = ([], [])
+        self._rms_index = {}
+        self._epochs = {}
+        self._epoch_array = None
+        self._rms_epoch_array = None
+        try:
+            self._scan_cached(cache, file)
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self, file):
+        # файл открывается для отображения в память, см. __init__
+        self._get_label = self._get_byte_label
+        return None
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def index(self):
+        """Вернуть список ``MapIndex`` для карт ПЭС файла."""
+        return list(self._index)
+
+    @property
+    def epochs(self):
+        """Вернуть эпохи карт ПЭС файла в порядке следования."""
+        return [entry.epoch for entry in self._index]
+
+    @property
+    def epoch_array(self):
+        """Вернуть эпохи карт ПЭС файла, ``numpy.ndarray``
+        (``datetime64[s]``); для карт без эпохи -- ``NaT``."""
+        require_numpy('Epoch arrays')
+        return self._epoch_array.copy()
+
+    def _lines(self, start, end):
+        return iter(self._mm[start:end].splitlines())
+
+    def _line_end(self, pos):
+        end = self._mm.find(b'\n', pos)
+        return len(self._mm) if end < 0 else end + 1
+
+    def _find_label(self, label, pos, end=None):
+        """Найти метку, начинающуюся с 60-й позиции строки.
+
+        :return: смещение начала строки с меткой или -1.
+        """
+        mm = self._mm
+        if end is None:
+            end = len(mm)
+        while True:
+            pos = mm.find(label, pos, end)
+            if pos < 0:
+                return -1
+            line_start = mm.rfind(b'\n', 0, pos) + 1
+            if pos - line_start == 60:
+                return line_start
+            pos += len(label)
+
+    def _scan_cached(self, cache, file):
+        if cache is None or not isinstance(self._name, str):
+            self._scan()
+            return
+
+        key = cache.key(self._name, os.fstat(file.fileno()))
+        state = cache.get(key)
+        if state is not None:
+            self._restore(state)
+            return
+
+        self._scan()
+        cache.put(key, self._state())
+
+    def _scan(self):
+        if is_compressed(self._mm[:3]):
+            raise IONEXError(
+                'Random access is not supported for compressed files: '
+                '{}'.format(self.name)
+            )
+
+        header_end = self._find_label(b'END OF HEADER', 0)
+        if header_end < 0:
+            raise IONEXUnexpectedEnd(self)
+        self._read_header(self._lines(0, self._line_end(header_end)))
+
+        index, epochs = self._scan_blocks(
+            b'START OF TEC MAP',
+            b'END OF TEC MAP',
+            self._line_end(header_end),
+        )
+        # блоки RMS индексируются всегда: индекс сохраняется в кэше и
+        # используется читалками с любым rms (rms учитывается в _load)
+        rms_index, rms_epochs = self._scan_blocks(
+            b'START OF RMS MAP',
+            b'END OF RMS MAP',
+            index[-1].end if index else self._line_end(header_end),
+        )
+        self._set_index(index, rms_index, epochs, rms_epochs)
+
+    def _set_index(self, index, rms_index, epochs=None, rms_epochs=None):
+        """Установить индекс карт.
+
+        :param epochs, rms_epochs: эпохи карт ``index`` и ``rms_index``,
+            ``datetime64[s]``, если они уже разобраны массивом; иначе
+            (например, индекс из кэша) строятся по ``MapIndex.epoch``.
+        """
+        # полный индекс сохраняется в кэше, см. _state
+        self._full_index = (index, rms_index)
+        selected = [self._in_period(entry.epoch) for entry in index]
+        if numpy is not None:
+            if epochs is None:
+                epochs = _epoch_axis(index)
+            if rms_epochs is None:
+                rms_epochs = _epoch_axis(rms_index)
+            self._epoch_array = epochs[numpy.array(selected, dtype=bool)]
+            self._rms_epoch_array = rms_epochs
+        index = [entry for entry, keep in zip(index, selected) if keep]
+        self._index = index
+        self._rms_index = {
+            (entry.number, entry.epoch): entry for entry in rms_index
+        }
+        self._tec_maps_numbers = [entry.number for entry in index]
+        self._epochs = {entry.epoch: i for i, entry in enumerate(index)}
+
+    def _state(self):
+        """Вернуть заголовок и индекс карт в виде, пригодном для JSON."""
+        def epoch(value):
+            return None if value is None else list(value.timetuple()[:6])
+
+        def entries(index):
+            return [
+                [entry.number, epoch(entry.epoch), entry.start, entry.end]
+                for entry in index
+            ]
+
+        records = dict(self._records)
+        for name in ('first_epoch', 'last_epoch'):
+            if name in records:
+                records[name] = epoch(records[name])
+
+        return {
+            'records': records,
+            'exponent': self._exponent,
+            'dimension': self._dimension,
+            'latitude': self._lat,
+            'longitude': self._lon,
+            'height': self._height,
+            'maps': entries(self._full_index[0]),
+            'rms_maps': entries(self._full_index[1]),
+        }
+
+    def _restore(self, state):
+        def grid_def(cls, value):
+            return None if value is None else cls(*value)
+
+        records = state.get('records', {})
+        for name in ('first_epoch', 'last_epoch'):
+            if records.get(name) is not None:
+                records[name] = datetime(*records[name])
+        self._records.update(records)
+
+        self._exponent = state['exponent']
+        self._dimension = state['dimension']
+        self._lat = grid_def(Latitude, state['latitude'])
+        self._lon = grid_def(Longitude, state['longitude'])
+        self._height = grid_def(Height, state['height'])
+
+        def entries(values):
+            return [
+                MapIndex(
+                    number=number,
+                    epoch=None if epoch is None else datetime(*epoch),
+                    start=start,
+                    end=end,
+                )
+                for number, epoch, start, end in values
+            ]
+
+        self._set_index(entries(state['maps']), entries(state['rms_maps']))
+
+    def _scan_blocks(self, start_label, end_label, pos):
+        blocks = []
+        epoch_lines = []
+        while True:
+            line_start = self._find_label(start_label, pos)
+            if line_start < 0:
+                break
+
+            start = self._line_end(line_start)
+            end_line = self._find_label(end_label, start)
+            if end_line < 0:
+                warnings.warn(
+                    'Unexpected end of the file {}.'.format(self.name)
+                )
+                break
+            end = self._line_end(end_line)
+
+            number = int(self._mm[line_start:line_start + 6])
+            epoch_line = self._block_epoch_line(start, end)
+            if epoch_line is not None:
+                epoch_lines.append(epoch_line)
+            blocks.append((number, epoch_line is not None, start, end))
+            pos = end
+
+        # эпохи всех карт разбираются за один проход; массив эпох
+        # сохраняется (см. epoch_array), datetime -- для MapIndex
+        parsed = self._parse_epochs(epoch_lines)
+        has_epoch = [block[1] for block in blocks]
+        axis = None
+        if numpy is None:
+            parsed = iter(parsed)
+            epochs = [next(parsed) if has else None for has in has_epoch]
+        else:
+            axis = numpy.full(len(blocks), 'NaT', dtype='datetime64[s]')
+            axis[numpy.array(has_epoch, dtype=bool)] = parsed
+            epochs = epoch_list(axis)
+
+        index = [
+            MapIndex(number=number, epoch=epoch, start=start, end=end)
+            for (number, _, start, end), epoch in zip(blocks, epochs)
+        ]
+        return index, axis
+
+    def _block_epoch_line(self, start, end):
+        line_start = self._find_label(b'EPOCH OF CURRENT MAP', start, end)
+        if line_start < 0:
+            return None
+        return self._mm[line_start:self._line_end(line_start)]
+
+    def _load(self, entry):
+        tec_map = self._read_map(self._lines(entry.start, entry.end))
+
+        rms_map = None
+        rms_entry = self._rms_index.get((entry.number, entry.epoch))
+        if self._rms and rms_entry is not None:
+            rms_map = self._read_map(
+                self._lines(rms_entry.start, rms_entry.end),
+                'END OF RMS MAP',
+            )
+        return self._make_map(tec_map, rms_map)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._load(entry) for entry in self._index[item]]
+        return self._load(self._index[item])
+
+    def at_epoch(self, epoch):
+        """Вернуть карту ПЭС для эпохи ``epoch``.
+
+        :type epoch: datetime
+        :raises KeyError: если в файле нет карты для этой эпохи.
+        """
+        return self[self._epochs[epoch]]
+
+    def _next_map(self):
+        for entry in self._index:
+            yield self._load(entry)
+
+    def close(self):
+        mm = getattr(self, '_mm', None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _epoch_axis(index):
+    """Вернуть эпохи карт ``index`` массивом ``datetime64[s]``."""
+    return numpy.array([entry.epoch for entry in index],
+                       dtype='datetime64[s]')
@@ -1,10 +1,232 @@
+import math
+from array import array
 from collections import namedtuple
+from functools import lru_cache
 
+from ._compat import numpy, require_numpy, int_store
 from .exceptions import IONEXMapError
 
 Grid = namedtuple('Grid', ['latitude', 'longitude'])
 Latitude = namedtuple('Latitude', ['lat1', 'lat2', 'dlat'])
 Longitude = namedtuple('Longitude', ['lon1', 'lon2', 'dlon'])
+Cell = namedtuple('Cell', ['corners', 'lat_weight', 'lon_weight'])
+
+# число последних сеток (и наборов высот), хранимых для повторного
+# использования; кортежи нельзя хранить по слабым ссылкам
+GRID_CACHE_SIZE = 256
+
+
+def _cells(start, stop, step):
+    """Вернуть число узлов сетки от ``start`` до ``stop`` с шагом ``step``."""
+    return int(round((stop - start) / step)) + 1
+
+
+class MapGrid(Grid):
+    """Сетка карты: ``Grid(latitude, longitude)`` с вычисленными
+    координатами узлов и поиском узлов и ячеек за постоянное время.
+
+    Экземпляры с одинаковым определением сетки -- один и тот же объект
+    (хранятся ``GRID_CACHE_SIZE`` последних сеток), поэтому координаты
+    вычисляются и хранятся один раз для всех карт::
+
+        grid = MapGrid((87.5, -87.5, -2.5), (-180., 180., 5.))
+        grid.shape
+        grid.latitudes
+        grid.node(52.5, 104.)
+
+    Узел ``(i, j)`` -- значение с индексом ``i * shape[1] + j`` в данных
+    карты (см. ``IonexMap.tec``). Если сетка по долготе охватывает 360
+    градусов, долгота "замыкается": за последним узлом снова идёт первый.
+    """
+
+    def __new__(cls, latitude, longitude):
+        return cls._intern(Latitude(*latitude), Longitude(*longitude))
+
+    @classmethod
+    @lru_cache(maxsize=GRID_CACHE_SIZE)
+    def _intern(cls, latitude, longitude):
+        grid = super().__new__(cls, latitude, longitude)
+        grid._init()
+        return grid
+
+    def _init(self):
+        lat1, lat2, dlat = self.latitude
+        lon1, lon2, dlon = self.longitude
+        self.shape = (_cells(lat1, lat2, dlat), _cells(lon1, lon2, dlon))
+        self.size = self.shape[0] * self.shape[1]
+        # число узлов на 360 градусов долготы, если сетка глобальная
+        self.period = int(round(360. / abs(dlon)))
+        if self.shape[1] < self.period:
+            self.period = None
+        self._latitudes = None
+        self._longitudes = None
+
+    def __reduce__(self):
+        # при распаковке (pickle) сетка также берётся из общего набора
+        return type(self), (tuple(self.latitude), tuple(self.longitude))
+
+    @property
+    def latitudes(self):
+        """Вернуть широты узлов, ``numpy.ndarray`` только для чтения."""
+        if self._latitudes is None:
+            self._latitudes = self._axis(self.latitude, self.shape[0])
+        return self._latitudes
+
+    @property
+    def longitudes(self):
+        """Вернуть долготы узлов, ``numpy.ndarray`` только для чтения."""
+        if self._longitudes is None:
+            self._longitudes = self._axis(self.longitude, self.shape[1])
+        return self._longitudes
+
+    @staticmethod
+    def _axis(grid_def, size):
+        np = require_numpy('MapGrid coordinates')
+        start, _, step = grid_def
+        axis = start + step * np.arange(size, dtype=np.float64)
+        axis.flags.writeable = False
+        return axis
+
+    def window(self, lat_min, lat_max, lon_min, lon_max):
+        """Вернуть часть сетки внутри прямоугольника (границы включаются).
+
+        Долготы задаются в тех же координатах, что и сетка; прямоугольник,
+        пересекающий границу сетки по долготе, не поддерживается.
+
+        :return: (rows, columns, grid): индексы узлов по широте и долготе
+            (``range``) и ``MapGrid`` этих узлов.
+
+        :raises ValueError: если в прямоугольнике нет узлов сетки.
+        """
+        rows = self._axis_range(self.latitude, self.shape[0],
+                                lat_min, lat_max)
+        columns = self._axis_range(self.longitude, self.shape[1],
+                                   lon_min, lon_max)
+        if not rows or not columns:
+            raise ValueError(
+                'No grid nodes in the window ({}, {}, {}, {})'.format(
+                    lat_min, lat_max, lon_min, lon_max,
+                )
+            )
+
+        lat1, _, dlat = self.latitude
+        lon1, _, dlon = self.longitude
+        grid = MapGrid(
+            (lat1 + dlat * rows[0], lat1 + dlat * rows[-1], dlat),
+            (lon1 + dlon * columns[0], lon1 + dlon * columns[-1], dlon),
+        )
+        return rows, columns, grid
+
+    @staticmethod
+    def _axis_range(grid_def, size, low, high):
+        """Индексы узлов оси, координаты которых от ``low`` до ``high``."""
+        start, _, step = grid_def
+        if not step:
+            return range(0, 1 if low <= start <= high else 0)
+        first, last = sorted(((low - start) / step, (high - start) / step))
+        # допуск на погрешность округления координат узлов
+        first = max(0, math.ceil(first - 1e-9))
+        last = min(size - 1, math.floor(last + 1e-9))
+        return range(first, last + 1)
+
+    def _position(self, lat, lon):
+        """Вернуть дробные индексы точки по широте и долготе или ``None``,
+        если точка вне сетки."""
+        lat1, _, dlat = self.latitude
+        lon1, _, dlon = self.longitude
+        n_lat, n_lon = self.shape
+
+        fi = (lat - lat1) / dlat
+        fj = (lon - lon1) * math.copysign(1, dlon) % 360. / abs(dlon)
+        if self.period is not None:
+            fj %= self.period
+        elif fj > n_lon - 1:
+            return None
+        if not 0 <= fi <= n_lat - 1:
+            return None
+        return fi, fj
+
+    def node(self, lat, lon):
+        """Вернуть индекс ближайшего к точке узла в данных карты.
+
+        :raises ValueError: если точка вне сетки.
+        """
+        position = self._position(lat, lon)
+        if position is None:
+            raise ValueError('Point ({}, {}) is outside the grid'.format(
+                lat, lon,
+            ))
+        i, j = (int(round(f)) for f in position)
+        if self.period is not None:
+            j %= self.period
+        return i * self.shape[1] + j
+
+    def cell(self, lat, lon):
+        """Вернуть ячейку, в которую попадает точка.
+
+        :return: ``Cell(corners, lat_weight, lon_weight)``: ``corners`` --
+            индексы углов ячейки в данных карты, (i0, j0), (i0, j1),
+            (i1, j0), (i1, j1); веса -- положение точки в ячейке, от 0 до 1.
+
+        :raises ValueError: если точка вне сетки.
+        """
+        position = self._position(lat, lon)
+        if position is None:
+            raise ValueError('Point ({}, {}) is outside the grid'.format(
+                lat, lon,
+            ))
+        fi, fj = position
+        n_lat, n_lon = self.shape
+
+        i0 = min(int(fi), max(n_lat - 2, 0))
+        i1 = min(i0 + 1, n_lat - 1)
+        if self.period is not None:
+            j0 = int(fj)
+            j1 = j0 + 1 if j0 + 1 < n_lon else j0 + 1 - self.period
+        else:
+            j0 = min(int(fj), max(n_lon - 2, 0))
+            j1 = min(j0 + 1, n_lon - 1)
+
+        return Cell(
+            corners=(
+                i0 * n_lon + j0, i0 * n_lon + j1,
+                i1 * n_lon + j0, i1 * n_lon + j1,
+            ),
+            lat_weight=fi - i0,
+            lon_weight=fj - j0,
+        )
+
+    def cell_weights(self, lats, lons):
+        """Векторный вариант ``cell`` для массивов точек.
+
+        :return: (i0, i1, j0, j1, wi, wj, valid) -- индексы углов ячеек по
+            широте и долготе, веса и маска точек внутри сетки.
+        """
+        np = require_numpy('MapGrid.cell_weights')
+
+        lat1, _, dlat = self.latitude
+        lon1, _, dlon = self.longitude
+        n_lat, n_lon = self.shape
+
+        fi = (lats - lat1) / dlat
+        valid = (fi >= 0) & (fi <= n_lat - 1)
+        i0 = np.clip(np.floor(fi), 0, max(n_lat - 2, 0)).astype(np.intp)
+        i1 = np.minimum(i0 + 1, n_lat - 1)
+        wi = fi - i0
+
+        fj = np.mod((lons - lon1) * np.sign(dlon), 360.) / abs(dlon)
+        if self.period is not None:
+            j0 = np.floor(fj).astype(np.intp) % self.period
+            j1 = j0 + 1
+            j1 = np.where(j1 < n_lon, j1, j1 - self.period)
+            wj = fj - np.floor(fj)
+        else:
+            valid &= fj <= n_lon - 1
+            j0 = np.clip(np.floor(fj), 0, max(n_lon - 2, 0)).astype(np.intp)
+            j1 = np.minimum(j0 + 1, n_lon - 1)
+            wj = fj - j0
+
+        return i0, i1, j0, j1, wi, wj, valid
 
 
 class IonexMap:
@@ -12,9 +234,10 @@ class IonexMap:
 
     Атрибуты:
 
-    :type grid: namedtuple
+    :type grid: MapGrid
     :param grid: определение сетки для карты, содержит два
-        ``namedtupla``:
+        ``namedtupla`` (координаты узлов, размер и поиск узлов см.
+        ``MapGrid``; карты с одинаковой сеткой разделяют один объект):
 
         - ``grid.latittude`` =
           ``namedtuple('Latitude', ['lat1', 'lat2', 'dlat'])`` определение
@@ -37,13 +260,50 @@ class IonexMap:
         последнего -- ``grid.longitude.lon2``, с шагом, равным
         ``grid.longitude.dlon``.
 
+    :type rms: list | None
+    :param rms: значения RMS с учётом степени в том же формате, что и
+        ``tec``; ``None``, если в файле нет карты RMS для этой эпохи.
+
+    :type rms_array: numpy.ndarray | None
+    :param rms_array: значения RMS в виде двумерного массива, как
+        ``tec_array``.
+
+    :type tec_array: numpy.ndarray
+    :param tec_array: данные ПЭС в виде двумерного массива (широта, долгота)
+        или трёхмерного (высота, широта, долгота); отсутствующие значения
+        заменены на ``nan``. Требует ``numpy``.
+
+    :type shape: tuple
+    :param shape: размер карты, (число широт, число долгот); для трёхмерной
+        карты -- (число высот, число широт, число долгот).
+
     :type height: float
     :param height: высота, с которой ассоциированы данные карты.
 
+    :type dimension: int
+    :param dimension: размерность карты, 2 или 3 ('MAP DIMENSION').
+        Данные трёхмерной карты -- слои по высотам ``heights``, каждый в
+        формате двумерной карты.
+
+    :type heights: tuple
+    :param heights: высоты слоёв карты, км.
+
     :type epoch: datetime
     :param epoch: дата и время карты ПЭС.
+
+    Значения карты хранятся компактно: ``array('h')`` (``array('i')``, если
+    значения не помещаются в 2 байта) или массив ``numpy`` в режиме
+    массивов; сетка и высоты слоёв разделяются картами с одинаковым
+    определением сетки.
     """
 
+    __slots__ = (
+        'epoch', 'height', 'dimension', 'grid', 'heights',
+        '_exponent', '_none_value',
+        '_tec', '_rms', '_tec_array', '_rms_array',
+        '__weakref__',
+    )
+
     def __init__(self, *,
                  exponent,
                  epoch,
@@ -52,7 +312,8 @@ class IonexMap:
                  height,
                  tec,
                  rms=None,
-                 none_value=None):
+                 none_value=None,
+                 dimension=2):
         """
         :param exponent:
             ``int``, значение 'EXPONENT' из файла IONEX; степень,
@@ -75,58 +336,209 @@ class IonexMap:
             ``float``, высота текущей карты.
 
         :param tec:
-            ``list``, список значений ПЭС из файла IONEX.
+            ``list`` | ``array.array`` | ``numpy.ndarray``, значения ПЭС из
+            файла IONEX. Список целых упаковывается в ``array('h')``,
+            список с ``float`` или ``None`` копируется как есть; ``array`` и
+            массив ``numpy`` (режим массивов) сохраняются без копирования --
+            карта становится их владельцем, изменять их после создания карты
+            нельзя. Можно передать функцию без аргументов,
+            возвращающую значения: она будет вызвана при первом обращении к
+            данным карты (ленивый режим), тогда же проверяется соответствие
+            данных сетке.
 
         :param rms:
-            ``list``, список значений RMS из файла IONEX.
+            значения RMS из файла IONEX в том же виде, что и ``tec``.
 
         :param none_value:
             ``int``, значения в карте, равные ``none_value`` будут заменены на
             ``None``. По умолчанию ``none_value`` == None, в таком случае
             никакие замены производится не будут.
+
+        :param dimension:
+            ``int``, значение 'MAP DIMENSION'; для трёхмерной карты
+            ``height`` -- (hgt1, hgt2, dhgt), определение сетки по высоте.
         """
         self.epoch = epoch
         self.height = height
-        self.grid = Grid(
-            latitude=Latitude(*latitude),
-            longitude=Longitude(*longitude),
-        )
+        self.dimension = dimension
+        self.grid = MapGrid(latitude, longitude)
+        self.heights = self._heights(height, dimension)
 
         self._exponent = exponent
         self._none_value = none_value
 
-        self._tec = tec.copy()
-        self._rms = rms.copy() if rms is not None else None
+        self._tec = self._own(tec)
+        self._rms = self._own(rms)
+        self._tec_array = None
+        self._rms_array = None
 
+        if not self._lazy():
+            self._check_grid()
+
+    def _check_grid(self):
         if not self._grid_match_data():
             err_msg = 'The grid definition does ' \
                       'not match the map; epoch {}.'.format(self.epoch)
             raise IONEXMapError(err_msg)
 
+    def _load(self):
+        """Разобрать данные карты, если они ещё не разобраны."""
+        if not self._lazy():
+            return
+        if callable(self._tec):
+            self._tec = self._own(self._tec())
+        if callable(self._rms):
+            self._rms = self._own(self._rms())
+        self._check_grid()
+
+    def _lazy(self):
+        return callable(self._tec) or callable(self._rms)
+
+    @staticmethod
+    @lru_cache(maxsize=GRID_CACHE_SIZE)
+    def _heights(height, dimension):
+        # кортеж высот разделяется картами с одинаковой сеткой
+        if dimension != 3:
+            if isinstance(height, (int, float)) or height is None:
+                return (height, )
+            return (height[0], )
+        hgt1, hgt2, dhgt = height
+        if not dhgt:
+            return (float(hgt1), )
+        return tuple(
+            hgt1 + dhgt * i for i in range(_cells(hgt1, hgt2, dhgt))
+        )
+
+    @staticmethod
+    def _own(values):
+        if values is None or callable(values):
+            return values
+        # массив numpy и array -- уже готовый буфер, его не копируем
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            return values.reshape(-1)
+        if isinstance(values, array):
+            return values
+        try:
+            return int_store(values)
+        except TypeError:
+            # не только целые значения (float, None): копия списка
+            return list(values)
+
+    @property
+    def exponent(self):
+        """Вернуть значение 'EXPONENT' карты."""
+        return self._exponent
+
+    @property
+    def none_value(self):
+        return self._none_value
+
+    @property
+    def raw_tec(self):
+        """Вернуть значения ПЭС в том виде, в каком они записаны в файле:
+        целые числа без учёта степени (``array.array`` или
+        ``numpy.ndarray``).
+        """
+        self._load()
+        return self._tec
+
+    @property
+    def raw_rms(self):
+        """Вернуть значения RMS без учёта степени или ``None``."""
+        self._load()
+        return self._rms
+
+    @property
+    def shape(self):
+        """Вернуть размер карты: (число широт, число долгот) или
+        (число высот, число широт, число долгот) для трёхмерной карты."""
+        if self.dimension == 3:
+            return (len(self.heights), ) + self.grid.shape
+        return self.grid.shape
+
+    def _scale(self, values):
+        if not isinstance(values, list):
+            values = values.tolist()
+
+        scale = 10 ** self._exponent
+        if self._none_value is None:
+            return [None if v is None else v * scale for v in values]
+
+        none_value = self._none_value
+        return [None if v is None or v == none_value else v * scale
+                for v in values]
+
     @property
     def tec(self):
         """Вернуть ПЭС с учётом степени."""
-        tec = [v * 10 ** self._exponent for v in self._tec]
-        if self._none_value is None:
-            return tec
+        self._load()
+        return self._scale(self._tec)
 
-        none_value = self._none_value * 10 ** self._exponent
-        while True:
-            try:
-                i = tec.index(none_value)
-                tec[i] = None
-            except ValueError:
-                break
-        return tec
+    @property
+    def tec_array(self):
+        """Вернуть ПЭС с учётом степени в виде массива (широта, долгота);
+        значения ``none_value`` заменены на ``nan``.
+
+        Массив вычисляется один раз и доступен только для чтения.
+        """
+        if self._tec_array is None:
+            self._load()
+            self._tec_array = self._to_array(self._tec)
+        return self._tec_array
 
     @property
     def rms(self):
-        raise NotImplementedError
+        """Вернуть RMS с учётом степени или ``None``."""
+        self._load()
+        if self._rms is None:
+            return None
+        return self._scale(self._rms)
 
-    def _grid_match_data(self):
-        def cells(start, stop, step):
-            return (abs(start) + abs(stop)) / abs(step) + 1
+    @property
+    def rms_array(self):
+        """Вернуть RMS в виде массива (широта, долгота) или ``None``,
+        см. ``tec_array``.
+        """
+        self._load()
+        if self._rms is None:
+            return None
+        if self._rms_array is None:
+            self._rms_array = self._to_array(self._rms)
+        return self._rms_array
+
+    def at_height(self, height):
+        """Вернуть ПЭС трёхмерной карты на высоте ``height``: линейная
+        интерполяция между соседними слоями, см.
+        ``ionex.interpolation.interpolate_height``.
+
+        :param height: высота, км, или массив высот.
+
+        :return: ``numpy.ndarray`` (широта, долгота) или (высота, широта,
+            долгота) для массива высот; вне диапазона высот -- ``nan``.
 
-        lat_cells = cells(*self.grid.latitude)
-        lon_cells = cells(*self.grid.longitude)
-        return lon_cells * lat_cells == len(self._tec)
+        :raises ValueError: если карта не трёхмерная.
+        """
+        # импорт здесь: модуль interpolation импортирует этот модуль
+        from .interpolation import interpolate_height
+
+        if self.dimension != 3:
+            raise ValueError('Not a 3-D map; epoch {}.'.format(self.epoch))
+        return interpolate_height(self.tec_array, self.heights, height)
+
+    def _to_array(self, values):
+        np = require_numpy('IonexMap.tec_array')
+        if isinstance(values, list):
+            # None в списке значений -- nan
+            values = np.array(values, dtype=np.float64)
+        raw = np.asarray(values).reshape(self.shape)
+        result = raw * 10.0 ** self._exponent
+        if self._none_value is not None:
+            result[raw == self._none_value] = np.nan
+        result.flags.writeable = False
+        return result
+
+    def _grid_match_data(self):
+        size = self.grid.size * len(self.heights)
+        if self._rms is not None and size != len(self._rms):
+            return False
+        return size == len(self._tec)
@@ -0,0 +1,452 @@
+"""Запись файлов IONEX 1.0.
+
+Значения карт форматируются векторно (``numpy``): все поля ``I5`` карты
+собираются в один массив байт, строки по 16 значений и строки
+'LAT/LON1/LON2/DLON/H' вставляются без цикла по значениям; каждая карта
+записывается в файл одним вызовом ``write``.
+"""
+from datetime import datetime, timezone
+
+from ._compat import require_numpy
+from .compression import is_binary
+from .exceptions import IONEXError
+from .ionex_file import IonexV1
+from .ionex_map import IonexMap, MapGrid
+
+# число значений в строке данных карты
+VALUES_PER_LINE = 16
+
+MAPPING_FUNCTIONS = ('NONE', 'COSZ', 'QFAC')
+
+
+def _line(content, label):
+    """Вернуть строку заголовка: данные в колонках 1--60, метка с 61-й."""
+    if len(content) > 60:
+        raise IONEXError('Header record is too long: {!r}'.format(content))
+    return '{:<60}{}\n'.format(content, label)
+
+
+def _epoch(epoch):
+    return '{:6d}{:6d}{:6d}{:6d}{:6d}{:6d}'.format(
+        epoch.year, epoch.month, epoch.day,
+        epoch.hour, epoch.minute, epoch.second,
+    )
+
+
+def _grid_def(values):
+    return '  {:6.1f}{:6.1f}{:6.1f}'.format(*values)
+
+
+# наименьшее и наибольшее значения, которые помещаются в поле I5
+_I5_MIN, _I5_MAX = -9999, 99999
+_i5_table = None
+
+
+def _make_i5_table():
+    """Вернуть таблицу полей ``I5`` для всех значений от ``_I5_MIN`` до
+    ``_I5_MAX``: ``numpy.ndarray`` (``uint8``) формы (N, 5)."""
+    np = require_numpy('ionex.writer')
+
+    values = np.arange(_I5_MIN, _I5_MAX + 1, dtype=np.int64)
+    magnitude = np.abs(values)[:, None]
+    powers = 10 ** np.arange(4, -1, -1, dtype=np.int64)
+    table = (magnitude // powers % 10).astype(np.uint8) + ord('0')
+
+    # ведущие нули заменяются пробелами, последняя цифра остаётся всегда
+    blank = magnitude < powers
+    blank[:, -1] = False
+    table[blank] = ord(' ')
+
+    # знак минус -- перед первой значащей цифрой
+    negative = values < 0
+    sign = blank.sum(axis=1) - 1
+    table[negative, sign[negative]] = ord('-')
+    return table
+
+
+def _format_fields(values):
+    """Отформатировать целые числа по ``I5``.
+
+    Поля берутся из таблицы всех возможных значений (около 550 КБ),
+    которая строится при первом вызове.
+
+    :param values: ``numpy.ndarray`` целых чисел.
+
+    :return: ``numpy.ndarray`` (``uint8``) формы ``values.shape + (5, )``,
+        символы ASCII полей.
+
+    :raises IONEXError: если значение не помещается в 5 символов.
+    """
+    global _i5_table
+    np = require_numpy('ionex.writer')
+
+    values = np.asarray(values)
+    if values.size and (values.max() > _I5_MAX or values.min() < _I5_MIN):
+        raise IONEXError('TEC values do not fit into I5 fields; '
+                         'increase the exponent')
+    if _i5_table is None:
+        _i5_table = _make_i5_table()
+    return _i5_table[values.astype(np.intp) - _I5_MIN]
+
+
+class _MapLayout:
+    """Раскладка данных карты по строкам для сетки и высоты.
+
+    Строки 'LAT/LON1/LON2/DLON/H' одинаковы для всех карт, поэтому
+    вычисляются один раз. Трёхмерная карта записывается слоями по высотам
+    ``heights``.
+    """
+
+    def __init__(self, grid, heights):
+        np = require_numpy('ionex.writer')
+
+        self.grid = grid
+        self.n_rows = len(heights) * grid.shape[0]
+        n_lon = grid.shape[1]
+        lon1, lon2, dlon = grid.longitude
+
+        rows = [
+            _line(
+                '  {:6.1f}{:6.1f}{:6.1f}{:6.1f}{:6.1f}'.format(
+                    lat, lon1, lon2, dlon, height,
+                ),
+                'LAT/LON1/LON2/DLON/H',
+            )
+            for height in heights
+            for lat in grid.latitudes
+        ]
+        self.lat_lines = np.frombuffer(
+            ''.join(rows).encode('ascii'), dtype=np.uint8,
+        ).reshape(self.n_rows, -1)
+
+        # строки по VALUES_PER_LINE полей; последняя строка широты --
+        # без дополнения пробелами
+        self.n_lines = -(-n_lon // VALUES_PER_LINE)
+        width = VALUES_PER_LINE * 5 + 1
+        keep = np.ones((self.n_lines, width), dtype=bool)
+        tail = n_lon - (self.n_lines - 1) * VALUES_PER_LINE
+        keep[-1, tail * 5:-1] = False
+        self.keep = keep.reshape(-1)
+
+    def format(self, values):
+        """Вернуть данные карты ((высота,) широта, долгота) в виде
+        ``bytes``."""
+        np = require_numpy('ionex.writer')
+
+        n_lat, n_lon = self.n_rows, self.grid.shape[1]
+        fields = _format_fields(values.reshape(n_lat, n_lon))
+
+        padded = np.full(
+            (n_lat, self.n_lines * VALUES_PER_LINE, 5), ord(' '), np.uint8,
+        )
+        padded[:, :n_lon] = fields
+        lines = np.empty(
+            (n_lat, self.n_lines, VALUES_PER_LINE * 5 + 1), np.uint8,
+        )
+        lines[..., :-1] = padded.reshape(n_lat, self.n_lines, -1)
+        lines[..., -1] = ord('\n')
+
+        data = lines.reshape(n_lat, -1)[:, self.keep]
+        return np.concatenate([self.lat_lines, data], axis=1).tobytes()
+
+
+class IonexWriterV1:
+    """Запись карт ПЭС (и RMS) в файл IONEX 1.0.
+
+    Значения передаются целыми числами в единицах ``10 ** exponent`` TECU,
+    ``9999`` -- отсутствующее значение. Карты RMS записываются после всех
+    карт ПЭС, поэтому до закрытия файла хранятся уже отформатированными.
+    """
+
+    def __init__(self, file, *,
+                 grid,
+                 epochs,
+                 exponent=-1,
+                 height=450.,
+                 program='ionex',
+                 run_by='',
+                 date=None,
+                 description=(),
+                 comment=(),
+                 mapping_function='NONE',
+                 elevation_cutoff=0.,
+                 observables_used='',
+                 base_radius=6371.,
+                 satellite_system='GPS'):
+        """
+        :param file: путь к файлу или объект файла (двоичный или
+            текстовый); переданный объект файла не закрывается.
+
+        :param grid: ``MapGrid`` или (latitude, longitude), сетка карт.
+
+        :param epochs: эпохи карт (``datetime``), по возрастанию; нужны
+            заголовку ('EPOCH OF FIRST MAP', '# OF MAPS IN FILE', ...).
+
+        :param exponent: ``int``, значение 'EXPONENT'.
+
+        :param height: ``float``, высота карт, км; для трёхмерных карт --
+            (hgt1, hgt2, dhgt), определение сетки по высоте.
+
+        :param description: строки 'DESCRIPTION'.
+
+        :param comment: строки 'COMMENT'.
+
+        Остальные параметры -- значения одноимённых записей заголовка.
+        """
+        require_numpy('ionex.writer')
+
+        if mapping_function not in MAPPING_FUNCTIONS:
+            raise IONEXError(
+                'Unknown mapping function: {}'.format(mapping_function)
+            )
+        if not isinstance(grid, MapGrid):
+            grid = MapGrid(*grid)
+
+        self.grid = grid
+        self.epochs = list(epochs)
+        self.exponent = exponent
+        self.height = height
+        self.dimension = 2 if isinstance(height, (int, float)) else 3
+        self.heights = IonexMap._heights(height, self.dimension)
+        self._layout = _MapLayout(grid, self.heights)
+        self._rms = []
+        self._number = 0
+
+        self._close = isinstance(file, str)
+        if self._close:
+            file = open(file, 'wb')
+        self._file = file
+        self._binary = is_binary(file)
+
+        if date is None:
+            date = datetime.now(timezone.utc).strftime('%d-%b-%y %H:%M')
+        self._write(self._header(
+            program=program,
+            run_by=run_by,
+            date=date,
+            description=description,
+            comment=comment,
+            mapping_function=mapping_function,
+            elevation_cutoff=elevation_cutoff,
+            observables_used=observables_used,
+            base_radius=base_radius,
+            satellite_system=satellite_system,
+        ).encode('ascii'))
+
+    def _header(self, **options):
+        epochs = self.epochs
+        interval = 0
+        if len(epochs) > 1:
+            steps = {b - a for a, b in zip(epochs, epochs[1:])}
+            if len(steps) == 1:
+                interval = int(steps.pop().total_seconds())
+
+        lines = [
+            _line('{:8.1f}{:12}{:<20}{:<20}'.format(
+                1.0, '', 'IONOSPHERE MAPS', options['satellite_system'],
+            ), 'IONEX VERSION / TYPE'),
+            _line('{:<20.20}{:<20.20}{:<20.20}'.format(
+                options['program'], options['run_by'], options['date'],
+            ), 'PGM / RUN BY / DATE'),
+        ]
+        lines += [_line(text, 'DESCRIPTION')
+                  for text in options['description']]
+        if epochs:
+            lines += [
+                _line(_epoch(epochs[0]), 'EPOCH OF FIRST MAP'),
+                _line(_epoch(epochs[-1]), 'EPOCH OF LAST MAP'),
+            ]
+        lines += [
+            _line('{:6d}'.format(interval), 'INTERVAL'),
+            _line('{:6d}'.format(len(epochs)), '# OF MAPS IN FILE'),
+            _line('  {:4}'.format(options['mapping_function']),
+                  'MAPPING FUNCTION'),
+            _line('{:8.1f}'.format(options['elevation_cutoff']),
+                  'ELEVATION CUTOFF'),
+            _line(options['observables_used'], 'OBSERVABLES USED'),
+            _line('{:8.1f}'.format(options['base_radius']), 'BASE RADIUS'),
+            _line('{:6d}'.format(self.dimension), 'MAP DIMENSION'),
+            _line(_grid_def(self._height_def()), 'HGT1 / HGT2 / DHGT'),
+            _line(_grid_def(self.grid.latitude), 'LAT1 / LAT2 / DLAT'),
+            _line(_grid_def(self.grid.longitude), 'LON1 / LON2 / DLON'),
+            _line('{:6d}'.format(self.exponent), 'EXPONENT'),
+        ]
+        lines += [_line(text, 'COMMENT') for text in options['comment']]
+        lines.append(_line('', 'END OF HEADER'))
+        return ''.join(lines)
+
+    def _height_def(self):
+        if self.dimension == 3:
+            return self.height
+        return self.height, self.height, 0.
+
+    def _write(self, data):
+        if self._binary:
+            self._file.write(data)
+        else:
+            self._file.write(data.decode('ascii'))
+
+    def _block(self, kind, number, epoch, values):
+        start = _line('{:6d}'.format(number), 'START OF {} MAP'.format(kind))
+        epoch = _line(_epoch(epoch), 'EPOCH OF CURRENT MAP')
+        end = _line('{:6d}'.format(number), 'END OF {} MAP'.format(kind))
+        return b''.join([
+            (start + epoch).encode('ascii'),
+            self._layout.format(values),
+            end.encode('ascii'),
+        ])
+
+    def write_map(self, tec, rms=None):
+        """Записать очередную карту.
+
+        :param tec: целые значения ПЭС (широта, долгота) или в порядке
+            следования в файле.
+
+        :param rms: значения RMS в том же виде или ``None``.
+        """
+        np = require_numpy('ionex.writer')
+
+        if self._number >= len(self.epochs):
+            raise IONEXError('More maps than epochs in the header.')
+        number = self._number + 1
+        epoch = self.epochs[number - 1]
+
+        tec = np.asarray(tec)
+        rms = None if rms is None else np.asarray(rms)
+        for values in (tec, rms):
+            if values is not None and \
+                    values.size != self.grid.size * len(self.heights):
+                raise IONEXError('The grid definition does not match '
+                                 'the map; epoch {}.'.format(epoch))
+
+        self._write(self._block('TEC', number, epoch, tec))
+        if rms is not None:
+            self._rms.append(self._block('RMS', number, epoch, rms))
+        self._number = number
+
+    def close(self):
+        """Записать карты RMS и конец файла; закрыть файл, если он был
+        открыт по пути."""
+        if self._file is None:
+            return
+        try:
+            if self._number != len(self.epochs):
+                raise IONEXError(
+                    'Expected {} maps, written {}.'.format(
+                        len(self.epochs), self._number,
+                    )
+                )
+            self._write(b''.join(self._rms))
+            self._write(_line('', 'END OF FILE').encode('ascii'))
+        finally:
+            self._rms = []
+            if self._close:
+                self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        elif self._close:
+            self._file.close()
+
+
+def to_raw(values, exponent, none_value=IonexV1.none_value):
+    """Перевести значения в TECU в целые числа файла IONEX.
+
+    :param values: значения, ``nan`` -- отсутствующие.
+
+    :return: ``numpy.ndarray`` (``int64``), ``none_value`` вместо ``nan``.
+    """
+    np = require_numpy('ionex.writer')
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    raw = np.rint(np.where(missing, 0., values) / 10.0 ** exponent)
+    raw = raw.astype(np.int64)
+    raw[missing] = none_value
+    return raw
+
+
+def writer(file, maps, **kwargs):
+    """Записать карты ``IonexMap`` в файл IONEX 1.0.
+
+    Все карты должны иметь одну сетку и степень; значения записываются без
+    пересчёта (``IonexMap.raw_tec``), карты RMS -- если они есть.
+
+    :param file: путь к файлу или объект файла.
+
+    :param maps: карты ``IonexMap``, например, читалка ``ionex.reader``.
+
+    :param kwargs: записи заголовка, см. ``IonexWriterV1``.
+
+    :raises IONEXError: если нет ни одной карты или сетка либо степень
+        карт не совпадают.
+    """
+    maps = list(maps)
+    if not maps:
+        raise IONEXError('No maps to write.')
+
+    first = maps[0]
+    for ionex_map in maps:
+        if ionex_map.grid != first.grid:
+            raise IONEXError('Grid mismatch: {}'.format(ionex_map.epoch))
+        if ionex_map.exponent != first.exponent:
+            raise IONEXError(
+                'Exponent mismatch: {}'.format(ionex_map.epoch)
+            )
+
+    if first.dimension == 3:
+        kwargs.setdefault('height', tuple(first.height))
+    elif first.heights[0] is not None:
+        kwargs.setdefault('height', first.heights[0])
+
+    with IonexWriterV1(
+        file,
+        grid=first.grid,
+        epochs=[m.epoch for m in maps],
+        exponent=first.exponent,
+        **kwargs
+    ) as ionex_writer:
+        for ionex_map in maps:
+            ionex_writer.write_map(ionex_map.raw_tec, ionex_map.raw_rms)
+
+
+def write_arrays(file, epochs, tec, grid, *, rms=None, exponent=-1,
+                 **kwargs):
+    """Записать массивы значений ПЭС в файл IONEX 1.0.
+
+    :param file: путь к файлу или объект файла.
+
+    :param epochs: эпохи карт.
+
+    :param tec: массив (время, широта, долгота) в TECU, ``nan`` --
+        отсутствующие значения; для трёхмерных карт -- (время, высота,
+        широта, долгота) и ``height=(hgt1, hgt2, dhgt)``.
+
+    :param grid: ``MapGrid`` или (latitude, longitude).
+
+    :param rms: массив RMS той же формы или ``None``.
+
+    :param exponent: ``int``, значение 'EXPONENT'; значения округляются до
+        ``10 ** exponent`` TECU.
+
+    :param kwargs: записи заголовка, см. ``IonexWriterV1``.
+    """
+    np = require_numpy('ionex.writer')
+
+    # datetime64 (например, ionex.load_many) приводятся к datetime
+    epochs = np.asarray(epochs, dtype='datetime64[s]').tolist()
+    if len(tec) != len(epochs):
+        raise IONEXError('Number of maps does not match epochs.')
+
+    with IonexWriterV1(
+        file, grid=grid, epochs=epochs, exponent=exponent, **kwargs
+    ) as ionex_writer:
+        for i in range(len(epochs)):
+            ionex_writer.write_map(
+                to_raw(tec[i], exponent),
+                None if rms is None else to_raw(rms[i], exponent),
+            )
@@ -0,0 +1,301 @@
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from ._compat import require_numpy
+from .catalog import _on_disk, read_header
+from .exceptions import IONEXError
+from .ionex_index import IndexedIonexV1
+from .ionex_map import MapGrid
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # pragma: no cover
+    # Python < 3.8: массивы передаются обычным образом
+    resource_tracker = shared_memory = None
+
+FileMaps = namedtuple(
+    'FileMaps', ['path', 'grid', 'exponent', 'epochs', 'tec', 'rms'],
+)
+
+# описание массива в разделяемой памяти: имя блока, форма, тип
+_Shared = namedtuple('_Shared', ['name', 'shape', 'dtype'])
+
+
+def _share(array):
+    """Скопировать массив в новый блок разделяемой памяти."""
+    if array is None or shared_memory is None:
+        return array
+
+    np = require_numpy('ionex.parallel_reader')
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    try:
+        np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+    finally:
+        shm.close()
+    # блок освобождает процесс, который его прочитает (см. _release);
+    # иначе при завершении исполнителя блок будет удалён
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    return _Shared(shm.name, array.shape, array.dtype.str)
+
+
+def _attach(value):
+    """Подключить массив из разделяемой памяти без копирования.
+
+    :return: (массив, блок); массив -- представление блока, его нужно
+        удалить до ``_release(блок)``. Для обычного массива блок --
+        ``None``.
+    """
+    if not isinstance(value, _Shared):
+        return value, None
+
+    np = require_numpy('ionex.parallel_reader')
+    shm = shared_memory.SharedMemory(name=value.name)
+    return np.ndarray(value.shape, value.dtype, buffer=shm.buf), shm
+
+
+def _release(shm):
+    """Освободить блок разделяемой памяти."""
+    if shm is None:
+        return
+    try:
+        shm.close()
+    finally:
+        shm.unlink()
+
+
+def _discard(value):
+    """Освободить блок массива, не читая его; блок мог быть уже
+    освобождён."""
+    if not isinstance(value, _Shared):
+        return
+    try:
+        shm = shared_memory.SharedMemory(name=value.name)
+    except FileNotFoundError:
+        return
+    _release(shm)
+
+
+def _discard_chunks(chunks):
+    for chunk in chunks:
+        _discard(chunk.tec)
+        _discard(chunk.rms)
+
+
+def _read_chunk(path, start, stop, rms):
+    # импорт здесь: ionex/__init__.py импортирует этот модуль
+    from . import reader
+
+    np = require_numpy('ionex.parallel_reader')
+
+    if start is None:
+        inx = reader(path, array=True, rms=rms)
+        maps = iter(inx)
+    else:
+        inx = IndexedIonexV1(path, array=True, rms=rms)
+        maps = inx[start:stop]
+
+    epochs, tec, rms_data = [], [], []
+    for ionex_map in maps:
+        epochs.append(ionex_map.epoch)
+        tec.append(ionex_map.raw_tec.reshape(ionex_map.shape))
+        if not rms:
+            continue
+        if ionex_map.raw_rms is None:
+            raise IONEXError(
+                'No RMS map for {}: {}'.format(ionex_map.epoch, path)
+            )
+        rms_data.append(ionex_map.raw_rms.reshape(ionex_map.shape))
+
+    if start is not None:
+        inx.close()
+
+    return FileMaps(
+        path=path,
+        grid=MapGrid(inx.latitude, inx.longitude),
+        exponent=inx.exponent,
+        epochs=epochs,
+        tec=_share(np.stack(tec)) if tec else None,
+        rms=_share(np.stack(rms_data)) if rms_data else None,
+    )
+
+
+def _tasks(paths, split_maps):
+    """Вернуть задания (индекс файла, путь, первая карта, последняя + 1).
+
+    Число карт берётся из заголовка ('# OF MAPS IN FILE'), файл не
+    индексируется; последняя часть читается до конца файла, даже если
+    число в заголовке неверно. Без этой записи, а также сжатые файлы (для
+    частей нужен произвольный доступ) читаются целиком.
+    """
+    for n, path in enumerate(paths):
+        size = None
+        if split_maps is not None and _on_disk(path):
+            size = read_header(path).maps_count
+        if not size:
+            yield n, path, None, None
+            continue
+
+        for start in range(0, size, split_maps):
+            stop = start + split_maps
+            yield n, path, start, stop if stop < size else None
+
+
+def _gather(chunks, name):
+    """Скопировать массивы ``name`` частей файла из разделяемой памяти в
+    один массив и освободить блоки."""
+    np = require_numpy('ionex.parallel_reader')
+
+    values = [getattr(c, name) for c in chunks]
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+
+    size = sum(value.shape[0] for value in values)
+    # в частях могут быть разные типы, см. int_array
+    result = np.empty(
+        (size, ) + tuple(values[0].shape[1:]),
+        dtype=np.result_type(*[value.dtype for value in values]),
+    )
+    i = 0
+    for value in values:
+        array, shm = _attach(value)
+        try:
+            result[i:i + len(array)] = array
+            i += len(array)
+        finally:
+            del array
+            _release(shm)
+    return result
+
+
+def _merge(chunks):
+    first = chunks[0]
+    return FileMaps(
+        path=first.path,
+        grid=first.grid,
+        exponent=first.exponent,
+        epochs=[epoch for chunk in chunks for epoch in chunk.epochs],
+        tec=_gather(chunks, 'tec'),
+        rms=_gather(chunks, 'rms'),
+    )
+
+
+def parallel_reader(paths, *,
+                    rms=False,
+                    max_workers=None,
+                    max_in_flight=None,
+                    split_maps=None,
+                    executor=None):
+    """Читать файлы IONEX параллельно и выдавать результаты в порядке
+    следования файлов.
+
+    Файлы (или части файлов по ``split_maps`` карт) разбираются в процессах
+    ``ProcessPoolExecutor``; значения карт передаются обратно через
+    разделяемую память (``multiprocessing.shared_memory``), а не
+    сериализуются списками. Одновременно выполняется не более
+    ``max_in_flight`` заданий, поэтому расход памяти не зависит от числа
+    файлов.
+
+    :param paths: пути к файлам IONEX, любой итерируемый объект.
+
+    :param rms: ``bool``, также читать карты RMS.
+
+    :param max_workers: число процессов, см. ``ProcessPoolExecutor``.
+
+    :param max_in_flight: ``int``, наибольшее число заданий в работе; по
+        умолчанию -- удвоенное число процессов.
+
+    :param split_maps: ``int``, делить файлы на части по ``split_maps``
+        карт; число карт берётся из заголовка файла ('# OF MAPS IN FILE'),
+        части читаются по индексу карт (``IndexedIonexV1``). Сжатые файлы
+        не делятся.
+
+    :param executor: ``concurrent.futures.Executor``, в котором выполнять
+        задания; если задан, ``max_workers`` не используется.
+
+    :return: генератор ``namedtuple``, FileMaps('FileMaps', ['path', 'grid',
+        'exponent', 'epochs', 'tec', 'rms']): ``grid`` -- (latitude,
+        longitude), ``epochs`` -- список эпох, ``tec`` (и ``rms``) --
+        ``numpy.ndarray`` (карта, широта, долгота) значений без учёта
+        степени или ``None``, если в файле нет карт.
+    """
+    require_numpy('ionex.parallel_reader')
+
+    if split_maps is not None and split_maps < 1:
+        raise ValueError('split_maps must be positive')
+
+    files = _file_chunks(paths, rms=rms, max_workers=max_workers,
+                         max_in_flight=max_in_flight, split_maps=split_maps,
+                         executor=executor)
+    try:
+        for chunks in files:
+            # массивы копируются из разделяемой памяти один раз
+            try:
+                result = _merge(chunks)
+            except BaseException:
+                _discard_chunks(chunks)
+                raise
+            yield result
+    finally:
+        files.close()
+
+
+def _file_chunks(paths, *, rms=False, max_workers=None, max_in_flight=None,
+                 split_maps=None, executor=None):
+    """Выполнить задания ``parallel_reader`` и выдавать для каждого файла
+    список его частей ``FileMaps``, не копируя массивы.
+
+    ``tec`` и ``rms`` частей -- описания блоков разделяемой памяти
+    (``_Shared``) или массивы, если разделяемая память недоступна.
+    Получатель подключает их (``_attach``) и отвечает за освобождение
+    блоков (``_release``, ``_discard_chunks``); блоки ещё не выданных
+    частей освобождаются здесь.
+    """
+    if max_in_flight is None:
+        max_in_flight = 2 * (max_workers or os.cpu_count() or 1)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    tasks = _tasks(paths, split_maps)
+    in_flight = deque()
+    chunks, current = [], None
+    try:
+        while True:
+            for n, path, start, stop in tasks:
+                in_flight.append((n, executor.submit(
+                    _read_chunk, path, start, stop, rms,
+                )))
+                if len(in_flight) >= max_in_flight:
+                    break
+
+            if not in_flight:
+                break
+
+            n, future = in_flight.popleft()
+            chunk = future.result()
+            if current is not None and n != current:
+                ready, chunks = chunks, [chunk]
+                current = n
+                yield ready
+                continue
+            current = n
+            chunks.append(chunk)
+
+        if chunks:
+            ready, chunks = chunks, []
+            yield ready
+    finally:
+        # генератор закрыт раньше времени или задание завершилось ошибкой:
+        # освобождаем разделяемую память оставшихся заданий
+        _discard_chunks(chunks)
+        for _, future in in_flight:
+            future.cancel()
+        for _, future in in_flight:
+            if future.cancelled() or future.exception() is not None:
+                continue
+            _discard_chunks([future.result()])
+        if own_executor:
+            executor.shutdown()
@@ -0,0 +1,501 @@
+"""Многоуровневые обзоры карт ПЭС за длительные периоды.
+
+``build_pyramid`` один раз просматривает карты (например, файлы IONEX за
+год) и сохраняет в каталог агрегаты карт по интервалам времени (час,
+сутки) -- среднее, минимум и максимум в каждом узле -- на исходной сетке и
+на сетках, укрупнённых в ``factor`` раз по широте и долготе. ``nan``
+(отсутствующие значения) не учитываются.
+
+Структура каталога::
+
+    pyramid.json                    описание уровней
+    <period>_epochs.npy             начала интервалов, datetime64[s]
+    <period>_<factor>_<stat>.npy    значения (интервал, широта, долгота),
+                                    float32, nan -- нет данных
+
+``load_pyramid`` открывает каталог; ``Pyramid.query`` выбирает самый
+грубый уровень, подходящий под запрошенное разрешение, и возвращает
+значения, отображённые в память::
+
+    ionex.build_pyramid(sorted(glob('igsg*.*i')), 'pyramid')
+    pyramid = ionex.load_pyramid('pyramid')
+    overview = pyramid.query(
+        datetime(2020, 1, 1), datetime(2021, 1, 1),
+        time_resolution=timedelta(days=1), spatial_resolution=10.,
+    )
+    overview.values.shape
+"""
+import json
+import os
+import shutil
+from collections import namedtuple
+from datetime import datetime, timedelta
+from itertools import chain
+
+from ._compat import require_numpy
+from .exceptions import IONEXError
+from .ionex_map import MapGrid
+
+MANIFEST = 'pyramid.json'
+VERSION = 1
+
+# интервалы агрегации: название -> единица numpy.datetime64
+PERIODS = {'hour': 'h', 'day': 'D'}
+PERIOD_LENGTH = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+STATISTICS = ('mean', 'min', 'max')
+
+DTYPE = '<f4'
+
+PyramidLevel = namedtuple('PyramidLevel', ['period', 'factor', 'grid'])
+Overview = namedtuple(
+    'Overview', ['epochs', 'values', 'grid', 'period', 'factor'],
+)
+
+
+def _columns(grid):
+    """Вернуть число различных столбцов сетки: у глобальной сетки
+    последний столбец (180 градусов) может повторять первый (-180), см.
+    ``MapGrid.period``."""
+    if grid.period is not None:
+        return grid.period
+    return grid.shape[1]
+
+
+def coarse_grid(grid, factor):
+    """Вернуть сетку, укрупнённую в ``factor`` раз: узел укрупнённой сетки
+    -- центр блока ``factor`` x ``factor`` узлов ``grid``. Последний блок
+    по широте (долготе) может быть неполным. Повторяющийся столбец
+    глобальной сетки не образует отдельного блока."""
+    if factor == 1:
+        return grid
+
+    def axis(grid_def, size):
+        start, _, step = grid_def
+        start += step * (factor - 1) / 2.
+        step *= factor
+        cells = -(-size // factor)
+        return start, start + step * (cells - 1), step
+
+    return MapGrid(
+        axis(grid.latitude, grid.shape[0]),
+        axis(grid.longitude, _columns(grid)),
+    )
+
+
+def _blocks(values, factor, fill):
+    """Вернуть массив блоков (широта, f, долгота, f), дополнив ``values``
+    значением ``fill`` до размера, кратного ``factor``."""
+    np = require_numpy('ionex.build_pyramid')
+    n_lat, n_lon = values.shape
+    rows, columns = -(-n_lat // factor), -(-n_lon // factor)
+    padded = np.full((rows * factor, columns * factor), fill,
+                     dtype=values.dtype)
+    padded[:n_lat, :n_lon] = values
+    return padded.reshape(rows, factor, columns, factor)
+
+
+class _Accumulator:
+    """Сумма, число значений, минимум и максимум карт одного интервала."""
+
+    def __init__(self, shape, columns):
+        """
+        :param columns: число столбцов, участвующих в укрупнении (без
+            повторяющегося столбца глобальной сетки).
+        """
+        np = require_numpy('ionex.build_pyramid')
+        self.key = None
+        self.columns = columns
+        self.sum = np.zeros(shape)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.min = np.full(shape, np.nan)
+        self.max = np.full(shape, np.nan)
+
+    def add(self, values):
+        np = require_numpy('ionex.build_pyramid')
+        valid = ~np.isnan(values)
+        self.sum += np.where(valid, values, 0.)
+        self.count += valid
+        np.fmin(self.min, values, out=self.min)
+        np.fmax(self.max, values, out=self.max)
+
+    def reset(self, key):
+        self.key = key
+        self.sum[...] = 0.
+        self.count[...] = 0
+        self.min[...] = float('nan')
+        self.max[...] = float('nan')
+
+    def statistics(self, factor):
+        """Вернуть среднее, минимум и максимум на сетке, укрупнённой в
+        ``factor`` раз."""
+        np = require_numpy('ionex.build_pyramid')
+        total, count = self.sum, self.count
+        minimum, maximum = self.min, self.max
+        if factor > 1:
+            columns = slice(None, self.columns)
+            total, count = total[:, columns], count[:, columns]
+            minimum, maximum = minimum[:, columns], maximum[:, columns]
+            total = _blocks(total, factor, 0.).sum(axis=(1, 3))
+            count = _blocks(count, factor, 0).sum(axis=(1, 3))
+            minimum = np.fmin.reduce(
+                np.fmin.reduce(_blocks(minimum, factor, np.nan), axis=3),
+                axis=1,
+            )
+            maximum = np.fmax.reduce(
+                np.fmax.reduce(_blocks(maximum, factor, np.nan), axis=3),
+                axis=1,
+            )
+        mean = np.full(total.shape, np.nan)
+        np.divide(total, count, out=mean, where=count > 0)
+        return {'mean': mean, 'min': minimum, 'max': maximum}
+
+
+class _NpyWriter:
+    """Файл ``.npy``, в который массив дописывается по частям; заголовок
+    с формой массива записывается в ``close``."""
+
+    def __init__(self, path):
+        self.path = path
+        self.size = 0
+        self._part = open(path + '.part', 'wb')
+
+    def append(self, values):
+        np = require_numpy('ionex.build_pyramid')
+        self._part.write(np.ascontiguousarray(values, dtype=DTYPE).tobytes())
+        self.size += 1
+
+    def close(self, shape):
+        np = require_numpy('ionex.build_pyramid')
+        self._part.close()
+        header = {
+            'descr': np.lib.format.dtype_to_descr(np.dtype(DTYPE)),
+            'fortran_order': False,
+            'shape': (self.size, ) + tuple(shape),
+        }
+        with open(self.path, 'wb') as file_object:
+            np.lib.format.write_array_header_1_0(file_object, header)
+            with open(self.path + '.part', 'rb') as part:
+                shutil.copyfileobj(part, file_object)
+        os.remove(self.path + '.part')
+
+    def discard(self):
+        self._part.close()
+        os.remove(self.path + '.part')
+
+
+def _sorted_files(paths):
+    """Упорядочить файлы IONEX по эпохе первой карты из заголовка."""
+    # импорт здесь: ionex/__init__.py импортирует этот модуль
+    from .catalog import read_header
+
+    def first_epoch(path):
+        epoch = read_header(path).first_epoch
+        return (epoch is None, epoch or datetime.min)
+
+    return sorted(paths, key=first_epoch)
+
+
+def _maps(source):
+    """Вернуть итерируемый объект карт для ``build_pyramid``."""
+    if isinstance(source, str):
+        source = [source]
+    if isinstance(source, (list, tuple)) and source and \
+            all(isinstance(item, str) for item in source):
+        from . import reader
+        return chain.from_iterable(
+            reader(path, array=True, rms=False)
+            for path in _sorted_files(source)
+        )
+    return source
+
+
+def _check_options(periods, factors):
+    for period in periods:
+        if period not in PERIODS:
+            raise ValueError('Unknown period: {}'.format(period))
+    for factor in factors:
+        if not isinstance(factor, int) or factor < 1:
+            raise ValueError('Invalid factor: {}'.format(factor))
+    if not periods or not factors:
+        raise ValueError('At least one period and one factor are required.')
+
+
+def build_pyramid(source, path, *, periods=('hour', 'day'),
+                  factors=(1, 2, 4)):
+    """Построить обзоры карт ПЭС и сохранить их в каталог ``path``.
+
+    Карты просматриваются один раз; в памяти хранятся только агрегаты
+    текущего интервала каждого периода.
+
+    :param source: путь к файлу IONEX, список путей (файлы
+        упорядочиваются по эпохе первой карты из заголовка) или
+        итерируемый объект двумерных карт ``IonexMap`` с одинаковой сеткой
+        в порядке эпох. Карты с эпохой, равной эпохе предыдущей карты
+        (карта на полночь в смежных суточных файлах), пропускаются.
+
+    :param path: каталог; создаётся, если его нет, файлы обзоров
+        перезаписываются.
+
+    :param periods: интервалы агрегации по времени, ``'hour'`` и/или
+        ``'day'``.
+
+    :param factors: во сколько раз укрупнить сетку; ``1`` -- исходная
+        сетка.
+
+    :raises ValueError: если период или множитель неизвестны.
+
+    :raises IONEXError: если нет ни одной карты, сетка карт не совпадает,
+        карты не упорядочены по эпохе или карта трёхмерная.
+    """
+    np = require_numpy('ionex.build_pyramid')
+    periods, factors = tuple(periods), tuple(factors)
+    _check_options(periods, factors)
+    os.makedirs(path, exist_ok=True)
+
+    grid = None
+    accumulators = {}
+    epochs = {period: [] for period in periods}
+    writers = {}
+    last_epoch = None
+    maps = 0
+
+    def flush(period):
+        accumulator = accumulators[period]
+        if accumulator.key is None:
+            return
+        epochs[period].append(accumulator.key)
+        for factor in factors:
+            values = accumulator.statistics(factor)
+            for stat in STATISTICS:
+                writers[period, factor, stat].append(values[stat])
+
+    try:
+        for ionex_map in _maps(source):
+            if ionex_map.dimension == 3:
+                raise IONEXError(
+                    '3-D maps are not supported: {}'.format(ionex_map.epoch)
+                )
+            epoch = ionex_map.epoch
+            if grid is None:
+                grid = ionex_map.grid
+                for period in periods:
+                    accumulators[period] = _Accumulator(
+                        grid.shape, _columns(grid),
+                    )
+                    for factor in factors:
+                        for stat in STATISTICS:
+                            writers[period, factor, stat] = _NpyWriter(
+                                os.path.join(path, '{}_{}_{}.npy'.format(
+                                    period, factor, stat,
+                                ))
+                            )
+            elif ionex_map.grid != grid:
+                raise IONEXError('Grid mismatch: {}'.format(epoch))
+
+            if last_epoch is not None:
+                if epoch == last_epoch:
+                    continue
+                if epoch < last_epoch:
+                    raise IONEXError(
+                        'Maps are not in time order: {}'.format(epoch)
+                    )
+            last_epoch = epoch
+            maps += 1
+
+            values = ionex_map.tec_array
+            for period in periods:
+                key = np.datetime64(epoch, PERIODS[period])
+                accumulator = accumulators[period]
+                if key != accumulator.key:
+                    flush(period)
+                    accumulator.reset(key)
+                accumulator.add(values)
+
+        if grid is None:
+            raise IONEXError('No maps to build a pyramid.')
+        for period in periods:
+            flush(period)
+    except BaseException:
+        for writer in writers.values():
+            writer.discard()
+        raise
+
+    levels = []
+    for period in periods:
+        epochs_file = '{}_epochs.npy'.format(period)
+        np.save(
+            os.path.join(path, epochs_file),
+            np.array(epochs[period], dtype='datetime64[s]'),
+        )
+        for factor in factors:
+            level_grid = coarse_grid(grid, factor)
+            level = {
+                'period': period,
+                'factor': factor,
+                'latitude': list(level_grid.latitude),
+                'longitude': list(level_grid.longitude),
+                'epochs': epochs_file,
+            }
+            for stat in STATISTICS:
+                writer = writers[period, factor, stat]
+                writer.close(level_grid.shape)
+                level[stat] = os.path.basename(writer.path)
+            levels.append(level)
+
+    manifest = {
+        'version': VERSION,
+        'latitude': list(grid.latitude),
+        'longitude': list(grid.longitude),
+        'maps': maps,
+        'levels': levels,
+    }
+    with open(os.path.join(path, MANIFEST), 'w') as file_object:
+        json.dump(manifest, file_object, indent=1)
+
+
+class Pyramid:
+    """Обзоры карт ПЭС, построенные ``build_pyramid``.
+
+    Массивы уровней отображаются в память при первом обращении, поэтому
+    запрос за длительный период читает с диска только выбранный уровень и
+    интервалы в пределах запроса.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: каталог обзоров.
+
+        :raises IONEXError: если в каталоге нет описания обзоров или
+            неизвестна версия формата.
+        """
+        require_numpy('ionex.load_pyramid')
+        try:
+            with open(os.path.join(path, MANIFEST)) as file_object:
+                manifest = json.load(file_object)
+        except (OSError, ValueError) as err:
+            raise IONEXError('Not a pyramid: {}: {}'.format(path, err))
+        if manifest.get('version') != VERSION:
+            raise IONEXError(
+                'Unsupported pyramid version: '
+                '{}'.format(manifest.get('version'))
+            )
+
+        self.path = path
+        self.grid = MapGrid(manifest['latitude'], manifest['longitude'])
+        self._levels = {}
+        for level in manifest['levels']:
+            key = PyramidLevel(
+                period=level['period'],
+                factor=level['factor'],
+                grid=MapGrid(level['latitude'], level['longitude']),
+            )
+            self._levels[key] = level
+        self._arrays = {}
+
+    @property
+    def levels(self):
+        """Вернуть список уровней ``PyramidLevel(period, factor, grid)``."""
+        return list(self._levels)
+
+    def _load(self, name):
+        np = require_numpy('ionex.load_pyramid')
+        if name not in self._arrays:
+            self._arrays[name] = np.load(
+                os.path.join(self.path, name), mmap_mode='r',
+            )
+        return self._arrays[name]
+
+    def epochs(self, level):
+        """Вернуть начала интервалов уровня ``level``, ``datetime64[s]``."""
+        return self._load(self._levels[level]['epochs'])
+
+    def select(self, time_resolution=None, spatial_resolution=None):
+        """Выбрать самый грубый уровень, разрешение которого не хуже
+        запрошенного.
+
+        :param time_resolution: ``timedelta``, наибольший допустимый
+            интервал агрегации; ``None`` -- любой.
+
+        :param spatial_resolution: ``float``, наибольший допустимый шаг
+            сетки по широте и долготе, градусы; ``None`` -- любой.
+
+        :return: ``PyramidLevel``.
+
+        :raises ValueError: если подходящего уровня нет.
+        """
+        suitable = [
+            level for level in self._levels
+            if (time_resolution is None or
+                PERIOD_LENGTH[level.period] <= time_resolution) and
+            (spatial_resolution is None or
+             max(abs(level.grid.latitude.dlat),
+                 abs(level.grid.longitude.dlon)) <= spatial_resolution)
+        ]
+        if not suitable:
+            raise ValueError(
+                'No pyramid level with time resolution {} and spatial '
+                'resolution {}'.format(time_resolution, spatial_resolution)
+            )
+        return max(suitable, key=lambda level: (
+            PERIOD_LENGTH[level.period], level.factor,
+        ))
+
+    def query(self, start=None, end=None, *, time_resolution=None,
+              spatial_resolution=None, statistic='mean'):
+        """Вернуть обзор за период от ``start`` до ``end`` с самого грубого
+        подходящего уровня (см. ``select``).
+
+        :param start: ``datetime``, начало периода; интервалы, начавшиеся
+            раньше, не возвращаются.
+
+        :param end: ``datetime``, конец периода (включительно).
+
+        :param statistic: ``'mean'``, ``'min'`` или ``'max'``.
+
+        :return: ``namedtuple``, Overview('Overview', ['epochs', 'values',
+            'grid', 'period', 'factor']): ``epochs`` -- начала интервалов
+            (``datetime64[s]``), ``values`` -- ``numpy.ndarray`` (интервал,
+            широта, долгота), отображённый в память, ``grid`` --
+            ``MapGrid`` уровня.
+
+        :raises ValueError: если подходящего уровня нет или ``statistic``
+            неизвестна.
+        """
+        np = require_numpy('ionex.load_pyramid')
+        if statistic not in STATISTICS:
+            raise ValueError('Unknown statistic: {}'.format(statistic))
+        level = self.select(time_resolution, spatial_resolution)
+
+        epochs = self.epochs(level)
+        first, last = 0, len(epochs)
+        if start is not None:
+            first = np.searchsorted(
+                epochs, np.datetime64(start, 's'), side='left',
+            )
+        if end is not None:
+            last = np.searchsorted(
+                epochs, np.datetime64(end, 's'), side='right',
+            )
+        values = self._load(self._levels[level][statistic])
+        return Overview(
+            epochs=epochs[first:last],
+            values=values[first:last],
+            grid=level.grid,
+            period=level.period,
+            factor=level.factor,
+        )
+
+    def close(self):
+        # отображение освобождается, когда на массивы не останется ссылок
+        self._arrays = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load_pyramid(path):
+    """Открыть каталог обзоров, см. ``Pyramid``."""
+    return Pyramid(path)
@@ -0,0 +1,311 @@
+"""Статистика разбора файлов IONEX.
+
+Включается параметром читалки ``stats``::
+
+    inx = ionex.reader('igsg0010.00i', stats=True)
+    maps = list(inx)
+    print(inx.stats.as_dict())
+
+Если статистика не запрошена, читалка не меняется: методы читалки
+оборачиваются счётчиками только у экземпляра, которому передан ``stats``.
+"""
+from time import perf_counter
+
+from ._compat import numpy
+
+COUNTERS = (
+    'bytes', 'lines', 'maps', 'rms_maps', 'fields', 'missing', 'epochs',
+    'coerced',
+)
+TIMERS = ('total', 'io', 'header', 'epoch', 'decode', 'make_map')
+
+# методы, время которых входит в total, если они есть у читалки:
+# индексирование (IndexedIonexV1), разбор порций (BlockIonexV1,
+# IonexFollower)
+TOTAL_METHODS = (
+    '_scan_cached', '_load', '_next_block', '_parse_maps', '_flush', 'poll',
+)
+
+
+class ParseStats:
+    """Счётчики и время этапов разбора.
+
+    Счётчики:
+
+    - ``bytes``: прочитано байт (распакованных; для текстовых файлов --
+      символов); не считаются для ``random_access=True`` и ``areader``;
+    - ``lines``: прочитано строк последовательной читалкой;
+    - ``maps``, ``rms_maps``: выдано карт ПЭС и связанных с ними карт RMS;
+    - ``fields``: разобрано значений карт (в ленивом режиме значения
+      разбираются картами, без читалки, и не учитываются);
+    - ``missing``: из них отсутствующих (``9999``);
+    - ``epochs``: разобрано эпох;
+    - ``coerced``: полей эпох, записанных не целым числом (см.
+      ``IonexV1._coerce_into_int``).
+
+    Время этапов, с:
+
+    - ``total``: всё время работы читалки (выдача карт, индексирование,
+      обращение по индексу);
+    - ``io``: чтение (и распаковка) данных файла;
+    - ``header``: разбор заголовка;
+    - ``epoch``: разбор эпох;
+    - ``decode``: преобразование значений карт в числа (кроме ленивого
+      режима);
+    - ``make_map``: создание ``IonexMap``;
+    - ``scan`` (вычисляется): остальное время ``total`` -- разбиение на
+      строки, поиск меток, пропуск блоков.
+
+    Один объект можно передать нескольким читалкам: значения суммируются.
+    """
+
+    def __init__(self, callback=None):
+        """
+        :param callback: функция ``callback(stats)``, вызывается, когда
+            итерация по читалке закончена (в том числе при ошибке);
+            не вызывается для ``areader``.
+        """
+        self.callback = callback
+        for name in COUNTERS + TIMERS:
+            setattr(self, name, 0)
+
+    @property
+    def scan(self):
+        other = self.io + self.header + self.epoch + self.decode + \
+            self.make_map
+        return max(self.total - other, 0.)
+
+    def as_dict(self):
+        """Вернуть все значения в виде ``dict``, например, для отправки в
+        систему метрик."""
+        values = {name: getattr(self, name) for name in COUNTERS + TIMERS}
+        values['scan'] = self.scan
+        return values
+
+    def __repr__(self):
+        return 'ParseStats({})'.format(', '.join(
+            '{}={!r}'.format(name, value)
+            for name, value in self.as_dict().items()
+        ))
+
+    def attach(self, inx):
+        """Обернуть методы читалки ``inx`` (только этого экземпляра)."""
+        # вложенные вызовы (например, _next_map -> _load) учитываются в
+        # total один раз
+        depth = [0]
+        for method in TOTAL_METHODS:
+            if hasattr(inx, method):
+                _wrap_total(inx, method, self, depth)
+        _wrap_next_map(inx, self, depth)
+        _wrap_header(inx, self)
+        _wrap_epoch(inx, self)
+        _wrap_coerce(inx, self)
+        _wrap_decode(inx, self)
+        _wrap_make_map(inx, self)
+        if inx._context_manager is not None:
+            inx._context_manager = _CountedLines(inx._context_manager, self)
+        if hasattr(inx, '_read_new'):
+            _wrap_read_new(inx, self)
+
+
+def _wrap_total(inx, method, stats, depth):
+    original = getattr(inx, method)
+
+    def timed(*args, **kwargs):
+        depth[0] += 1
+        start = perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            depth[0] -= 1
+            if not depth[0]:
+                stats.total += perf_counter() - start
+
+    setattr(inx, method, timed)
+
+
+def _wrap_header(inx, stats):
+    original = inx._read_header
+
+    def read_header(file_object):
+        # чтение файла и разбор эпох внутри заголовка -- свои этапы
+        nested = stats.io + stats.epoch
+        start = perf_counter()
+        try:
+            return original(file_object)
+        finally:
+            stats.header += perf_counter() - start - (
+                stats.io + stats.epoch - nested
+            )
+
+    inx._read_header = read_header
+
+
+def _wrap_epoch(inx, stats):
+    original = inx._parse_epoch
+
+    def parse_epoch(line):
+        start = perf_counter()
+        try:
+            return original(line)
+        finally:
+            stats.epoch += perf_counter() - start
+            stats.epochs += 1
+
+    inx._parse_epoch = parse_epoch
+
+    original_many = inx._parse_epochs
+
+    def parse_epochs(lines):
+        # строки, разобранные по одной (parse_epoch), уже учтены
+        nested_time, nested_count = stats.epoch, stats.epochs
+        start = perf_counter()
+        try:
+            return original_many(lines)
+        finally:
+            stats.epoch = nested_time + perf_counter() - start
+            stats.epochs = nested_count + len(lines)
+
+    inx._parse_epochs = parse_epochs
+
+
+def _wrap_coerce(inx, stats):
+    original = inx._coerce_into_int
+
+    def coerce_into_int(value):
+        try:
+            return int(value)
+        except ValueError:
+            stats.coerced += 1
+        return original(value)
+
+    inx._coerce_into_int = coerce_into_int
+
+
+def _count_missing(data, none_value):
+    if numpy is not None and isinstance(data, numpy.ndarray):
+        return int(numpy.count_nonzero(data == none_value))
+    return data.count(none_value)
+
+
+def _wrap_decode(inx, stats):
+    original = inx._decode_rows
+
+    def decode_rows(rows):
+        start = perf_counter()
+        try:
+            data = original(rows)
+        finally:
+            stats.decode += perf_counter() - start
+        stats.fields += len(data)
+        stats.missing += _count_missing(data, inx.none_value)
+        return data
+
+    inx._decode_rows = decode_rows
+
+
+def _wrap_make_map(inx, stats):
+    original = inx._make_map
+
+    def make_map(tec_map, rms_map=None):
+        start = perf_counter()
+        try:
+            return original(tec_map, rms_map)
+        finally:
+            stats.make_map += perf_counter() - start
+            stats.maps += 1
+            stats.rms_maps += rms_map is not None
+
+    inx._make_map = make_map
+
+
+def _wrap_next_map(inx, stats, depth):
+    original = inx._next_map
+
+    def next_map():
+        maps = original()
+        try:
+            while True:
+                depth[0] += 1
+                start = perf_counter()
+                try:
+                    ionex_map = next(maps)
+                except StopIteration:
+                    return
+                finally:
+                    depth[0] -= 1
+                    if not depth[0]:
+                        stats.total += perf_counter() - start
+                yield ionex_map
+        finally:
+            maps.close()
+            if stats.callback is not None:
+                stats.callback(stats)
+
+    inx._next_map = next_map
+
+
+def _wrap_read_new(inx, stats):
+    original = inx._read_new
+
+    def read_new():
+        start = perf_counter()
+        data = original()
+        stats.io += perf_counter() - start
+        stats.bytes += len(data)
+        return data
+
+    inx._read_new = read_new
+
+
+class _CountedStream:
+    """Двоичный поток, считающий прочитанные байты и время чтения."""
+
+    def __init__(self, stream, stats):
+        self._stream = stream
+        self._stats = stats
+
+    def read(self, size=-1):
+        start = perf_counter()
+        data = self._stream.read(size)
+        self._stats.io += perf_counter() - start
+        self._stats.bytes += len(data)
+        return data
+
+    def close(self):
+        self._stream.close()
+
+
+class _CountedLines:
+    """Обёртка источника строк читалки, считающая строки; для потоков
+    ``ByteLines`` также считаются байты и время чтения."""
+
+    def __init__(self, context_manager, stats):
+        self._context_manager = context_manager
+        self._stats = stats
+        self._lines = None
+        stream = getattr(context_manager, '_stream', None)
+        self._count_bytes = stream is None
+        if stream is not None:
+            context_manager._stream = _CountedStream(stream, stats)
+
+    @property
+    def name(self):
+        return getattr(self._lines, 'name', '<Unknown>')
+
+    def __enter__(self):
+        self._lines = iter(self._context_manager.__enter__())
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self._context_manager.__exit__(exc_type, exc_val, exc_tb)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self._lines)
+        self._stats.lines += 1
+        if self._count_bytes:
+            self._stats.bytes += len(line)
+        return line
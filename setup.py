@@ -56,6 +56,9 @@ setup(
     python_requires='>=3',
 
     extras_require={
+        'numpy': [
+            'numpy',
+        ],
         'test': [
             'pytest',
             'coverage',
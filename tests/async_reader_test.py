@@ -0,0 +1,157 @@
+import asyncio
+import bz2
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ionex
+from ionex.blocks import find_label
+from ionex.exceptions import IONEXError, IONEXUnexpectedEnd
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    'test_data',
+)
+
+
+@pytest.fixture
+def ionex_bytes(ionex_file_path):
+    with open(ionex_file_path, 'rb') as file_obj:
+        return file_obj.read()
+
+
+async def _chunks(data, size):
+    for i in range(0, len(data), size):
+        # отдаём управление, как при чтении из сети
+        await asyncio.sleep(0)
+        yield data[i:i + size]
+
+
+def _stream(data):
+    stream = asyncio.StreamReader()
+    stream.feed_data(data)
+    stream.feed_eof()
+    return stream
+
+
+def _read(source, **kwargs):
+    async def read():
+        if isinstance(source, bytes):
+            stream = _stream(source)
+        else:
+            stream = source
+        return [m async for m in ionex.areader(stream, **kwargs)]
+
+    return asyncio.run(read())
+
+
+def _same(maps, expected):
+    assert len(maps) == len(expected)
+    for ionex_map, expected_map in zip(maps, expected):
+        assert ionex_map.epoch == expected_map.epoch
+        assert ionex_map.tec == expected_map.tec
+        assert ionex_map.rms == expected_map.rms
+
+
+def test_find_label():
+    line = b' ' * 60 + b'END OF TEC MAP\n'
+    buffer = b'x' * 10 + b'\n' + line
+    assert find_label(buffer, b'END OF TEC MAP') == len(buffer)
+    # метка не в 61-й колонке
+    assert find_label(b'END OF TEC MAP\n', b'END OF TEC MAP') == -1
+    # строка получена не полностью
+    assert find_label(buffer[:-1], b'END OF TEC MAP') == -1
+
+
+def test_areader_stream_reader(ionex_file_path, ionex_bytes):
+    maps = _read(ionex_bytes)
+    _same(maps, list(ionex.reader(ionex_file_path)))
+    assert len(maps) == 12
+
+
+@pytest.mark.parametrize('size', [61, 1000])
+def test_areader_chunks(ionex_file_path, ionex_bytes, size):
+    maps = _read(_chunks(ionex_bytes, size), rms=False)
+    _same(maps, list(ionex.reader(ionex_file_path, rms=False)))
+
+
+def test_areader_bytes():
+    path = os.path.join(TEST_DATA_DIR, 'one_map.xxi')
+    with open(path, 'rb') as file_obj:
+        data = file_obj.read()
+    _same(_read(_chunks(data, 1)), list(ionex.reader(path)))
+
+
+@pytest.mark.parametrize('compress', [gzip.compress, bz2.compress])
+def test_areader_compressed(ionex_file_path, ionex_bytes, compress):
+    maps = _read(_chunks(compress(ionex_bytes), 100))
+    _same(maps, list(ionex.reader(ionex_file_path)))
+
+
+def test_areader_lzw():
+    path = os.path.join(TEST_DATA_DIR, 'one_map.xxi.Z')
+    with open(path, 'rb') as file_obj:
+        data = file_obj.read()
+    # в файле нет 'END OF FILE'
+    with pytest.warns(UserWarning):
+        maps = _read(data)
+    with pytest.warns(UserWarning):
+        _same(maps, list(ionex.reader(path)))
+
+
+def test_areader_array_executor(ionex_file_path, ionex_bytes):
+    pytest.importorskip('numpy')
+    with ThreadPoolExecutor(2) as executor:
+        maps = _read(ionex_bytes, array=True, executor=executor)
+    expected = list(ionex.reader(ionex_file_path, array=True))
+    for ionex_map, expected_map in zip(maps, expected):
+        assert (ionex_map.raw_tec == expected_map.raw_tec).all()
+
+
+def test_areader_concurrent(ionex_file_path, ionex_bytes):
+    async def read(stream):
+        return [m.epoch async for m in ionex.areader(stream)]
+
+    async def main():
+        return await asyncio.gather(*[
+            read(_chunks(ionex_bytes, 4096)) for _ in range(8)
+        ])
+
+    expected = [m.epoch for m in ionex.reader(ionex_file_path)]
+    assert asyncio.run(main()) == [expected] * 8
+
+
+def test_areader_header(ionex_bytes):
+    async def read():
+        inx = ionex.areader(_stream(ionex_bytes))
+        async for _ in inx:
+            break
+        return inx.header
+
+    header = asyncio.run(read())
+    assert header.maps_count == 12
+    assert header.latitude == (87.5, -87.5, -2.5)
+
+
+def test_areader_no_end_of_file(ionex_bytes):
+    data = ionex_bytes[:ionex_bytes.rindex(b'END OF FILE')]
+    data = data[:data.rindex(b'\n') + 1]
+    with pytest.warns(UserWarning):
+        assert len(_read(data)) == 12
+
+
+def test_areader_errors(ionex_bytes):
+    with pytest.raises(IONEXUnexpectedEnd):
+        _read(b'')
+    with pytest.raises(IONEXUnexpectedEnd):
+        _read(ionex_bytes[:1000])
+    # обрыв посреди карты
+    with pytest.raises(IONEXUnexpectedEnd):
+        _read(ionex_bytes[:len(ionex_bytes) // 2])
+    with pytest.raises(IONEXError):
+        _read(ionex_bytes.replace(b'IONOSPHERE MAPS', b'OBSERVATION DATA', 1)
+              .replace(b'     1.0            I', b'     1.0            O', 1))
+    with pytest.raises(TypeError):
+        iter(ionex.areader(_chunks(ionex_bytes, 1000)))
@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import ionex
+
+pytest.importorskip('numpy')
+
+BENCHMARKS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+    'benchmarks',
+)
+RUN = os.path.join(BENCHMARKS, 'run.py')
+
+
+def _run(*args):
+    return subprocess.run(
+        [sys.executable, RUN, '--quick'] + list(args),
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+
+
+def test_benchmarks_smoke(tmp_path):
+    output = str(tmp_path / 'results.json')
+    data_dir = str(tmp_path / 'data')
+
+    process = _run('--output', output, '--data-dir', data_dir)
+    assert process.returncode == 0, process.stderr.decode()
+
+    with open(output) as file_object:
+        report = json.load(file_object)
+    # в текущей версии есть всё, что нужно измерениям
+    assert report['skipped'] == []
+    names = {result['name'] for result in report['results']}
+    assert {'reader', 'read_slice', 'parse_epoch',
+            'map_init', 'map_tec'} <= names
+    for result in report['results']:
+        assert result['seconds'] > 0
+        if result['name'] == 'reader':
+            assert result['maps_per_s'] > 0
+            assert result['mb_per_s'] > 0
+            assert result['peak_bytes'] > 0
+
+    # синтетический файл читается и содержит отсутствующие значения
+    path, = [os.path.join(data_dir, name) for name in os.listdir(data_dir)]
+    maps = list(ionex.reader(path, rms=True))
+    assert len(maps) == 3
+    assert None in maps[0].tec
+    assert maps[0].rms is not None
+
+    # сравнение с самим собой; порог велик, чтобы не зависеть от шума
+    process = _run('--output', str(tmp_path / 'again.json'),
+                   '--compare', output, '--threshold', '100')
+    assert process.returncode == 0, process.stderr.decode()
+    assert b'x' in process.stdout
+
+
+def test_benchmarks_skip_missing_api(monkeypatch):
+    monkeypatch.syspath_prepend(BENCHMARKS)
+    import run
+    monkeypatch.setattr(run, 'NUMBER', 1)
+    monkeypatch.setattr(run, 'SKIPPED', [])
+    # версия без разбора блоков
+    monkeypatch.delattr(run.IonexV1, '_read_block')
+
+    names = {result['name'] for result in run.bench_parsing(1)}
+    assert 'read_block' not in names and 'parse_epochs' in names
+    assert {'name': 'read_block', 'params': {'lines': 5}} in run.SKIPPED
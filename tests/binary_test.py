@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+
+import ionex
+from ionex.binary import ALIGNMENT, BinaryIonex, dump, load
+from ionex.exceptions import IONEXError
+from ionex.ionex_map import IonexMap
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def binary_path(ionex_file_path, tmp_path):
+    path = str(tmp_path / 'ionex_file.00i.bin')
+    dump(ionex_file_path, path)
+    return path
+
+
+def test_round_trip(ionex_file_path, binary_path):
+    expected = list(ionex.reader(ionex_file_path, rms=True))
+
+    with load(binary_path) as inx:
+        assert len(inx) == len(expected)
+        assert inx.exponent == expected[0].exponent
+        assert inx.epochs == [m.epoch for m in expected]
+        for ionex_map, orig in zip(inx, expected):
+            assert ionex_map.epoch == orig.epoch
+            assert ionex_map.grid is orig.grid
+            assert ionex_map.height == orig.height
+            assert ionex_map.tec == orig.tec
+            assert ionex_map.rms == orig.rms
+
+        assert inx[-1].tec == expected[-1].tec
+        assert [m.tec for m in inx[2:4]] == [m.tec for m in expected[2:4]]
+        assert inx.at_epoch(datetime(2000, 1, 1, 23)).tec == \
+            expected[-1].tec
+        with pytest.raises(KeyError):
+            inx.at_epoch(datetime(2000, 1, 2))
+
+
+def test_dump_float_height(tmp_path):
+    path = str(tmp_path / 'maps.bin')
+    maps = [
+        IonexMap(
+            exponent=-1, epoch=datetime(2000, 1, 1, hour),
+            latitude=(10., 0., -10.), longitude=(0., 10., 10.),
+            height=450., tec=[hour, 2, 3, 9999], none_value=9999,
+        )
+        for hour in range(2)
+    ]
+    dump(maps, path)
+
+    with load(path) as inx:
+        assert inx.height == 450.
+        for ionex_map, orig in zip(inx, maps):
+            assert ionex_map.height == 450.
+            assert ionex_map.heights == (450., )
+            assert ionex_map.tec == orig.tec
+
+
+def test_memmap(binary_path):
+    with load(binary_path) as inx:
+        assert isinstance(inx.tec, np.memmap)
+        assert inx.tec.dtype == np.int16
+        assert inx.tec.shape == (12, 71, 73)
+        assert inx.tec.offset % ALIGNMENT == 0
+        # данные карты -- часть отображения, без копирования
+        assert np.shares_memory(inx[3].raw_tec, inx.tec)
+
+
+def test_dump_maps(ionex_file_path, tmp_path):
+    path = str(tmp_path / 'maps.bin')
+    maps = list(ionex.reader(ionex_file_path))[:3]
+    dump(maps, path, rms=False)
+
+    inx = BinaryIonex(path)
+    assert len(inx) == 3
+    assert inx.rms is None
+    assert inx[0].rms is None
+    assert inx[2].tec == maps[2].tec
+
+
+def test_dump_errors(ionex_file_path, tmp_path):
+    path = str(tmp_path / 'maps.bin')
+    with pytest.raises(IONEXError):
+        dump([], path)
+
+    with pytest.raises(IONEXError):
+        load(ionex_file_path)
@@ -0,0 +1,87 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+import ionex
+from ionex.exceptions import IONEXError
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def next_day_file(tmp_path, ionex_file_path):
+    """Файл следующих суток: все эпохи сдвинуты на один день."""
+    with open(ionex_file_path) as file_object:
+        content = file_object.read()
+    content = content.replace('  2000     1     1', '  2000     1     2')
+    path = tmp_path / 'next_day.00i'
+    path.write_text(content)
+    return str(path)
+
+
+def test_load_many(ionex_file_path, next_day_file):
+    expected = list(ionex.reader(ionex_file_path))
+
+    with ThreadPoolExecutor(2) as executor:
+        stack = ionex.load_many(
+            [next_day_file, ionex_file_path], rms=True, executor=executor,
+        )
+
+    assert stack.tec.shape == (24, 71, 73)
+    assert stack.rms.shape == (24, 71, 73)
+    assert stack.exponent == -1
+    assert stack.epochs[0] == np.datetime64(datetime(2000, 1, 1, 1))
+    assert stack.epochs[-1] == np.datetime64(datetime(2000, 1, 2, 23))
+
+    tec = [np.nan if v is None else v for v in expected[3].tec]
+    np.testing.assert_array_equal(stack.tec[3].ravel(), tec)
+    np.testing.assert_array_equal(stack.tec[3], stack.tec[15])
+
+
+def test_load_many_boundary_map(tmp_path, ionex_file_path):
+    """Первая карта следующего файла совпадает с последней картой
+    предыдущего."""
+    with open(ionex_file_path) as file_object:
+        content = file_object.read()
+
+    def shift(match):
+        # значение часа может быть больше 24, см. IonexV1._parse_epoch
+        return '{}{:6d}'.format(match.group(1), int(match.group(2)) + 22)
+
+    content = re.sub(
+        r'^(  2000     1     1)(......)',
+        shift,
+        content,
+        flags=re.MULTILINE,
+    )
+    path = tmp_path / 'shifted.00i'
+    path.write_text(content)
+
+    stack = ionex.load_many([str(path), ionex_file_path], max_workers=2)
+    assert stack.tec.shape == (23, 71, 73)
+    assert stack.epochs[11] == np.datetime64(datetime(2000, 1, 1, 23))
+    assert stack.epochs[12] == np.datetime64(datetime(2000, 1, 2, 1))
+
+
+def test_load_many_duplicates(ionex_file_path):
+    stack = ionex.load_many([ionex_file_path, ionex_file_path], max_workers=2)
+    assert stack.tec.shape == (12, 71, 73)
+    assert stack.rms is None
+    assert len(np.unique(stack.epochs)) == 12
+
+
+def test_load_many_grid_mismatch(tmp_path, ionex_file_path):
+    with open(ionex_file_path) as file_object:
+        content = file_object.read()
+    content = content.replace(
+        '    -1                                                      EXPONENT',
+        '    -2                                                      EXPONENT',
+    )
+    path = tmp_path / 'exponent.00i'
+    path.write_text(content)
+
+    with ThreadPoolExecutor(2) as executor:
+        with pytest.raises(IONEXError, match='Exponent mismatch'):
+            ionex.load_many([ionex_file_path, str(path)], executor=executor)
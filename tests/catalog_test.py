@@ -0,0 +1,75 @@
+import gzip
+from datetime import datetime
+from io import BytesIO, StringIO
+
+import pytest
+
+import ionex
+from ionex.exceptions import IONEXError, IONEXUnexpectedEnd
+from ionex.index_cache import IndexCache
+
+
+def test_read_header(ionex_file):
+    header = ionex.read_header(ionex_file)
+    assert header.version == 1.0
+    assert header.file_type == 'I'
+    assert header.satellite_system == 'GPS'
+    assert header.program == 'map2ionex'
+    assert header.run_by == 'gAGE/UPC'
+    assert header.first_epoch == datetime(2000, 1, 1, 1)
+    assert header.last_epoch == datetime(2000, 1, 1, 23)
+    assert header.interval == 7200
+    assert header.maps_count == 12
+    assert header.mapping_function == 'NONE'
+    assert header.elevation_cutoff == 0.
+    assert header.observables == 'Phase differences (L1-L2)'
+    assert header.stations_count == 76
+    assert header.satellites_count == 28
+    assert header.base_radius == 6371.
+    assert header.dimension == 2
+    assert header.latitude == (87.5, -87.5, -2.5)
+    assert header.exponent == -1
+    assert len(header.description) == 10
+    assert header.comment[0] == 'Preliminary product'
+    assert header.aux_data == ['DIFFERENTIAL CODE BIASES']
+
+
+def test_read_header_errors():
+    with pytest.raises(IONEXUnexpectedEnd):
+        ionex.read_header(StringIO(
+            '     1.0            IONOSPHERE MAPS     GPS'
+            '                 IONEX VERSION / TYPE\n'
+        ))
+    with pytest.raises(IONEXError):
+        ionex.read_header(StringIO(
+            '     2.11           OBSERVATION DATA    G'
+            '                   RINEX VERSION / TYPE\n'
+            '                                        '
+            '                    END OF HEADER\n'
+        ))
+
+
+def test_reader_header(ionex_file_path):
+    inx = ionex.reader(ionex_file_path)
+    list(inx)
+    assert inx.header == ionex.read_header(ionex_file_path)
+
+
+def test_scan(ionex_file_path):
+    result = ionex.scan(ionex_file_path)
+    epochs = [datetime(2000, 1, 1, h) for h in range(1, 24, 2)]
+    assert result.epochs == epochs
+    assert result.rms_epochs == epochs
+    assert result.header == ionex.read_header(ionex_file_path)
+
+    # сжатый поток просматривается построчно, результат тот же
+    with open(ionex_file_path, 'rb') as file_object:
+        data = gzip.compress(file_object.read())
+    assert ionex.scan(BytesIO(data)) == result
+
+
+def test_scan_cached(ionex_file_path):
+    with IndexCache(':memory:') as cache:
+        expected = ionex.scan(ionex_file_path, cache=cache)
+        assert len(cache) == 1
+        assert ionex.scan(ionex_file_path, cache=cache) == expected
@@ -0,0 +1,81 @@
+import bz2
+import gzip
+import io
+import os
+
+import pytest
+
+from ionex import reader
+from ionex.compression import LZWDecompressor, open_binary
+from ionex.exceptions import IONEXError
+
+TEST_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    'test_data',
+)
+
+
+@pytest.fixture
+def one_map_bytes():
+    with open(os.path.join(TEST_DATA_DIR, 'one_map.xxi'), 'rb') as file_obj:
+        return file_obj.read()
+
+
+@pytest.fixture
+def one_map_z():
+    """one_map.xxi, сжатый compress."""
+    with open(os.path.join(TEST_DATA_DIR, 'one_map.xxi.Z'), 'rb') as file_obj:
+        return file_obj.read()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 4096])
+def test_lzw_decompressor(one_map_z, one_map_bytes, chunk_size):
+    decompressor = LZWDecompressor()
+    data = b''.join(
+        decompressor.decompress(one_map_z[i:i + chunk_size])
+        for i in range(0, len(one_map_z), chunk_size)
+    )
+    assert data == one_map_bytes
+
+
+def test_lzw_decompressor_errors():
+    with pytest.raises(IONEXError):
+        LZWDecompressor().decompress(b'\x1f\x8b\x90')
+    # код 300 ещё не определён
+    with pytest.raises(IONEXError):
+        LZWDecompressor().decompress(b'\x1f\x9d\x90A\x58\x02')
+
+
+@pytest.mark.parametrize('compress', [
+    lambda data: data,
+    gzip.compress,
+    bz2.compress,
+    None,
+])
+def test_open_binary(compress, one_map_bytes, one_map_z):
+    data = one_map_z if compress is None else compress(one_map_bytes)
+    file_object = io.BytesIO(data)
+
+    with open_binary(file_object, chunk_size=256) as stream:
+        assert stream.read() == one_map_bytes
+    # переданный объект файла не закрывается
+    assert not file_object.closed
+
+
+@pytest.mark.parametrize('suffix,compress', [
+    ('.gz', gzip.compress),
+    ('.bz2', bz2.compress),
+    ('', None),
+])
+def test_reader_compressed(tmp_path, one_map_bytes, one_map_z,
+                           one_map_file_data, suffix, compress):
+    data = one_map_z if compress is None else compress(one_map_bytes)
+    path = tmp_path / ('one_map.xxi' + suffix)
+    path.write_bytes(data)
+
+    for file in (str(path), io.BytesIO(data)):
+        # в one_map.xxi нет 'END OF FILE'
+        with pytest.warns(UserWarning, match='Unexpected end of the file'):
+            maps = list(reader(file))
+        assert len(maps) == 1
+        assert list(maps[0].raw_tec) == one_map_file_data
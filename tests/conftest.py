@@ -22,6 +22,11 @@ def get_file_object(filename):
             file_object.close()
 
 
+@pytest.fixture
+def ionex_file_path():
+    return os.path.join(TEST_DATA_DIR, 'ionex_file.00i')
+
+
 @pytest.fixture
 def ionex_file_object():
     with get_file_object('ionex_file.00i') as file_object:
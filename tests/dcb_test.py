@@ -0,0 +1,73 @@
+from io import StringIO
+
+import pytest
+
+import ionex
+from ionex.dcb import parse_satellite, parse_station
+from ionex.index_cache import IndexCache
+
+np = pytest.importorskip('numpy')
+
+HEADER = '''\
+     1.0            IONOSPHERE MAPS     MIX                 IONEX VERSION / TYPE
+DIFFERENTIAL CODE BIASES                                    START OF AUX DATA
+   G01    -0.716     0.141                                  PRN / BIAS / RMS
+   R12     2.500     0.300                                  PRN / BIAS / RMS
+   G ALGO 40104M002    -1.234     0.123                     STATION / BIAS / RMS
+   R IRKT 12313M001     4.000     0.500                     STATION / BIAS / RMS
+DIFFERENTIAL CODE BIASES                                    END OF AUX DATA
+                                                            END OF HEADER
+'''
+
+
+def test_parse_records():
+    assert parse_satellite(b'    01    -0.716     0.141') == \
+        ('G', 1, -0.716, 0.141)
+    assert parse_satellite('   E05     1.000     0.100') == \
+        ('E', 5, 1.0, 0.1)
+    assert parse_station('   G ALGO 40104M002    -1.234     0.123') == \
+        ('G', 'ALGO', '40104M002', -1.234, 0.123)
+
+
+def test_header_dcb():
+    inx = ionex.reader(StringIO(HEADER + ' ' * 60 + 'END OF FILE\n'))
+    list(inx)
+    satellites, stations = inx.dcb
+    assert satellites.system.tolist() == ['G', 'R']
+    assert satellites.prn.tolist() == [1, 12]
+    assert satellites.bias.tolist() == [-0.716, 2.5]
+    assert stations.station.tolist() == ['ALGO', 'IRKT']
+    assert stations.domes.tolist() == ['40104M002', '12313M001']
+    assert stations.rms.tolist() == [0.123, 0.5]
+
+
+def test_file_dcb(ionex_file_path):
+    with ionex.reader(ionex_file_path, random_access=True) as inx:
+        satellites, stations = inx.dcb
+    assert len(satellites.prn) == 27
+    assert satellites.prn[10] == 13
+    assert satellites.bias[10] == 3.803
+    assert len(stations.bias) == 0
+
+
+def test_dcb_cached(ionex_file_path):
+    with IndexCache(':memory:') as cache:
+        expected = ionex.reader(ionex_file_path, random_access=True,
+                                cache=cache).dcb
+        inx = ionex.reader(ionex_file_path, random_access=True, cache=cache)
+        np.testing.assert_array_equal(inx.dcb.satellites.bias,
+                                      expected.satellites.bias)
+
+
+def test_collect_dcb(ionex_file_path, tmp_path):
+    other = tmp_path / 'other.00i'
+    other.write_text(HEADER)
+
+    table = ionex.collect_dcb([ionex_file_path, str(other)])
+    assert table.paths == [ionex_file_path, str(other)]
+    assert table.epochs.dtype == np.dtype('datetime64[s]')
+    assert np.isnat(table.epochs[1])
+    assert len(table.satellites.prn) == 29
+    assert table.satellite_files.tolist() == [0] * 27 + [1] * 2
+    assert table.stations.station.tolist() == ['ALGO', 'IRKT']
+    assert table.station_files.tolist() == [1, 1]
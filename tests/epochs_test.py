@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+
+import ionex
+from ionex.epochs import epoch_array, epoch_list
+from ionex.ionex_file import IonexV1
+
+np = pytest.importorskip('numpy')
+
+LINES = [
+    '  2000     1     1     0     0     0',
+    '  2000     1     1    24     0     0',
+    '  2000     2    28    23    59    60',
+    '  1999    12    31    12    30    15',
+]
+EXPECTED = [
+    datetime(2000, 1, 1),
+    datetime(2000, 1, 2),
+    datetime(2000, 2, 29),
+    datetime(1999, 12, 31, 12, 30, 15),
+]
+
+
+def _epoch_lines(lines):
+    return [line.ljust(60) + 'EPOCH OF CURRENT MAP' for line in lines]
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_parse_epochs(binary):
+    inx = IonexV1(iter(()))
+    lines = _epoch_lines(LINES)
+    if binary:
+        lines = [line.encode('ascii') for line in lines]
+
+    assert [inx._parse_epoch(line) for line in lines] == EXPECTED
+    epochs = inx._parse_epochs(lines)
+    assert epochs.dtype == np.dtype('datetime64[s]')
+    assert epoch_list(epochs) == EXPECTED
+    assert inx._parse_epochs([]).tolist() == []
+
+    np.testing.assert_array_equal(
+        epoch_array(lines, inx._parse_epoch), epochs,
+    )
+
+
+def test_parse_epochs_fallback():
+    inx = IonexV1(iter(()))
+    lines = _epoch_lines(LINES[:1] + ['  2000     1     1     0     0   0.0'])
+    with pytest.warns(UserWarning):
+        assert epoch_list(inx._parse_epochs(lines)) == [EXPECTED[0]] * 2
+
+    for line in ('  2000     2    30     0     0     0',
+                 '  2000    13     1     0     0     0'):
+        with pytest.raises(ValueError):
+            inx._parse_epochs(_epoch_lines(LINES[:1] + [line]))
+
+
+def test_parse_epoch_cache():
+    inx = IonexV1(iter(()))
+    line = _epoch_lines(['  2001     3     4     5     6     7'])[0]
+    IonexV1._cached_epoch.cache_clear()
+    for _ in range(3):
+        assert inx._parse_epoch(line) == datetime(2001, 3, 4, 5, 6, 7)
+    info = IonexV1._cached_epoch.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+
+
+def test_epoch_array(ionex_file_path):
+    with ionex.reader(ionex_file_path, random_access=True) as inx:
+        epochs = inx.epoch_array
+        assert epochs.dtype == np.dtype('datetime64[s]')
+        assert epochs.tolist() == inx.epochs
+        assert inx.epochs[0] == datetime(2000, 1, 1, 1)
+        assert len(inx.epochs) == 12
+
+    with open(ionex_file_path, 'rb') as file_obj:
+        scan = ionex.scan(file_obj)
+    assert scan.epochs == scan.rms_epochs == inx.epochs
+    np.testing.assert_array_equal(scan.epoch_array, epochs)
+    np.testing.assert_array_equal(scan.rms_epoch_array, epochs)
+    np.testing.assert_array_equal(
+        ionex.scan(ionex_file_path).epoch_array, epochs,
+    )
+
+
+def test_epoch_array_period(ionex_file_path):
+    start, end = datetime(2000, 1, 1, 5), datetime(2000, 1, 1, 9)
+    with ionex.reader(ionex_file_path, random_access=True,
+                      start=start, end=end) as inx:
+        epochs = inx.epoch_array
+        assert epochs.tolist() == inx.epochs
+        assert inx.epochs == [start, datetime(2000, 1, 1, 7), end]
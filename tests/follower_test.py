@@ -0,0 +1,100 @@
+import gzip
+
+import pytest
+
+import ionex
+from ionex.exceptions import IONEXError
+from ionex.follower import IonexFollower
+
+
+@pytest.fixture
+def ionex_bytes(ionex_file_path):
+    with open(ionex_file_path, 'rb') as file_obj:
+        return file_obj.read()
+
+
+def _end_of(data, label, n=1):
+    """Смещение конца n-й строки с меткой ``label``."""
+    pos = -1
+    for _ in range(n):
+        pos = data.index(label, pos + 1)
+    return data.index(b'\n', pos) + 1
+
+
+def test_follow(tmp_path, ionex_file_path, ionex_bytes, monkeypatch):
+    path = str(tmp_path / 'growing.00i')
+    expected = list(ionex.reader(ionex_file_path, rms=False))
+
+    parsed = []
+    parse_maps = IonexFollower._parse_maps
+
+    def counting(self, data):
+        parsed.append(data)
+        return parse_maps(self, data)
+
+    monkeypatch.setattr(IonexFollower, '_parse_maps', counting)
+
+    header_end = _end_of(ionex_bytes, b'END OF HEADER')
+    with open(path, 'wb') as file_obj:
+        file_obj.write(ionex_bytes[:header_end - 10])
+
+    follower = ionex.follow(path)
+    assert follower.poll() == []
+    assert follower.header.maps_count is None
+
+    # заголовок и полторы карты
+    second_map = _end_of(ionex_bytes, b'END OF TEC MAP', 2)
+    with open(path, 'ab') as file_obj:
+        file_obj.write(ionex_bytes[header_end - 10:second_map - 100])
+    maps = follower.poll()
+    assert [m.epoch for m in maps] == [expected[0].epoch]
+    assert follower.header.maps_count == 12
+    assert follower.offset == _end_of(ionex_bytes, b'END OF TEC MAP')
+    assert not follower.finished
+
+    # файл не изменился
+    assert follower.poll() == []
+
+    with open(path, 'ab') as file_obj:
+        file_obj.write(ionex_bytes[second_map - 100:])
+    maps += list(follower)
+    assert follower.finished
+    assert follower.poll() == []
+
+    assert [m.epoch for m in maps] == [m.epoch for m in expected]
+    assert [m.tec for m in maps] == [m.tec for m in expected]
+    # каждая карта разобрана один раз
+    assert b''.join(parsed) == ionex_bytes[header_end:]
+
+
+def test_follow_rms(tmp_path, ionex_file_path, ionex_bytes):
+    path = str(tmp_path / 'growing.00i')
+    with open(path, 'wb') as file_obj:
+        file_obj.write(ionex_bytes[:_end_of(ionex_bytes, b'END OF TEC MAP')])
+
+    follower = ionex.follow(path, rms=True)
+    # карта ПЭС ждёт карту RMS
+    assert follower.poll() == []
+
+    with open(path, 'wb') as file_obj:
+        file_obj.write(ionex_bytes)
+    maps = follower.poll()
+    expected = list(ionex.reader(ionex_file_path, rms=True))
+    assert [m.rms for m in maps] == [m.rms for m in expected]
+
+
+def test_follow_errors(tmp_path, ionex_bytes):
+    path = str(tmp_path / 'growing.00i')
+    with open(path, 'wb') as file_obj:
+        file_obj.write(ionex_bytes[:100000])
+    follower = ionex.follow(path)
+    follower.poll()
+    with open(path, 'wb') as file_obj:
+        file_obj.write(ionex_bytes[:1000])
+    with pytest.raises(IONEXError):
+        follower.poll()
+
+    with open(path, 'wb') as file_obj:
+        file_obj.write(gzip.compress(ionex_bytes))
+    with pytest.raises(IONEXError):
+        ionex.follow(path).poll()
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from ionex.interpolation import TecInterpolator, bilinear
+
+np = pytest.importorskip('numpy')
+
+LATITUDE = (10., -10., -5.)
+LONGITUDE = (-180., 180., 5.)
+LATS = np.arange(10., -10.1, -5.)
+LONS = np.arange(-180., 180.1, 5.)
+EPOCH = datetime(2000, 1, 1)
+
+
+def field(shift=0.):
+    """Гладкое поле ПЭС, периодическое по долготе."""
+    lat, lon = np.meshgrid(LATS, LONS + shift, indexing='ij')
+    return 20 + lat + 10 * np.cos(np.radians(lon))
+
+
+def test_bilinear_nodes_and_cells():
+    tec = field()
+    assert bilinear(tec, LATITUDE, LONGITUDE, 5., -175.) == tec[1, 1]
+
+    # в середине ячейки -- среднее по углам
+    value = bilinear(tec, LATITUDE, LONGITUDE, 7.5, -177.5)
+    assert value == pytest.approx(tec[:2, :2].mean())
+
+
+def test_bilinear_longitude_wrap():
+    tec = field()
+    expected = bilinear(tec, LATITUDE, LONGITUDE, 0., -177.5)
+    assert bilinear(tec, LATITUDE, LONGITUDE, 0., 182.5) == \
+        pytest.approx(expected)
+    assert bilinear(tec, LATITUDE, LONGITUDE, 0., 537.5) == \
+        pytest.approx(expected)
+    # между последним и первым узлами, с учётом повторяющейся долготы 180
+    assert bilinear(tec, LATITUDE, LONGITUDE, 0., 180.) == \
+        pytest.approx(tec[2, 0])
+
+
+def test_bilinear_regional_and_gaps():
+    tec = field()[:, :5]
+    longitude = (-180., -160., 5.)
+    assert np.isnan(bilinear(tec, longitude=longitude, latitude=LATITUDE,
+                             lats=0., lons=-150.))
+    assert np.isnan(bilinear(tec, LATITUDE, longitude, 12.5, -170.))
+
+    tec[1, 1] = np.nan
+    values = bilinear(tec, LATITUDE, longitude, [7.5, 7.5], [-177.5, -167.5])
+    assert np.isnan(values[0])
+    assert not np.isnan(values[1])
+
+
+@pytest.fixture
+def interpolator():
+    epochs = [EPOCH + timedelta(hours=2 * i) for i in range(3)]
+    # карта смещается вместе с Солнцем: 30 градусов за 2 часа
+    tec = np.stack([field(30. * i) for i in range(3)])
+    return TecInterpolator(epochs, tec, LATITUDE, LONGITUDE)
+
+
+def test_nearest(interpolator):
+    times = [EPOCH + timedelta(minutes=50), EPOCH + timedelta(minutes=70)]
+    values = interpolator(times, 0., -180., method='nearest')
+    assert values == pytest.approx([field()[2, 0], field(30.)[2, 0]])
+
+
+def test_linear(interpolator):
+    time = EPOCH + timedelta(minutes=30)
+    value = interpolator(time, 0., -180., method='linear')
+    assert value == pytest.approx(
+        0.75 * field()[2, 0] + 0.25 * field(30.)[2, 0]
+    )
+
+
+def test_rotation(interpolator):
+    # через 20 минут узор смещается на 5 градусов: результат точный
+    time = np.datetime64(EPOCH + timedelta(minutes=140))
+    values = interpolator(time, LATS[:, None], LONS[None, :],
+                          method='rotation')
+    assert values.shape == (5, 73)
+    np.testing.assert_allclose(values, field(35.))
+
+
+def test_out_of_range(interpolator):
+    times = [EPOCH - timedelta(minutes=1), EPOCH + timedelta(hours=5)]
+    assert np.isnan(interpolator(times, 0., 0.)).all()
+
+    with pytest.raises(ValueError):
+        interpolator(EPOCH, 0., 0., method='cubic')
+
+
+def test_from_maps(ionex_file_path):
+    import ionex
+
+    maps = list(ionex.reader(ionex_file_path))
+    interpolator = TecInterpolator.from_maps(maps)
+    value = interpolator(maps[3].epoch, 87.5, -180.)
+    assert value == pytest.approx(maps[3].tec[0])
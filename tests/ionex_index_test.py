@@ -0,0 +1,128 @@
+import os
+from datetime import datetime
+from io import StringIO
+from unittest import mock
+
+import pytest
+
+from ionex import reader, scan
+from ionex.exceptions import IONEXError
+from ionex.index_cache import IndexCache
+from ionex.ionex_index import IndexedIonexV1
+
+
+@pytest.fixture
+def indexed(ionex_file_path):
+    with IndexedIonexV1(ionex_file_path) as inx:
+        yield inx
+
+
+def test_index(indexed):
+    assert len(indexed) == 12
+    assert indexed._tec_maps_numbers == list(range(1, 13))
+    assert indexed.epochs == [
+        datetime(2000, 1, 1, h) for h in range(1, 24, 2)
+    ]
+    assert indexed.grid.latitude == (87.5, -87.5, -2.5)
+
+
+def test_random_access(indexed, ionex_file_path):
+    expected = list(reader(ionex_file_path))
+
+    for i in (11, 0, 5, -1):
+        ionex_map = indexed[i]
+        assert ionex_map.epoch == expected[i].epoch
+        assert ionex_map.tec == expected[i].tec
+
+    assert [m.tec for m in indexed[2:4]] == [m.tec for m in expected[2:4]]
+    assert [m.epoch for m in indexed] == [m.epoch for m in expected]
+
+    with pytest.raises(IndexError):
+        indexed[12]
+
+
+def test_at_epoch(indexed):
+    ionex_map = indexed.at_epoch(datetime(2000, 1, 1, 23))
+    assert ionex_map.epoch == datetime(2000, 1, 1, 23)
+
+    with pytest.raises(KeyError):
+        indexed.at_epoch(datetime(2000, 1, 1, 0))
+
+
+def test_reader_random_access(ionex_file_object):
+    inx = reader(ionex_file_object, random_access=True)
+    assert isinstance(inx, IndexedIonexV1)
+    assert len(inx) == 12
+    inx.close()
+    # объект файла остаётся открытым
+    assert not ionex_file_object.closed
+
+
+def test_no_file_on_disk(ionex_file_object):
+    with pytest.raises(IONEXError):
+        IndexedIonexV1(StringIO(ionex_file_object.read()))
+
+
+def test_truncated(tmp_path, ionex_file_object):
+    lines = ionex_file_object.readlines()
+    path = tmp_path / 'truncated.00i'
+    path.write_text(''.join(lines[:600]))
+
+    with pytest.warns(UserWarning, match='Unexpected end of the file'):
+        inx = IndexedIonexV1(str(path))
+    assert len(inx) == 1
+    inx.close()
+
+
+def test_cache(tmp_path, ionex_file_path):
+    path = tmp_path / 'ionex_file.00i'
+    with open(ionex_file_path) as src:
+        path.write_text(src.read())
+    path = str(path)
+
+    with IndexCache(str(tmp_path / 'cache.sqlite')) as cache:
+        with IndexedIonexV1(path, cache=cache) as inx:
+            expected = inx.index, inx.grid, inx.exponent, inx[3].tec
+        assert len(cache) == 1
+
+        # повторное открытие не разбирает заголовок и не ищет карты
+        with mock.patch.object(IndexedIonexV1, '_scan') as scan:
+            with IndexedIonexV1(path, cache=cache) as inx:
+                assert (inx.index, inx.grid, inx.exponent, inx[3].tec) == \
+                    expected
+            scan.assert_not_called()
+
+        # файл изменился -- запись устарела
+        with open(path, 'a') as file_object:
+            file_object.write('\n')
+        with mock.patch.object(IndexedIonexV1, '_scan') as scan:
+            IndexedIonexV1(path, cache=cache).close()
+            scan.assert_called_once()
+
+
+def test_cache_rms(tmp_path, ionex_file_path):
+    # индекс, сохранённый читалкой без rms, годится и для rms=True
+    with IndexCache(str(tmp_path / 'cache.sqlite')) as cache:
+        with reader(ionex_file_path, random_access=True, cache=cache) as inx:
+            assert inx[0].rms is None
+        with reader(ionex_file_path, random_access=True, cache=cache,
+                    rms=True) as inx:
+            assert inx[0].rms is not None
+        assert len(scan(ionex_file_path, cache=cache).rms_epochs) == 12
+
+
+def test_cache_lru(tmp_path):
+    with IndexCache(':memory:', max_entries=2) as cache:
+        stat = os.stat(__file__)
+        keys = [cache.key(str(tmp_path / str(i)), stat) for i in range(3)]
+
+        cache.put(keys[0], {'value': 0})
+        cache.put(keys[1], {'value': 1})
+        # обращение к первой записи делает её самой "свежей"
+        assert cache.get(keys[0]) == {'value': 0}
+        cache.put(keys[2], {'value': 2})
+
+        assert len(cache) == 2
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == {'value': 0}
+        assert cache.get(keys[2]) == {'value': 2}
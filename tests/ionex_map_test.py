@@ -1,8 +1,10 @@
+import pickle
+from array import array
 from datetime import datetime
 
-from pytest import raises, mark, approx
+from pytest import raises, mark, approx, importorskip
 
-from ionex.ionex_map import IonexMap
+from ionex.ionex_map import GRID_CACHE_SIZE, IonexMap, MapGrid
 from ionex.exceptions import IONEXMapError
 
 
@@ -29,8 +31,7 @@ def test_init(exp, epoch, lon, lat, height, tec):
     assert ionex_map.tec == [v * 10 ** exp for v in tec]
     assert ionex_map.epoch == epoch
 
-    with raises(NotImplementedError):
-        rms = ionex_map.rms
+    assert ionex_map.rms is None
 
     # оригинальный список не изменился
     assert tec == orig_tec
@@ -91,3 +92,218 @@ def test_none_value(none_value, exponent, input_tec, expected):
             assert inx.tec[i] is None
         else:
             assert expected[i] == approx(inx.tec[i])
+
+
+@mark.parametrize('none_value,exponent,input_tec', [
+    (None, 0, [1, 2, 3, 4, 9999, 6, 7, 8, 9]),
+    (9999, -1, [1, 2, 3, 9999, 5, 6, 9999, 8, 9]),
+    (8888, 1, [1, 8888, 3, 4, 5, 6, 7, 8, 9]),
+])
+def test_tec_array(none_value, exponent, input_tec):
+    np = importorskip('numpy')
+
+    for tec in (input_tec, np.array(input_tec, dtype=np.int16)):
+        inx = IonexMap(
+            exponent=exponent,
+            epoch=datetime.now(),
+            longitude=(-1, 1, 1),
+            latitude=(-1, 1, 1),
+            height=300.,
+            tec=tec,
+            none_value=none_value,
+        )
+        assert inx.shape == (3, 3)
+
+        tec_array = inx.tec_array
+        assert tec_array.shape == (3, 3)
+        # значение вычисляется один раз
+        assert inx.tec_array is tec_array
+
+        expected = [np.nan if v is None else v for v in inx.tec]
+        np.testing.assert_array_equal(tec_array.ravel(), expected)
+
+
+def test_rms():
+    inx = IonexMap(
+        exponent=-1,
+        epoch=datetime.now(),
+        longitude=(-1, 1, 1),
+        latitude=(-1, 1, 1),
+        height=300.,
+        tec=list(range(9)),
+        rms=[1, 2, 3, 9999, 5, 6, 7, 8, 9],
+        none_value=9999,
+    )
+    assert inx.rms[3] is None
+    assert inx.rms[:3] == approx([0.1, 0.2, 0.3])
+
+    with raises(IONEXMapError):
+        IonexMap(
+            exponent=-1,
+            epoch=datetime.now(),
+            longitude=(-1, 1, 1),
+            latitude=(-1, 1, 1),
+            height=300.,
+            tec=list(range(9)),
+            rms=list(range(8)),
+        )
+
+
+def test_lazy():
+    calls = []
+
+    def tec():
+        calls.append(1)
+        return list(range(9))
+
+    inx = IonexMap(
+        exponent=0,
+        epoch=datetime.now(),
+        longitude=(-1, 1, 1),
+        latitude=(-1, 1, 1),
+        height=300.,
+        tec=tec,
+    )
+    assert not calls
+    assert inx.tec == list(range(9))
+    assert inx.tec == list(range(9))
+    assert len(calls) == 1
+
+    # несоответствие сетке обнаруживается при первом обращении к данным
+    inx = IonexMap(
+        exponent=0,
+        epoch=datetime.now(),
+        longitude=(-1, 1, 1),
+        latitude=(-1, 1, 1),
+        height=300.,
+        tec=lambda: list(range(8)),
+    )
+    with raises(IONEXMapError):
+        inx.tec
+
+
+def test_compact_storage():
+    def make(tec):
+        return IonexMap(
+            exponent=-1,
+            epoch=datetime.now(),
+            longitude=(-1, 1, 1),
+            latitude=(-1, 1, 1),
+            height=300.,
+            tec=tec,
+            none_value=9999,
+        )
+
+    inx = make([1, 2, 3, 9999, 5, 6, 7, 8, 9])
+    assert not hasattr(inx, '__dict__')
+    assert inx.raw_tec.typecode == 'h'
+    assert inx.tec[3] is None
+
+    # значения, не помещающиеся в int16
+    inx = make([1, 2, 3, 99999, 5, 6, 7, 8, 9])
+    assert inx.raw_tec.typecode == 'i'
+    assert inx.tec[3] == approx(9999.9)
+
+    # array передаётся карте без копирования
+    values = array('h', range(9))
+    assert make(values).raw_tec is values
+
+    # сетка и высоты разделяются картами
+    assert make(values).heights is inx.heights
+    assert make(values).grid is inx.grid
+
+
+@mark.parametrize('none_value', [None, 9999])
+def test_float_and_none_values(none_value):
+    values = [1.5, None, 3, 4, 5, 6, 7, 8, 9.25]
+    ionex_map = IonexMap(
+        exponent=-1, epoch=datetime.now(), longitude=(-1, 1, 1),
+        latitude=(-1, 1, 1), height=300., tec=values, rms=values,
+        none_value=none_value,
+    )
+    # не целые значения хранятся копией списка
+    assert ionex_map.raw_tec == values
+    assert ionex_map.raw_tec is not values
+    tec = ionex_map.tec
+    assert tec[1] is None and ionex_map.rms[1] is None
+    assert [tec[0], tec[2], tec[8]] == approx([.15, .3, .925])
+
+    np = importorskip('numpy')
+    assert np.isnan(ionex_map.tec_array[0, 1])
+    assert ionex_map.tec_array[2, 2] == approx(.925)
+
+
+@mark.parametrize('lat,lon,shape', [
+    ((87.5, -87.5, -2.5), (-180., 180., 5.), (71, 73)),
+    # сетка, не пересекающая экватор и нулевой меридиан
+    ((20., 10., -2.5), (100., 120., 5.), (5, 5)),
+    ((-60., -50., 1.), (10., 12., .5), (11, 5)),
+])
+def test_grid_shape(lat, lon, shape):
+    grid = MapGrid(lat, lon)
+    assert grid.shape == shape
+    assert grid.size == shape[0] * shape[1]
+
+
+def test_grid_interned():
+    grid = MapGrid((20., 10., -2.5), (100., 120., 5.))
+    assert MapGrid([20, 10, -2.5], [100, 120, 5]) is grid
+    assert pickle.loads(pickle.dumps(grid)) is grid
+    assert grid == ((20., 10., -2.5), (100., 120., 5.))
+
+    maps = [
+        IonexMap(exponent=0, epoch=datetime.now(), latitude=(20, 10, -2.5),
+                 longitude=(100, 120, 5), height=450., tec=[0] * 25)
+        for _ in range(2)
+    ]
+    assert maps[0].grid is maps[1].grid is grid
+
+
+def test_grid_cache_bounded():
+    grids = [MapGrid((10., 0., -1.), (0., 10., step / 100.))
+             for step in range(1, GRID_CACHE_SIZE + 50)]
+    assert MapGrid._intern.cache_info().currsize == GRID_CACHE_SIZE
+    # последние сетки по-прежнему общие
+    assert MapGrid((10., 0., -1.), grids[-1].longitude) is grids[-1]
+
+    for step in range(1, GRID_CACHE_SIZE + 50):
+        IonexMap._heights((100., 100. + step, 1.), 3)
+    assert IonexMap._heights.cache_info().currsize == GRID_CACHE_SIZE
+
+
+def test_grid_coordinates():
+    importorskip('numpy')
+    grid = MapGrid((20., 10., -2.5), (100., 120., 5.))
+    assert grid.latitudes.tolist() == [20., 17.5, 15., 12.5, 10.]
+    assert grid.longitudes.tolist() == [100., 105., 110., 115., 120.]
+    assert grid.latitudes is grid.latitudes
+
+
+def test_grid_node_and_cell():
+    grid = MapGrid((20., 10., -2.5), (100., 120., 5.))
+    assert grid.node(20., 100.) == 0
+    assert grid.node(16., 111.) == 2 * 5 + 2
+    with raises(ValueError):
+        grid.node(21., 100.)
+    with raises(ValueError):
+        grid.node(15., 125.)
+
+    cell = grid.cell(18.75, 102.5)
+    assert cell.corners == (0, 1, 5, 6)
+    assert cell.lat_weight == approx(.5)
+    assert cell.lon_weight == approx(.5)
+    # точка на последнем узле -- в последней ячейке
+    assert grid.cell(10., 120.).corners == (18, 19, 23, 24)
+
+
+def test_global_grid_wraps():
+    grid = MapGrid((87.5, -87.5, -2.5), (-180., 180., 5.))
+    assert grid.node(87.5, 180.) == grid.node(87.5, -180.) == 0
+    assert grid.node(87.5, 545.) == 1
+    assert grid.cell(87.5, 177.5).corners[:2] == (71, 72)
+
+    # без повторяющегося узла на 360 градусах за последним узлом -- первый
+    grid = MapGrid((87.5, -87.5, -2.5), (0., 355., 5.))
+    cell = grid.cell(87.5, -2.5)
+    assert cell.corners[:2] == (71, 0)
+    assert cell.lon_weight == approx(.5)
@@ -1,9 +1,10 @@
+from array import array
 from datetime import datetime
-from io import StringIO
+from io import BytesIO, StringIO
 
 import pytest
 
-from ionex.ionex_file import IonexV1, Grid, MapGridDef
+from ionex.ionex_file import IonexV1, ByteLines, Grid, MapGridDef
 from ionex.ionex_file import Latitude, Longitude, Height, Map
 
 
@@ -155,7 +156,8 @@ def test_read_map(one_map_file, one_map_file_data):
     # FIXME: в фикстуры
     epoch = datetime(1999, 1, 2, 1, 0, 0)
     height = 450.0
-    result = Map(epoch=epoch, height=height, data=one_map_file_data)
+    result = Map(epoch=epoch, height=height,
+                 data=array('h', one_map_file_data))
 
     # находимся в начале файла: промотаем до начала карты
     line = ''
@@ -182,3 +184,64 @@ def test_reader_no_end_of_file(ionex_file_no_end_of_file):
         for _ in inx:
             pass
     assert inx._tec_maps_numbers == list(range(1, 13))
+
+
+@pytest.mark.parametrize('lines', [
+    [
+        '   91   95   93   92   93   99  106  112  111\n',
+        '  864 1225 1850 2864 4459 6918106621632624853   82   85   89   94\n',
+    ],
+    # длина строки не кратна 5
+    [
+        '   91   95   93\n',
+        '   1.0\n',
+    ],
+])
+def test_read_block(lines):
+    expected = []
+    try:
+        for line in lines:
+            expected += IonexV1._read_slice(line)
+    except AssertionError:
+        with pytest.raises(AssertionError):
+            IonexV1._read_block(lines)
+        return
+
+    assert expected == list(IonexV1._read_block(lines))
+
+
+def test_read_block_fallback():
+    # поле не является целым числом: разбираем построчно, как раньше
+    lines = ['   91  1.0   93\n']
+    with pytest.raises(ValueError):
+        IonexV1._read_block(lines)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_byte_lines(chunk_size):
+    data = b'line 1\nline 2\r\n\nlast line'
+    lines = ByteLines(BytesIO(data), chunk_size=chunk_size)
+    assert list(lines) == [b'line 1', b'line 2\r', b'', b'last line']
+
+
+@pytest.mark.parametrize('line,label', [
+    (b'     1                                                      '
+     b'START OF TEC MAP', 'START OF TEC MAP'),
+    (b'    12                                                      '
+     b'# OF MAPS IN FILE  \r', '# OF MAPS IN FILE'),
+    (b'   82   80   80   81   82   83   83   83   82   80   71   67   67'
+     b'   69   72   82', ''),
+    (b'  -12', ''),
+])
+def test_get_byte_label(line, label):
+    assert label == IonexV1._get_byte_label(line)
+
+
+def test_reader_binary(ionex_file_object):
+    content = ionex_file_object.read()
+    expected = list(IonexV1(StringIO(content)))
+
+    maps = list(IonexV1(BytesIO(content.encode().replace(b'\n', b'\r\n'))))
+    assert [m.epoch for m in maps] == [m.epoch for m in expected]
+    assert [m.tec for m in maps] == [m.tec for m in expected]
+    assert [m.rms for m in maps] == [m.rms for m in expected]
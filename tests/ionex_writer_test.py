@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+from io import BytesIO, StringIO
+
+import pytest
+
+import ionex
+from ionex.exceptions import IONEXError
+from ionex.ionex_map import MapGrid
+from ionex.ionex_writer import IonexWriterV1, write_arrays, _format_fields
+
+np = pytest.importorskip('numpy')
+
+
+def test_format_fields():
+    values = np.array([0, 7, -5, 12, -123, 9999, -9999, 99999])
+    assert bytes(_format_fields(values)) == \
+        b'    0    7   -5   12 -123 9999-999999999'
+
+    with pytest.raises(IONEXError):
+        _format_fields(np.array([100000]))
+    with pytest.raises(IONEXError):
+        _format_fields(np.array([-10000]))
+
+
+def test_round_trip(ionex_file_path):
+    maps = list(ionex.reader(ionex_file_path))
+    buffer = BytesIO()
+    ionex.writer(buffer, maps, run_by='test', description=['Round trip'])
+
+    lines = buffer.getvalue().decode('ascii').splitlines()
+    assert all(len(line) <= 80 for line in lines)
+    assert lines[0][60:] == 'IONEX VERSION / TYPE'
+    assert lines[-1][60:] == 'END OF FILE'
+    assert '  7200' + ' ' * 54 + 'INTERVAL' in lines
+    assert '    12' + ' ' * 54 + '# OF MAPS IN FILE' in lines
+
+    buffer.seek(0)
+    result = list(ionex.reader(buffer))
+    assert len(result) == len(maps)
+    for ionex_map, orig in zip(result, maps):
+        assert ionex_map.epoch == orig.epoch
+        assert ionex_map.grid is orig.grid
+        assert ionex_map.exponent == orig.exponent
+        assert ionex_map.height == orig.height
+        assert ionex_map.tec == orig.tec
+        assert ionex_map.rms == orig.rms
+
+
+def test_write_arrays(tmp_path):
+    path = str(tmp_path / 'regional.20i')
+    # 21 долгота: неполная последняя строка каждой широты
+    grid = ((60., 50., -2.5), (100., 120., 1.))
+    epochs = [datetime(2020, 1, 1) + timedelta(minutes=15 * i)
+              for i in range(3)]
+    tec = np.arange(3 * 5 * 21, dtype=float).reshape(3, 5, 21) / 10 - 2
+    tec[1, 2, 3] = np.nan
+
+    write_arrays(path, np.array(epochs, dtype='datetime64[s]'), tec, grid,
+                 rms=np.ones_like(tec), height=350.)
+
+    with open(path) as file_object:
+        lines = file_object.read().splitlines()
+    assert not any(line.endswith(' ') for line in lines)
+
+    maps = list(ionex.reader(path, array=True, rms=True))
+    assert [m.epoch for m in maps] == epochs
+    assert maps[0].shape == (5, 21)
+    assert maps[0].height == (350., 350., 0.)
+    np.testing.assert_allclose(maps[2].tec_array, tec[2])
+    np.testing.assert_allclose(maps[1].tec_array, tec[1])
+    assert (maps[0].rms_array == 1).all()
+
+
+def test_text_file():
+    grid = ((1., -1., -1.), (0., 2., 1.))
+    buffer = StringIO()
+    write_arrays(buffer, [datetime(2020, 1, 1)], np.ones((1, 3, 3)), grid,
+                 exponent=0)
+    buffer.seek(0)
+    ionex_map, = ionex.reader(buffer)
+    assert ionex_map.tec == [1] * 9
+
+
+def test_writer_equal_grids(ionex_file_path):
+    maps = list(ionex.reader(ionex_file_path))[:2]
+    # сетка вытеснена из кэша MapGrid: равные сетки -- разные объекты
+    MapGrid._intern.cache_clear()
+    maps += list(ionex.reader(ionex_file_path))[2:4]
+    assert maps[0].grid == maps[2].grid and maps[0].grid is not maps[2].grid
+
+    buffer = BytesIO()
+    ionex.writer(buffer, maps)
+    buffer.seek(0)
+    assert [m.epoch for m in ionex.reader(buffer)] == \
+        [m.epoch for m in maps]
+
+
+def test_writer_errors():
+    grid = ((1., -1., -1.), (0., 2., 1.))
+    epochs = [datetime(2020, 1, 1), datetime(2020, 1, 1, 1)]
+
+    with pytest.raises(IONEXError):
+        ionex.writer(BytesIO(), [])
+
+    with pytest.raises(IONEXError):
+        with IonexWriterV1(BytesIO(), grid=grid, epochs=epochs) as writer:
+            writer.write_map(np.zeros(9))
+
+    with IonexWriterV1(BytesIO(), grid=grid, epochs=epochs) as writer:
+        with pytest.raises(IONEXError):
+            writer.write_map(np.zeros(8))
+        writer.write_map(np.zeros(9))
+        writer.write_map(np.zeros(9))
+        with pytest.raises(IONEXError):
+            writer.write_map(np.zeros(9))
@@ -0,0 +1,90 @@
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+import ionex
+from ionex.ionex_index import IndexedIonexV1
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def expected(ionex_file_path):
+    maps = list(ionex.reader(ionex_file_path, array=True))
+    return np.stack([m.raw_tec.reshape(m.shape) for m in maps])
+
+
+@pytest.mark.parametrize('split_maps', [None, 5, 12])
+def test_parallel_reader(ionex_file_path, expected, split_maps):
+    paths = [ionex_file_path] * 5
+    results = list(ionex.parallel_reader(
+        paths,
+        rms=True,
+        max_workers=2,
+        max_in_flight=3,
+        split_maps=split_maps,
+    ))
+
+    assert [f.path for f in results] == paths
+    for f in results:
+        assert len(f.epochs) == 12
+        assert f.exponent == -1
+        assert f.grid == ((87.5, -87.5, -2.5), (-180.0, 180.0, 5.0))
+        np.testing.assert_array_equal(f.tec, expected)
+        assert f.rms.shape == expected.shape
+
+
+@pytest.mark.parametrize('maps_count', [5, 20])
+def test_parallel_reader_split_header(tmp_path, ionex_file_path, expected,
+                                      maps_count):
+    # число карт в заголовке неверно: последняя часть читается до конца
+    with open(ionex_file_path) as file_object:
+        content = file_object.read()
+    path = tmp_path / 'count.00i'
+    path.write_text(content.replace(
+        '    12{}# OF MAPS IN FILE'.format(' ' * 54),
+        '{:6d}{}# OF MAPS IN FILE'.format(maps_count, ' ' * 54),
+    ))
+
+    with mock.patch('ionex.parallel.IndexedIonexV1',
+                    wraps=IndexedIonexV1) as indexed:
+        with ThreadPoolExecutor(2) as executor:
+            f, = ionex.parallel_reader(
+                [str(path)], split_maps=2, executor=executor,
+            )
+    np.testing.assert_array_equal(f.tec, expected)
+    # файл индексируется только заданиями, по одному разу на часть
+    assert indexed.call_count == (maps_count + 1) // 2
+
+
+def test_parallel_reader_split_compressed(tmp_path, ionex_file_path,
+                                          expected):
+    path = str(tmp_path / 'ionex_file.00i.gz')
+    with open(ionex_file_path, 'rb') as src, gzip.open(path, 'wb') as dst:
+        dst.write(src.read())
+
+    with ThreadPoolExecutor(2) as executor:
+        f, = ionex.parallel_reader([path], split_maps=4, executor=executor)
+    np.testing.assert_array_equal(f.tec, expected)
+
+
+def test_parallel_reader_bounded(ionex_file_path):
+    submitted = []
+
+    class Executor(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):
+            submitted.append(args)
+            return super().submit(*args, **kwargs)
+
+    with Executor(2) as executor:
+        results = ionex.parallel_reader(
+            iter([ionex_file_path] * 10),
+            max_in_flight=2,
+            executor=executor,
+        )
+        next(results)
+        # получен первый результат: в работе не больше max_in_flight заданий
+        assert len(submitted) <= 3
+        results.close()
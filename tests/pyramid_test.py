@@ -0,0 +1,156 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import ionex
+from ionex.exceptions import IONEXError
+from ionex.ionex_map import MapGrid
+from ionex.pyramid import coarse_grid
+
+np = pytest.importorskip('numpy')
+
+GRID = MapGrid((20., -20., -5.), (0., 30., 5.))
+START = datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def daily_files(tmp_path):
+    """Двое суток, карты через 6 часов; карта на полночь есть в обоих
+    файлах."""
+    rng = np.random.default_rng(0)
+    epochs = [START + timedelta(hours=6 * i) for i in range(9)]
+    tec = np.round(rng.uniform(0., 50., (9, ) + GRID.shape), 1)
+    tec[rng.random(tec.shape) < 0.2] = np.nan
+    tec[:, 0, 0] = np.nan
+
+    paths = []
+    for day, maps in enumerate((slice(0, 5), slice(4, 9))):
+        path = str(tmp_path / 'day{}.20i'.format(day))
+        ionex.write_arrays(path, epochs[maps], tec[maps], GRID)
+        paths.append(path)
+    return paths, np.array(epochs, dtype='datetime64[s]'), tec
+
+
+def _reference(tec, epochs, unit):
+    keys = epochs.astype('datetime64[{}]'.format(unit))
+    bins = np.unique(keys)
+    with np.errstate(invalid='ignore'), pytest.warns(RuntimeWarning):
+        return bins, {
+            'mean': np.array([np.nanmean(tec[keys == k], 0) for k in bins]),
+            'min': np.array([np.nanmin(tec[keys == k], 0) for k in bins]),
+            'max': np.array([np.nanmax(tec[keys == k], 0) for k in bins]),
+        }
+
+
+def test_coarse_grid():
+    grid = coarse_grid(GRID, 2)
+    assert grid == ((17.5, -22.5, -10.), (2.5, 32.5, 10.))
+    assert grid.shape == (5, 4)
+    assert coarse_grid(GRID, 1) is GRID
+
+
+def test_coarse_grid_global(tmp_path, ionex_file_path):
+    maps = list(ionex.reader(ionex_file_path, array=True))
+    grid = maps[0].grid
+    assert grid.shape == (71, 73) and grid.period == 72
+
+    # столбец 180 градусов повторяет -180 и не образует отдельной ячейки
+    coarse = coarse_grid(grid, 2)
+    assert coarse.longitude == (-177.5, 172.5, 10.)
+    assert coarse.shape == (36, 36)
+    assert coarse.period == 36
+
+    path = str(tmp_path / 'pyramid')
+    ionex.build_pyramid(ionex_file_path, path, periods=['day'],
+                        factors=(2, ))
+    with ionex.load_pyramid(path) as pyramid:
+        overview = pyramid.query(statistic='max')
+    assert overview.grid == coarse
+    assert overview.values.shape == (1, 36, 36)
+
+    tec = np.stack([m.tec_array for m in maps])[:, :, :72]
+    with pytest.warns(RuntimeWarning):
+        expected = np.nanmax(np.concatenate(
+            [tec, np.full(tec.shape[:1] + (1, 72), np.nan)], axis=1,
+        ).reshape(12, 36, 2, 36, 2), axis=(0, 2, 4))
+    np.testing.assert_allclose(overview.values[0], expected, rtol=1e-6)
+
+
+def test_build_pyramid(tmp_path, daily_files):
+    paths, epochs, tec = daily_files
+    path = str(tmp_path / 'pyramid')
+    # файлы упорядочиваются по эпохе первой карты
+    ionex.build_pyramid(paths[::-1], path, factors=(1, 2))
+    assert not [name for name in os.listdir(path) if name.endswith('.part')]
+
+    with ionex.load_pyramid(path) as pyramid:
+        assert pyramid.grid == GRID
+        assert [(level.period, level.factor) for level in pyramid.levels] \
+            == [('hour', 1), ('hour', 2), ('day', 1), ('day', 2)]
+
+        bins, expected = _reference(tec, epochs, 'D')
+        for statistic in ('mean', 'min', 'max'):
+            overview = pyramid.query(
+                time_resolution=timedelta(days=1), spatial_resolution=5.,
+                statistic=statistic,
+            )
+            assert (overview.period, overview.factor) == ('day', 1)
+            np.testing.assert_array_equal(overview.epochs, bins)
+            np.testing.assert_allclose(
+                overview.values, expected[statistic], rtol=1e-6,
+            )
+
+        # узел (0, 0) отсутствует во всех картах
+        assert np.isnan(overview.values[:, 0, 0]).all()
+
+        # блок 2 x 2 -- все значения четырёх узлов за сутки
+        overview = pyramid.query(time_resolution=timedelta(days=1))
+        assert (overview.period, overview.factor) == ('day', 2)
+        assert overview.grid == coarse_grid(GRID, 2)
+        block = np.nanmean(tec[epochs < np.datetime64('2020-01-02'),
+                               2:4, 4:6])
+        assert overview.values[0, 1, 2] == pytest.approx(block, rel=1e-6)
+
+        # по часам -- каждая карта, повторная карта на полночь пропущена
+        overview = pyramid.query(
+            datetime(2020, 1, 1, 6), datetime(2020, 1, 2, 6),
+            time_resolution=timedelta(hours=1), spatial_resolution=5.,
+        )
+        np.testing.assert_array_equal(overview.epochs, epochs[1:6])
+        np.testing.assert_allclose(overview.values, tec[1:6], rtol=1e-6)
+
+
+def test_select(tmp_path, daily_files):
+    path = str(tmp_path / 'pyramid')
+    ionex.build_pyramid(daily_files[0], path, periods=['hour'])
+    pyramid = ionex.load_pyramid(path)
+
+    assert pyramid.select().factor == 4
+    assert pyramid.select(spatial_resolution=10.).factor == 2
+    with pytest.raises(ValueError):
+        pyramid.select(time_resolution=timedelta(minutes=30))
+    with pytest.raises(ValueError):
+        pyramid.select(spatial_resolution=1.)
+    with pytest.raises(ValueError):
+        pyramid.query(statistic='median')
+
+
+def test_build_pyramid_errors(tmp_path, daily_files):
+    paths, _, _ = daily_files
+    path = str(tmp_path / 'pyramid')
+
+    with pytest.raises(ValueError):
+        ionex.build_pyramid(paths, path, periods=['week'])
+    with pytest.raises(ValueError):
+        ionex.build_pyramid(paths, path, factors=[0])
+    with pytest.raises(IONEXError):
+        ionex.build_pyramid([], path)
+
+    maps = list(ionex.reader(paths[1])) + list(ionex.reader(paths[0]))
+    with pytest.raises(IONEXError):
+        ionex.build_pyramid(maps, path)
+    assert not [name for name in os.listdir(path) if name.endswith('.part')]
+
+    with pytest.raises(IONEXError):
+        ionex.load_pyramid(str(tmp_path))
@@ -0,0 +1,89 @@
+import pytest
+
+import ionex
+from ionex.ionex_file import IonexV1
+
+EPOCH_LINE = '  2000     1     1     0     0   0.0'.ljust(60) + \
+    'EPOCH OF CURRENT MAP'
+
+
+def _data(ionex_file_path):
+    with open(ionex_file_path, 'rb') as file_obj:
+        return file_obj.read()
+
+
+def test_stats_disabled(ionex_file_path):
+    inx = ionex.reader(ionex_file_path)
+    assert inx.stats is None
+    # методы экземпляра не оборачиваются
+    assert '_next_map' not in vars(inx)
+
+
+def test_stats(ionex_file_path):
+    data = _data(ionex_file_path)
+    calls = []
+
+    inx = ionex.reader(ionex_file_path, rms=True,
+                       stats=ionex.ParseStats(callback=calls.append))
+    maps = list(inx)
+    stats = inx.stats
+    assert calls == [stats]
+
+    assert stats.bytes == len(data)
+    assert stats.lines == data.count(b'\n')
+    assert stats.maps == stats.rms_maps == len(maps) == 12
+    # по карте ПЭС и RMS, 71 x 73 узла
+    assert stats.fields == 2 * 12 * 71 * 73
+    assert stats.missing == sum(
+        m.raw_tec.count(9999) + m.raw_rms.count(9999) for m in maps
+    )
+    # эпохи карт ПЭС и RMS и первой/последней карт в заголовке
+    assert stats.epochs == 2 * 12 + 2
+    assert stats.coerced == 0
+
+    values = stats.as_dict()
+    assert set(values) >= {'total', 'io', 'header', 'epoch', 'decode',
+                           'make_map', 'scan'}
+    assert stats.total > 0
+    assert stats.total >= stats.decode + stats.epoch + stats.header
+    assert values['scan'] == stats.scan >= 0
+
+
+@pytest.mark.parametrize('kwargs,fields', [
+    ({'random_access': True, 'rms': True}, 12 * 71 * 73 * 2),
+    # ленивые карты разбирают значения без читалки
+    ({'lazy': True}, 0),
+])
+def test_stats_modes(ionex_file_path, kwargs, fields):
+    inx = ionex.reader(ionex_file_path, stats=True, **kwargs)
+    maps = list(inx)
+    assert inx.stats.maps == 12
+    for ionex_map in maps:
+        ionex_map.tec
+    assert inx.stats.fields == fields
+    assert inx.stats.total > 0
+
+
+def test_stats_shared(ionex_file_path):
+    stats = ionex.ParseStats()
+    for _ in range(2):
+        list(ionex.reader(ionex_file_path, stats=stats))
+    assert stats.maps == 24
+    assert stats.rms_maps == 0
+    assert stats.fields == 24 * 71 * 73
+
+
+def test_stats_coerced(ionex_file_object):
+    inx = IonexV1(ionex_file_object, stats=True)
+    with pytest.warns(UserWarning):
+        inx._parse_epoch(EPOCH_LINE)
+    assert inx.stats.coerced == 1
+    assert inx.stats.epochs == 1
+
+
+def test_stats_follow(ionex_file_path):
+    inx = ionex.follow(ionex_file_path, stats=True)
+    maps = list(inx)
+    assert inx.stats.bytes == len(_data(ionex_file_path))
+    assert inx.stats.maps == len(maps) == 12
+    assert inx.stats.total > 0
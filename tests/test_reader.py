@@ -1,3 +1,9 @@
+import gc
+import pickle
+import weakref
+from io import StringIO
+from unittest import mock
+
 import pytest
 
 from ionex import _get_version_type, reader, IonexV1
@@ -29,3 +35,93 @@ def test_reader(ionex_file):
     # оставляем открытым
     if not isinstance(ionex_file, str):
         assert not ionex_file.closed
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_reader_file_object_header(ionex_file_path, binary):
+    with open(ionex_file_path, 'rb' if binary else 'r') as file_object:
+        inx = reader(file_object)
+        list(inx)
+    expected = reader(ionex_file_path)
+    list(expected)
+    assert (inx.header.version, inx.header.file_type) == (1.0, 'I')
+    assert inx.header == expected.header
+
+
+def test_reader_array(ionex_file_path):
+    np = pytest.importorskip('numpy')
+
+    expected = [m.tec for m in reader(ionex_file_path)]
+    maps = list(reader(ionex_file_path, array=True))
+
+    assert len(maps) == len(expected)
+    for ionex_map, tec in zip(maps, expected):
+        assert ionex_map.tec == tec
+        assert ionex_map.tec_array.shape == (71, 73)
+        assert ionex_map.tec_array.dtype == np.float64
+
+
+@pytest.mark.parametrize('random_access', [False, True])
+def test_reader_rms(ionex_file_path, random_access):
+    inx = reader(ionex_file_path, random_access=random_access, rms=True)
+    maps = list(inx)
+    assert len(maps) == 12
+    assert all(m.rms is not None for m in maps)
+    assert maps[0].rms[:5] == pytest.approx([2.6, 2.3, 2.1, 2.1, 2.2])
+    assert maps[0].rms[23] is None
+
+    # по умолчанию карты RMS пропускаются
+    inx = reader(ionex_file_path, random_access=random_access)
+    assert all(m.rms is None for m in inx)
+
+
+def test_reader_rms_no_match(ionex_file_path):
+    with open(ionex_file_path) as file_object:
+        content = file_object.read()
+    # у первой карты RMS другая эпоха
+    content = content.replace(
+        '     1                                                      '
+        'START OF RMS MAP\n'
+        '  2000     1     1     1',
+        '     1                                                      '
+        'START OF RMS MAP\n'
+        '  2000     1     1     2',
+    )
+
+    with pytest.warns(UserWarning, match='RMS map 1'):
+        maps = list(reader(StringIO(content), rms=True))
+    assert len(maps) == 12
+    assert maps[0].rms is None
+    assert maps[1].rms is not None
+
+
+def test_reader_lazy(ionex_file_path):
+    expected = list(reader(ionex_file_path, rms=True))
+
+    with mock.patch.object(IonexV1, '_read_block',
+                           wraps=IonexV1._read_block) as read_block:
+        maps = list(reader(ionex_file_path, lazy=True, rms=True))
+        # данные ещё не разбирались
+        read_block.assert_not_called()
+        assert [m.epoch for m in maps] == [m.epoch for m in expected]
+
+        assert maps[3].tec == expected[3].tec
+        assert maps[3].rms == expected[3].rms
+        assert read_block.call_count == 2
+
+
+def test_reader_lazy_detached(ionex_file_path):
+    expected = list(reader(ionex_file_path))
+
+    inx = reader(ionex_file_path, lazy=True)
+    maps = list(inx)
+    # ленивые карты не ссылаются на читалку и её файл
+    ref = weakref.ref(inx)
+    del inx
+    gc.collect()
+    assert ref() is None
+
+    restored = pickle.loads(pickle.dumps(maps[5]))
+    assert restored.epoch == expected[5].epoch
+    assert restored.tec == expected[5].tec
+    assert restored.rms == expected[5].rms
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import ionex
+from ionex.binary import dump, load
+from ionex.interpolation import interpolate_height
+
+np = pytest.importorskip('numpy')
+
+GRID = ((30., 20., -5.), (100., 110., 5.))
+HEIGHT = (100., 500., 200.)
+EPOCHS = [datetime(2020, 1, 1) + timedelta(hours=i) for i in range(2)]
+
+
+@pytest.fixture
+def tec():
+    # (время, высота, широта, долгота)
+    values = np.arange(2 * 3 * 3 * 3, dtype=float).reshape(2, 3, 3, 3)
+    values[1, 2, 0, 0] = np.nan
+    return values
+
+
+@pytest.fixture
+def path_3d(tmp_path, tec):
+    path = str(tmp_path / 'tomo.20i')
+    ionex.write_arrays(path, EPOCHS, tec, GRID, rms=tec / 10,
+                       height=HEIGHT)
+    return path
+
+
+@pytest.mark.parametrize('random_access', [False, True])
+def test_read_3d(path_3d, tec, random_access):
+    maps = list(ionex.reader(path_3d, random_access=random_access,
+                             array=True, rms=True))
+    assert len(maps) == 2
+    assert [m.epoch for m in maps] == EPOCHS
+
+    ionex_map = maps[1]
+    assert ionex_map.dimension == 3
+    assert ionex_map.heights == (100., 300., 500.)
+    assert ionex_map.shape == (3, 3, 3)
+    np.testing.assert_allclose(ionex_map.tec_array, tec[1])
+    np.testing.assert_allclose(ionex_map.rms_array, tec[1] / 10, atol=.05)
+
+
+def test_at_height(path_3d, tec):
+    ionex_map = list(ionex.reader(path_3d))[0]
+    np.testing.assert_allclose(ionex_map.at_height(300.), tec[0, 1])
+    np.testing.assert_allclose(ionex_map.at_height(200.),
+                               (tec[0, 0] + tec[0, 1]) / 2)
+
+    layers = ionex_map.at_height([100., 400., 600.])
+    assert layers.shape == (3, 3, 3)
+    np.testing.assert_allclose(layers[1], (tec[0, 1] + tec[0, 2]) / 2)
+    assert np.isnan(layers[2]).all()
+
+
+def test_interpolate_height_descending(tec):
+    values = tec[0][::-1]
+    result = interpolate_height(values, (500., 300., 100.), 200.)
+    np.testing.assert_allclose(result, (tec[0, 0] + tec[0, 1]) / 2)
+
+
+def test_round_trip_3d(path_3d, tmp_path, tec):
+    maps = list(ionex.reader(path_3d))
+
+    copy = str(tmp_path / 'copy.20i')
+    ionex.writer(copy, maps)
+    assert [m.tec for m in ionex.reader(copy)] == [m.tec for m in maps]
+
+    binary = str(tmp_path / 'tomo.bin')
+    dump(path_3d, binary)
+    with load(binary) as inx:
+        assert inx.tec.shape == (2, 3, 3, 3)
+        assert inx[1].dimension == 3
+        np.testing.assert_allclose(inx[1].tec_array, tec[1])
+
+
+def test_2d_map_has_no_layers(ionex_file_path):
+    ionex_map = next(iter(ionex.reader(ionex_file_path)))
+    assert ionex_map.dimension == 2
+    assert ionex_map.heights == (450., )
+    with pytest.raises(ValueError):
+        ionex_map.at_height(450.)
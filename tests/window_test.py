@@ -0,0 +1,125 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import ionex
+from ionex.ionex_map import MapGrid
+
+BBOX = (35., 70., 20., 90.)
+
+
+def test_grid_window():
+    grid = MapGrid((87.5, -87.5, -2.5), (-180., 180., 5.))
+    rows, columns, window = grid.window(*BBOX)
+    assert rows == range(7, 22)
+    assert columns == range(40, 55)
+    assert window == ((70., 35., -2.5), (20., 90., 5.))
+    assert window.shape == (15, 15)
+
+    # границы между узлами
+    rows, columns, window = grid.window(36., 39., 21., 26.)
+    assert rows == range(20, 21)
+    assert columns == range(41, 42)
+    assert window == ((37.5, 37.5, -2.5), (25., 25., 5.))
+
+    with pytest.raises(ValueError):
+        grid.window(88., 89., 0., 10.)
+    with pytest.raises(ValueError):
+        grid.window(36., 39., 21., 24.)
+
+
+def test_reader_bbox(ionex_file_path):
+    np = pytest.importorskip('numpy')
+    rows, columns, grid = MapGrid(
+        (87.5, -87.5, -2.5), (-180., 180., 5.),
+    ).window(*BBOX)
+
+    full = list(ionex.reader(ionex_file_path, array=True, rms=True))
+    maps = list(ionex.reader(ionex_file_path, array=True, rms=True,
+                             bbox=BBOX))
+    assert len(maps) == len(full)
+    for ionex_map, full_map in zip(maps, full):
+        assert ionex_map.grid is grid
+        assert ionex_map.epoch == full_map.epoch
+        for name in ('tec_array', 'rms_array'):
+            np.testing.assert_array_equal(
+                getattr(ionex_map, name),
+                getattr(full_map, name)[rows.start:rows.stop,
+                                        columns.start:columns.stop],
+            )
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'lazy': True},
+                                    {'random_access': True}])
+def test_reader_bbox_modes(ionex_file_path, ionex_file_object, kwargs):
+    expected = [m.tec for m in ionex.reader(ionex_file_object, bbox=BBOX)]
+    maps = ionex.reader(ionex_file_path, bbox=BBOX, **kwargs)
+    assert [m.tec for m in maps] == expected
+    assert len(expected[0]) == 15 * 15
+
+
+def test_reader_period(ionex_file_path):
+    start = datetime(2000, 1, 1, 5)
+    end = datetime(2000, 1, 1, 9)
+    expected = [datetime(2000, 1, 1, h) for h in (5, 7, 9)]
+
+    maps = list(ionex.reader(ionex_file_path, start=start, end=end,
+                             rms=True))
+    assert [m.epoch for m in maps] == expected
+    assert all(m.rms is not None for m in maps)
+
+    maps = list(ionex.reader(ionex_file_path, start=datetime(2000, 1, 1, 20)))
+    assert [m.epoch for m in maps] == [datetime(2000, 1, 1, 21),
+                                       datetime(2000, 1, 1, 23)]
+
+    with ionex.reader(ionex_file_path, random_access=True,
+                      start=start, end=end) as inx:
+        assert inx.epochs == expected
+        assert inx.at_epoch(end).epoch == end
+
+    async def read():
+        with open(ionex_file_path, 'rb') as file_obj:
+            data = file_obj.read()
+        stream = asyncio.StreamReader()
+        stream.feed_data(data)
+        stream.feed_eof()
+        return [m.epoch async for m in ionex.areader(stream, start=start,
+                                                     end=end)]
+
+    assert asyncio.run(read()) == expected
+
+
+def test_reader_period_numbers(ionex_file_path):
+    start = datetime(2000, 1, 1, 5)
+    end = datetime(2000, 1, 1, 9)
+
+    inx = ionex.reader(ionex_file_path, start=start, end=end, rms=True)
+    list(inx)
+    follower = ionex.follow(ionex_file_path, start=start, end=end, rms=True)
+    assert len(follower.poll()) == 3
+    with ionex.reader(ionex_file_path, random_access=True,
+                      start=start, end=end) as indexed:
+        numbers = indexed._tec_maps_numbers
+
+    # номера только выданных карт
+    assert numbers == [3, 4, 5]
+    assert inx._tec_maps_numbers == follower._tec_maps_numbers == numbers
+
+
+def test_reader_period_cache(ionex_file_path, tmp_path):
+    cache = ionex.IndexCache(str(tmp_path / 'index.sqlite'))
+    with ionex.reader(ionex_file_path, random_access=True, cache=cache,
+                      end=datetime(2000, 1, 1, 3)) as inx:
+        assert len(inx) == 2
+    # в кэше -- полный индекс файла
+    with ionex.reader(ionex_file_path, random_access=True,
+                      cache=cache) as inx:
+        assert len(inx) == 12
+
+
+def test_reader_bbox_errors(ionex_file_path):
+    with pytest.raises(ValueError):
+        ionex.reader(ionex_file_path, bbox=(70., 35., 20., 90.))
+    with pytest.raises(ValueError):
+        list(ionex.reader(ionex_file_path, bbox=(88., 89., 0., 10.)))